@@ -0,0 +1,76 @@
+import importlib
+
+# === Exercise Registry ===
+# name -> (module, rule class). Modules are imported on demand so that looking
+# up one exercise never pulls in the others.
+EXERCISES = {
+    "squat": ("squat_tracker", "SquatRule"),
+    "pull_up": ("Pull_up", "PullUpRule"),
+    "bench_press": ("Bench_press", "BenchPressRule"),
+    "lunges": ("lunges", "LungeRule"),
+    "shoulder_press": ("shoulder_press", "ShoulderPressRule"),
+    "bicep_curl": ("bicep_curl", "BicepCurlRule"),
+    "crunches": ("crunches_seated", "CrunchRule"),
+    "deadlift": ("deadlift_tracker", "DeadliftRule"),
+    "lateral_raise": ("lat", "LateralRaiseRule"),
+    "leg_raises": ("leg_raises", "LegRaiseRule"),
+    "push_ups": ("push_ups", "PushUpRule"),
+    "tricep_pulldown": ("tricep_pulldown", "TricepPulldownRule")
+}
+
+
+def get_rule_class(name):
+    if name not in EXERCISES:
+        raise KeyError(f"Unknown exercise '{name}'. Choose from: {', '.join(sorted(EXERCISES))}")
+    module_name, class_name = EXERCISES[name]
+    module = importlib.import_module(f"{__name__}.{module_name}")
+    return getattr(module, class_name)
+
+
+def create_rule(name, **config):
+    return get_rule_class(name)(**config)
+
+
+# === Workout Plans ===
+# Exercise names as the workout generator writes them -> registry name.
+PLAN_NAMES = {
+    "Push-ups": "push_ups",
+    "Pushups": "push_ups",
+    "Bench Press": "bench_press",
+    "Shoulder Press": "shoulder_press",
+    "Tricep Pulldown": "tricep_pulldown",
+    "Lateral Raises": "lateral_raise",
+    "Squat": "squat",
+    "Squats": "squat",
+    "Lunges": "lunges",
+    "Crunches": "crunches",
+    "Bicep Curl": "bicep_curl",
+    "Hammer Curl": "bicep_curl",  # Same tracker as Bicep Curl
+    "Deadlift": "deadlift",
+    "Leg Raises": "leg_raises",
+    "Pullups": "pull_up",
+    "Pull-ups": "pull_up",
+    "Lat Pulldowns": "lateral_raise",
+    "Incline Bench Press": "bench_press"  # fallback
+}
+
+
+def workout_sets(exercises):
+    """
+    Expands a generated workout's exercise list ({"name", "sets", "reps"},
+    name as in PLAN_NAMES or a registry name) into the sets to track, in
+    order: [{"exercise", "name", "set", "sets", "reps"}, ...].
+    Raises KeyError naming every exercise that has no tracker.
+    """
+    unknown = [item["name"] for item in exercises
+               if item["name"] not in PLAN_NAMES and item["name"] not in EXERCISES]
+    if unknown:
+        raise KeyError(f"No tracker for {', '.join(map(repr, unknown))}")
+    sets = []
+    for item in exercises:
+        exercise = PLAN_NAMES.get(item["name"], item["name"])
+        count = int(item.get("sets", 1))
+        for number in range(1, count + 1):
+            sets.append({"exercise": exercise, "name": item["name"], "set": number, "sets": count,
+                         "reps": int(item["reps"])})
+    return sets
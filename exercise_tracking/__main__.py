@@ -0,0 +1,56 @@
+import argparse
+import sys
+
+from . import EXERCISES, create_rule
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m exercise_tracking",
+                                     description="Run a pose tracker for one exercise.")
+    parser.add_argument("exercise", choices=sorted(EXERCISES))
+    parser.add_argument("--source", default=None,
+                        help="camera index or video file (default: camera 0)")
+    parser.add_argument("--pipelined", action="store_true",
+                        help="run capture, inference, rules and rendering as separate stages")
+    parser.add_argument("--processes", type=int, default=0, metavar="N",
+                        help="run capture, N pose inference processes and the rules in separate processes")
+    parser.add_argument("--target-fps", type=float, default=None,
+                        help="adapt model complexity and input size to hold this frame rate")
+    parser.add_argument("--roi", action="store_true",
+                        help="crop pose inference to the athlete (cheaper on high-resolution cameras)")
+    parser.add_argument("--decimate", type=int, default=1, metavar="N",
+                        help="run pose inference on one frame in N and predict landmarks in between")
+    parser.add_argument("--headless", action="store_true",
+                        help="no drawing or window; emit JSON-line events (on stdout unless --events is given)")
+    parser.add_argument("--events", metavar="TARGET", default=None,
+                        help="write JSON-line events to '-' (stdout), host:port or a Unix socket path")
+    parser.add_argument("--speak-corrections", action="store_true",
+                        help="read form corrections aloud as well as showing them (needs pyttsx3)")
+    parser.add_argument("--record", metavar="TRACE", default=None,
+                        help="also write the session's landmarks to this trace file")
+    parser.add_argument("--latency-overlay", action="store_true",
+                        help="draw per-stage p50/p95/p99 latency, frame rate and dropped frames on the frame")
+    parser.add_argument("--latency-report", metavar="JSON", default=None,
+                        help="write the per-stage latency report to this file at exit")
+    args = parser.parse_args(argv)
+
+    source = args.source
+    if source is not None and source.isdigit():
+        source = int(source)
+
+    events = args.events
+    if args.headless and events is None:
+        events = "-"
+
+    from .tracker import run
+    reps = run(create_rule(args.exercise), source=source, pipelined=args.pipelined, processes=args.processes,
+               target_fps=args.target_fps, roi=args.roi, decimate=args.decimate,
+               record_trace=args.record, headless=args.headless, events=events,
+               speak_corrections=args.speak_corrections,
+               latency_overlay=args.latency_overlay, latency_report=args.latency_report)
+    # Keep stdout clean for the event stream.
+    print(f"{args.exercise}: {reps} reps", file=sys.stderr if events == "-" else sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Offline re-scoring of recorded workout videos.
+
+    python -m exercise_tracking.batch recordings/ squat --workers 4 --output squat.json
+
+Every file (and every segment of a long file) is scored in its own worker
+process with its own pose model, so no tracking state leaks between files.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from . import EXERCISES, create_rule
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".webm", ".m4v")
+
+# === CONFIGURATION ===
+CONFIG = {
+    "model_complexity": 1,
+    "mirror": True,            # score files the way the live (mirrored) tracker sees them
+    "segment_seconds": 120,    # split files longer than this across workers
+    "overlap_seconds": 5       # warm-up replayed before each segment so reps spanning a cut still count
+}
+
+
+def find_videos(directory):
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                  if name.lower().endswith(VIDEO_EXTENSIONS))
+
+
+def plan_segments(path, segment_seconds, overlap_seconds):
+    """
+    Returns (path, start_frame, end_frame, warmup_frame) tasks covering the file.
+    """
+    import cv2
+    cap = cv2.VideoCapture(path)
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    cap.release()
+
+    segment = int(segment_seconds * fps)
+    if frame_count <= 0 or frame_count <= segment * 1.5:
+        return [(path, 0, None, 0)]
+
+    overlap = int(overlap_seconds * fps)
+    return [(path, start, min(start + segment, frame_count), max(0, start - overlap))
+            for start in range(0, frame_count, segment)]
+
+
+# === Worker ===
+def analyze_segment(task, exercise, config):
+    """
+    Scores frames [start, end) of one file. Frames from warmup to start only
+    prime the rule's state machine; reps and form flags before start belong
+    to the previous segment.
+    """
+    from .tracker import FILE_FPS, Tracker
+
+    path, start, end, warmup = task
+    rule = create_rule(exercise)
+    tracker = Tracker(rule, source=path, show_window=False, play_sound=False,
+                      mirror=config["mirror"], model_complexity=config["model_complexity"])
+
+    import cv2
+    cap = cv2.VideoCapture(path)
+    if warmup:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, warmup)
+    # Rules run on the frames' positions in the file, not on how long they
+    # took to score, so counts don't depend on the machine.
+    fps = cap.get(cv2.CAP_PROP_FPS) or FILE_FPS
+
+    reps = 0
+    frames = 0
+    form_flags = Counter()
+    index = warmup
+    frame = None
+    cpu_start = time.process_time()
+    try:
+        while end is None or index < end:
+            ret, frame = cap.read(frame)  # decode into the previous frame's buffer
+            if not ret:
+                break
+            rgb = tracker.prepare(frame)
+            points = tracker.landmarks(tracker.infer(rgb))
+            h, w, _ = frame.shape
+            counted = tracker.evaluate(points, h, w, index / fps)
+
+            if index >= start:
+                frames += 1
+                reps += counted
+                warning = rule.form_warning() if points is not None else None
+                if warning:
+                    form_flags[warning] += 1
+            index += 1
+    finally:
+        cap.release()
+        tracker.close()
+
+    return {
+        "file": path,
+        "start": start,
+        "frames": frames,
+        "reps": reps,
+        "form_flags": dict(form_flags),
+        "cpu_seconds": time.process_time() - cpu_start
+    }
+
+
+def merge_segments(segments):
+    files = {}
+    for segment in sorted(segments, key=lambda s: (s["file"], s["start"])):
+        merged = files.setdefault(segment["file"], {"file": segment["file"], "reps": 0, "frames": 0,
+                                                     "form_flags": Counter(), "cpu_seconds": 0.0})
+        merged["reps"] += segment["reps"]
+        merged["frames"] += segment["frames"]
+        merged["form_flags"].update(segment["form_flags"])
+        merged["cpu_seconds"] += segment["cpu_seconds"]
+    for merged in files.values():
+        merged["form_flags"] = dict(merged["form_flags"])
+        merged["cpu_seconds"] = round(merged["cpu_seconds"], 2)
+    return list(files.values())
+
+
+def run_batch(paths, exercise, workers=None, **config):
+    config = {**CONFIG, **config}
+    tasks = [task for path in paths
+             for task in plan_segments(path, config["segment_seconds"], config["overlap_seconds"])]
+
+    wall_start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        segments = list(pool.map(analyze_segment, tasks,
+                                 [exercise] * len(tasks), [config] * len(tasks)))
+    wall = time.perf_counter() - wall_start
+
+    files = merge_segments(segments)
+    total_frames = sum(f["frames"] for f in files)
+    cpu = sum(s["cpu_seconds"] for s in segments)
+    throughput = {
+        "files": len(files),
+        "segments": len(tasks),
+        "frames": total_frames,
+        "wall_seconds": round(wall, 2),
+        "frames_per_second": round(total_frames / wall, 1) if wall else None,
+        "frames_per_second_per_core": round(total_frames / cpu, 1) if cpu else None
+    }
+    return {"exercise": exercise, "files": files, "throughput": throughput}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m exercise_tracking.batch",
+                                     description="Re-score recorded workout videos.")
+    parser.add_argument("directory")
+    parser.add_argument("exercise", choices=sorted(EXERCISES))
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--model-complexity", type=int, default=CONFIG["model_complexity"], choices=(0, 1, 2))
+    parser.add_argument("--segment-seconds", type=float, default=CONFIG["segment_seconds"])
+    parser.add_argument("--no-mirror", action="store_true", help="score frames as recorded, without flipping")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    paths = find_videos(args.directory)
+    if not paths:
+        parser.error(f"no video files found in {args.directory}")
+
+    report = run_batch(paths, args.exercise, workers=args.workers,
+                       model_complexity=args.model_complexity,
+                       segment_seconds=args.segment_seconds,
+                       mirror=not args.no_mirror)
+
+    for f in report["files"]:
+        flags = ", ".join(f"{warning} ({n} frames)" for warning, n in f["form_flags"].items()) or "-"
+        print(f"{os.path.basename(f['file'])}: {f['reps']} reps, {f['frames']} frames | form: {flags}",
+              file=sys.stderr)
+    t = report["throughput"]
+    print(f"{t['frames']} frames in {t['wall_seconds']}s: {t['frames_per_second']} fps total, "
+          f"{t['frames_per_second_per_core']} fps per core", file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as out:
+            out.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
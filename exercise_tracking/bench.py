@@ -0,0 +1,703 @@
+"""
+Benchmark and regression suite for the exercise rules.
+
+    python -m exercise_tracking.bench                  # compare against the saved baseline
+    python -m exercise_tracking.bench --save-baseline  # record a new baseline
+    python -m exercise_tracking.bench --traces recordings/
+
+Every exercise is driven over a scripted landmark sequence (and optionally
+over recorded traces named "<exercise>*.trace"). For each sequence the suite
+reports the per-frame cost of the live path (update: features + detection +
+state machine + rep metrics), of the state machine alone (step, features
+precomputed in one batch) and of the rep metrics recorder alone (metrics),
+the bytes allocated per frame, and the rep count, which must match both the
+scripted number of reps and the baseline, must match the number of rep
+metrics records, and must not change when the sequence is replayed at
+another resolution or frame rate.
+
+Counts and allocations are deterministic and fail the run when they
+regress. Timings depend on the machine and its load, so they are only
+reported: each run also times a fixed calibration workload, and a timing
+is called out as slower when it grew by more than the tolerance relative
+to that workload, compared with the baseline.
+"""
+import argparse
+import gc
+import json
+import math
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from . import EXERCISES, create_rule
+from .geometry import LANDMARKS, NUM_LANDMARKS, VISIBILITY
+from .replay import replay
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+
+# === CONFIGURATION ===
+CONFIG = {
+    "height": 480,
+    "width": 640,
+    "fps": 30,
+    "reps": 20,
+    "rep_seconds": 2.0,
+    "noise": 0.002,          # landmark jitter, in normalized units
+    "outliers": 0.0,         # share of landmarks that jump by 5x the jitter
+    "seed": 0,
+    "repeat": 5,             # timings are the best of this many passes
+    "alloc_frames": 300,     # frames traced with tracemalloc (it is slow)
+    "decimate": 1,           # >1 also checks counts with inference decimation (see predict.py)
+    "resolutions": [(240, 320), (1080, 1440)],  # (h, w) that must count the same reps as height x width
+    "frame_rates": [10, 20, 60],                # fps that must count the same reps as the sequence's own
+    # Jitter standing in for each pose model complexity in --smoothing. Full
+    # (1) measured ~0.001 median and 0.002-0.013 p90 on still demo frames;
+    # lite and heavy are scaled from it.
+    "jitter": {0: 0.008, 1: 0.004, 2: 0.002},
+    "accuracy_seeds": 10,
+    "tolerance": 0.5,        # flag timings more than 50% slower than the baseline...
+    "min_slowdown_us": 2.0,  # ...and at least this much slower, so sub-µs jitter is ignored
+    "alloc_tolerance": 256,  # bytes per frame allocated above the baseline before it is a regression
+    "calibration_rounds": 2000
+}
+
+# === Scripted Poses ===
+# Normalized (x, y) of a person standing and facing the camera in a 640x480
+# frame. Each exercise moves a few joints between a start pose and a turning
+# pose; joints it doesn't list stay where they are here.
+STANDING = {
+    "NOSE": (0.50, 0.15),
+    "LEFT_EYE_INNER": (0.51, 0.14), "LEFT_EYE": (0.52, 0.14), "LEFT_EYE_OUTER": (0.53, 0.14),
+    "RIGHT_EYE_INNER": (0.49, 0.14), "RIGHT_EYE": (0.48, 0.14), "RIGHT_EYE_OUTER": (0.47, 0.14),
+    "LEFT_EAR": (0.54, 0.15), "RIGHT_EAR": (0.46, 0.15),
+    "MOUTH_LEFT": (0.51, 0.18), "MOUTH_RIGHT": (0.49, 0.18),
+    "LEFT_SHOULDER": (0.56, 0.28), "RIGHT_SHOULDER": (0.44, 0.28),
+    "LEFT_ELBOW": (0.57, 0.40), "RIGHT_ELBOW": (0.43, 0.40),
+    "LEFT_WRIST": (0.58, 0.52), "RIGHT_WRIST": (0.42, 0.52),
+    "LEFT_PINKY": (0.58, 0.54), "RIGHT_PINKY": (0.42, 0.54),
+    "LEFT_INDEX": (0.58, 0.55), "RIGHT_INDEX": (0.42, 0.55),
+    "LEFT_THUMB": (0.57, 0.54), "RIGHT_THUMB": (0.43, 0.54),
+    "LEFT_HIP": (0.54, 0.55), "RIGHT_HIP": (0.46, 0.55),
+    "LEFT_KNEE": (0.54, 0.72), "RIGHT_KNEE": (0.46, 0.72),
+    "LEFT_ANKLE": (0.54, 0.90), "RIGHT_ANKLE": (0.46, 0.90),
+    "LEFT_HEEL": (0.54, 0.92), "RIGHT_HEEL": (0.46, 0.92),
+    "LEFT_FOOT_INDEX": (0.55, 0.94), "RIGHT_FOOT_INDEX": (0.45, 0.94)
+}
+
+# exercise -> (start pose, turning pose, expected reps per scripted cycle)
+MOTIONS = {
+    "squat": (
+        {},
+        {"LEFT_HIP": (0.54, 0.74), "RIGHT_HIP": (0.46, 0.74)},
+        1
+    ),
+    "pull_up": (
+        {"LEFT_WRIST": (0.60, 0.20), "RIGHT_WRIST": (0.40, 0.20),
+         "LEFT_SHOULDER": (0.56, 0.40), "RIGHT_SHOULDER": (0.44, 0.40), "NOSE": (0.50, 0.28)},
+        {"LEFT_WRIST": (0.60, 0.20), "RIGHT_WRIST": (0.40, 0.20),
+         "LEFT_SHOULDER": (0.56, 0.24), "RIGHT_SHOULDER": (0.44, 0.24), "NOSE": (0.50, 0.12)},
+        1
+    ),
+    "bench_press": (
+        {"LEFT_ELBOW": (0.62, 0.38)},
+        {"LEFT_ELBOW": (0.60, 0.18)},
+        1
+    ),
+    "lunges": (
+        {"RIGHT_HIP": (0.46, 0.55), "RIGHT_KNEE": (0.46, 0.72), "RIGHT_ANKLE": (0.46, 0.90)},
+        {"RIGHT_HIP": (0.50, 0.75), "RIGHT_KNEE": (0.36, 0.75), "RIGHT_ANKLE": (0.36, 0.92),
+         "LEFT_KNEE": (0.60, 0.85)},
+        1
+    ),
+    "shoulder_press": (
+        {"LEFT_WRIST": (0.66, 0.28), "RIGHT_WRIST": (0.34, 0.28)},
+        {"LEFT_WRIST": (0.60, 0.03), "RIGHT_WRIST": (0.40, 0.03)},
+        1
+    ),
+    "bicep_curl": (
+        {},
+        {"LEFT_WRIST": (0.58, 0.30), "RIGHT_WRIST": (0.42, 0.30)},
+        1
+    ),
+    "crunches": (
+        {"LEFT_HIP": (0.54, 0.62), "RIGHT_HIP": (0.46, 0.62)},
+        {"LEFT_SHOULDER": (0.56, 0.50), "RIGHT_SHOULDER": (0.44, 0.50),
+         "LEFT_HIP": (0.54, 0.62), "RIGHT_HIP": (0.46, 0.62)},
+        1
+    ),
+    "deadlift": (
+        {},
+        {"LEFT_WRIST": (0.58, 0.80), "RIGHT_WRIST": (0.42, 0.80),
+         "LEFT_HIP": (0.54, 0.66), "RIGHT_HIP": (0.46, 0.66)},
+        1
+    ),
+    "lateral_raise": (
+        {},
+        {"LEFT_WRIST": (0.80, 0.22), "RIGHT_WRIST": (0.20, 0.22)},
+        1
+    ),
+    "leg_raises": (
+        {"LEFT_SHOULDER": (0.20, 0.70), "LEFT_HIP": (0.50, 0.70), "LEFT_ANKLE": (0.85, 0.70)},
+        {"LEFT_SHOULDER": (0.20, 0.70), "LEFT_HIP": (0.50, 0.70), "LEFT_ANKLE": (0.50, 0.20)},
+        1
+    ),
+    "push_ups": (
+        {"LEFT_SHOULDER": (0.56, 0.45), "RIGHT_SHOULDER": (0.44, 0.45),
+         "LEFT_ELBOW": (0.60, 0.55), "RIGHT_ELBOW": (0.40, 0.55)},
+        {"LEFT_SHOULDER": (0.56, 0.62), "RIGHT_SHOULDER": (0.44, 0.62),
+         "LEFT_ELBOW": (0.60, 0.55), "RIGHT_ELBOW": (0.40, 0.55)},
+        1
+    ),
+    "tricep_pulldown": (
+        {"RIGHT_ELBOW": (0.43, 0.40), "RIGHT_WRIST": (0.42, 0.52)},
+        {"RIGHT_ELBOW": (0.43, 0.40), "RIGHT_WRIST": (0.42, 0.30)},
+        1
+    )
+}
+
+
+class Sequence:
+    """
+    An in-memory landmark sequence with the same attributes as a trace.Trace,
+    so replay() and the benchmarks treat both alike.
+    """
+
+    def __init__(self, name, landmarks, timestamps, h, w, expected=None, present=None):
+        self.name = name
+        self.landmarks = landmarks
+        self.timestamps = timestamps
+        self.present = np.ones(len(landmarks), dtype=bool) if present is None else present
+        self.h = h
+        self.w = w
+        self.expected = expected
+        self.script = None   # (exercise, config) a scripted sequence was synthesized from
+
+    def __len__(self):
+        return len(self.landmarks)
+
+
+def pose_array(overrides):
+    points = np.zeros((NUM_LANDMARKS, 4), dtype=np.float32)
+    for name, (x, y) in {**STANDING, **overrides}.items():
+        points[LANDMARKS[name], :2] = (x, y)
+    points[:, VISIBILITY] = 0.95
+    return points
+
+
+def synthesize(exercise, config=CONFIG):
+    """
+    Scripted sequence for one exercise: a second at the start pose, `reps`
+    cosine cycles start -> turn -> start, and a second at the start pose.
+    """
+    start, turn, per_cycle = MOTIONS[exercise]
+    a, b = pose_array(start), pose_array(turn)
+    fps = config["fps"]
+    rest = np.zeros(fps)
+    cycle = (1 - np.cos(np.linspace(0, 2 * np.pi, int(config["rep_seconds"] * fps), endpoint=False))) / 2
+    phase = np.concatenate([rest, np.tile(cycle, config["reps"]), rest])
+
+    points = a + phase[:, None, None].astype(np.float32) * (b - a)
+    rng = np.random.default_rng(config["seed"])
+    noise = rng.normal(0, config["noise"], points[..., :2].shape)
+    if config.get("outliers"):
+        noise[rng.random(noise.shape[:-1]) < config["outliers"]] *= 5
+    points[..., :2] += noise.astype(np.float32)
+    timestamps = np.arange(len(phase)) / fps
+    sequence = Sequence(exercise, points, timestamps, config["height"], config["width"],
+                        expected=per_cycle * config["reps"])
+    sequence.script = (exercise, config)
+    return sequence
+
+
+def at_frame_rate(sequence, fps):
+    """
+    The sequence as a camera running at `fps` would have captured it. A
+    scripted sequence is synthesized again at that rate, with fresh jitter
+    on every frame; a recorded trace is resampled, its landmarks linearly
+    interpolated between the two nearest frames (a frame counts as present
+    when both of them are).
+    """
+    script = getattr(sequence, "script", None)
+    if script is not None:
+        exercise, config = script
+        return synthesize(exercise, {**config, "fps": fps})
+    source = np.asarray(sequence.timestamps)
+    timestamps = np.arange(source[0], source[-1], 1.0 / fps)
+    after = np.clip(np.searchsorted(source, timestamps, side="right"), 1, len(source) - 1)
+    before = after - 1
+    span = source[after] - source[before]
+    weight = np.divide(timestamps - source[before], span, out=np.zeros_like(span), where=span > 0)
+    landmarks = sequence.landmarks[before] + weight[:, None, None].astype(np.float32) * (
+        sequence.landmarks[after] - sequence.landmarks[before])
+    present = np.asarray(sequence.present)
+    return Sequence(getattr(sequence, "name", "trace"), landmarks, timestamps, sequence.h, sequence.w,
+                    present=present[before] & present[after])
+
+
+def find_traces(directory):
+    """
+    Yields (exercise, Sequence-like trace) for "<exercise>*.trace" files.
+    """
+    from .trace import read_trace
+
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".trace"):
+            continue
+        matches = [exercise for exercise in EXERCISES if name.startswith(exercise)]
+        if not matches:
+            continue
+        trace = read_trace(os.path.join(directory, name))
+        trace.name = os.path.splitext(name)[0]
+        trace.expected = None
+        yield max(matches, key=len), trace
+
+
+# === Measurements ===
+def time_update(exercise, sequence, **rule_config):
+    rule = create_rule(exercise, **rule_config)
+    points = sequence.landmarks[sequence.present]
+    timestamps = sequence.timestamps[sequence.present].tolist()
+    h, w = sequence.h, sequence.w
+    start = time.perf_counter()
+    for t, frame in zip(timestamps, points):
+        rule.update(frame, h, w, t)
+    return time.perf_counter() - start, rule.rep_count, len(rule.rep_records)
+
+
+def time_step(exercise, sequence):
+    rule = create_rule(exercise, rep_metrics=False)
+    rows = list(rule.features.rows(sequence.landmarks[sequence.present], sequence.h, sequence.w,
+                                   rule.config["min_visibility"]))
+    timestamps = sequence.timestamps[sequence.present].tolist()
+    start = time.perf_counter()
+    for t, f in zip(timestamps, rows):
+        rule.advance(f, t)
+    return time.perf_counter() - start
+
+
+def time_metrics(exercise, sequence):
+    rule = create_rule(exercise)
+    if rule.recorder is None:
+        return 0.0
+    rows = list(rule.features.rows(sequence.landmarks[sequence.present], sequence.h, sequence.w,
+                                   rule.config["min_visibility"]))
+    timestamps = sequence.timestamps[sequence.present].tolist()
+    recorder = rule.recorder
+    start = time.perf_counter()
+    for t, f in zip(timestamps, rows):
+        recorder.observe(t, f)
+    return time.perf_counter() - start
+
+
+def calibrate(config=CONFIG):
+    """
+    µs per round of a fixed workload shaped like update() (small NumPy
+    calls, float maths, a dict per frame) that uses none of the package's
+    code. Measured in the same run as the timings, it tells how fast this
+    machine is compared to the one the baseline was recorded on.
+    """
+    points = np.random.default_rng(0).random((NUM_LANDMARKS, 4), dtype=np.float32)
+    size = np.array([640.0, 480.0], dtype=np.float32)
+    rounds = config["calibration_rounds"]
+
+    def once():
+        start = time.perf_counter()
+        for _ in range(rounds):
+            (ax, ay), (bx, by), (cx, cy) = (points[[11, 12, 23], :2] * size).tolist()
+            f = {"torso": math.hypot(ax - cx, ay - cy), "width": math.hypot(ax - bx, ay - by)}
+            f["level"] = abs(ay - by) < 0.08 * max(f["torso"], 1.6 * f["width"])
+        return time.perf_counter() - start
+
+    return round(min(once() for _ in range(config["repeat"])) / rounds * 1e6, 3)
+
+
+def allocated_per_frame(exercise, sequence, frames):
+    """
+    Mean peak bytes allocated by one update() call.
+    """
+    rule = create_rule(exercise)
+    points = sequence.landmarks[sequence.present][:frames]
+    timestamps = sequence.timestamps[sequence.present][:frames].tolist()
+    h, w = sequence.h, sequence.w
+    total = 0
+    tracemalloc.start()
+    try:
+        for t, frame in zip(timestamps, points):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            rule.update(frame, h, w, t)
+            total += tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+    return total / len(points) if len(points) else 0.0
+
+
+def decimated(exercise, sequence, every):
+    """
+    Rep count and share of frames inferred when only the frames a Decimator
+    asks for see the real landmarks.
+    """
+    from .predict import Decimator
+
+    rule = create_rule(exercise)
+    decimator = Decimator(rule, every=every)
+    h, w = sequence.h, sequence.w
+    for t, points in zip(sequence.timestamps[sequence.present], sequence.landmarks[sequence.present]):
+        if decimator.predict(t, h, w) is None:
+            rule.update(points, h, w, t)
+            decimator.observe(t, points)
+    frames = decimator.stats["inferred"] + decimator.stats["predicted"]
+    return rule.rep_count, decimator.stats["inferred"] / frames if frames else 1.0
+
+
+def smoothed(sequence):
+    """
+    Copy of the sequence's landmarks run through a LandmarkSmoother.
+    """
+    from .smoothing import LandmarkSmoother
+
+    smoother = LandmarkSmoother()
+    landmarks = sequence.landmarks.copy()
+    for index in np.flatnonzero(sequence.present):
+        smoother(sequence.timestamps[index], landmarks[index])
+    return Sequence(sequence.name, landmarks, sequence.timestamps, sequence.h, sequence.w, sequence.expected)
+
+
+def smoothing_accuracy(exercises=None, config=CONFIG):
+    """
+    Rep-count accuracy with and without landmark smoothing at the jitter of
+    each model complexity, over several noise seeds. Returns
+    {complexity: {"raw": share exact, "smoothed": share exact, "raw_error": mean |reps - expected|, ...}}
+    and the smoother's cost per frame in µs.
+    """
+    from .smoothing import LandmarkSmoother
+
+    results = {}
+    for complexity, jitter in sorted(config["jitter"].items()):
+        counts = {"raw": [], "smoothed": []}
+        for exercise in exercises or sorted(EXERCISES):
+            for seed in range(config["accuracy_seeds"]):
+                sequence = synthesize(exercise, {**config, "noise": jitter, "outliers": 0.02, "seed": seed})
+                if not sequence.expected:
+                    continue
+                for kind, seq in (("raw", sequence), ("smoothed", smoothed(sequence))):
+                    counts[kind].append(time_update(exercise, seq)[1] - seq.expected)
+        results[complexity] = {
+            **{kind: round(float(np.mean(np.array(errors) == 0)), 3) for kind, errors in counts.items()},
+            **{f"{kind}_error": round(float(np.mean(np.abs(errors))), 2) for kind, errors in counts.items()}
+        }
+
+    sequence = synthesize("squat", config)
+    smoother = LandmarkSmoother()
+    frames = sequence.landmarks.copy()
+    start = time.perf_counter()
+    for t, points in zip(sequence.timestamps, frames):
+        smoother(t, points)
+    cost_us = (time.perf_counter() - start) / len(frames) * 1e6
+    return results, round(cost_us, 2)
+
+
+def benchmark(exercise, sequence, config=CONFIG):
+    frames = int(sequence.present.sum())
+    update_seconds, update_reps, records = min(time_update(exercise, sequence) for _ in range(config["repeat"]))
+    metrics_seconds = min(time_metrics(exercise, sequence) for _ in range(config["repeat"]))
+    step_seconds = min(time_step(exercise, sequence) for _ in range(config["repeat"]))
+    replay_reps = replay(sequence, create_rule(exercise))
+    result = {
+        "exercise": exercise,
+        "frames": frames,
+        "update_us": round(update_seconds / frames * 1e6, 2) if frames else None,
+        "step_us": round(step_seconds / frames * 1e6, 2) if frames else None,
+        "metrics_us": round(metrics_seconds / frames * 1e6, 2) if frames else None,
+        "alloc_bytes": round(allocated_per_frame(exercise, sequence, config["alloc_frames"])),
+        "reps": update_reps,
+        "replay_reps": replay_reps,
+        "rep_records": records,
+        "expected": sequence.expected
+    }
+    result["resolution_reps"] = {
+        f"{w}x{h}": replay(Sequence(sequence.name, sequence.landmarks, sequence.timestamps, h, w,
+                                    present=sequence.present), create_rule(exercise))
+        for h, w in config["resolutions"]
+    }
+    result["frame_rate_reps"] = {f"{fps}fps": replay(at_frame_rate(sequence, fps), create_rule(exercise))
+                                 for fps in config["frame_rates"]}
+    if config["decimate"] > 1:
+        result["decimated_reps"], result["inferred_share"] = decimated(exercise, sequence, config["decimate"])
+    return result
+
+
+def frame_rates(exercise, source, frames=300, rounds=3, **tracker_config):
+    """
+    Frames per second of the full tracker loop on a video, drawn (and shown,
+    when a display is available) versus headless. Both runs share one warm
+    pose model so only the drawing and window work differs; the best of
+    `rounds` alternating runs is reported.
+    """
+    import cv2
+    from .tracker import Tracker, create_pose
+
+    complexity = tracker_config.pop("model_complexity", 1)
+    cap = cv2.VideoCapture(source)
+    decoded = []
+    while len(decoded) < frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        decoded.append(frame)
+    cap.release()
+    if not decoded:
+        raise ValueError(f"could not read frames from {source}")
+
+    poses = {complexity: create_pose(complexity)}
+    display = bool(os.environ.get("DISPLAY")) or sys.platform in ("win32", "darwin")
+    modes = {"windowed": {"show_window": display}, "headless": {"headless": True}}
+    rates = {mode: 0.0 for mode in modes}
+    for _ in range(rounds):  # alternate the modes so warm-up and thermal drift hit both
+        for mode, config in modes.items():
+            tracker = Tracker(create_rule(exercise), source=source, poses=poses, play_sound=False,
+                              model_complexity=complexity, **{**tracker_config, **config})
+            tracker.pose_future.result()
+            start = time.perf_counter()
+            for frame in decoded:
+                tracker.show(tracker.process(frame.copy())[0])
+            rates[mode] = max(rates[mode], round(len(decoded) / (time.perf_counter() - start), 1))
+            tracker.close()
+    for pose in poses.values():
+        pose.close()
+    rates["shown"] = display
+    return rates
+
+
+def frame_memory(exercise, source, frames=90, warmup=10, **tracker_config):
+    """
+    What the full tracker loop (read -> process -> present) allocates per
+    frame on a video, drawn and headless: the mean peak of memory allocated
+    and freed within a frame (tracemalloc; image buffers included), garbage
+    collections of the youngest generation over the run, and ms per frame.
+    The window itself is left out, so runs without a display measure the
+    same path.
+    """
+    from .tracker import Tracker
+
+    complexity = tracker_config.pop("model_complexity", 1)
+    report = {}
+    for mode, config in {"drawn": {"show_window": False}, "headless": {"headless": True}}.items():
+        tracker = Tracker(create_rule(exercise), source=source, play_sound=False,
+                          model_complexity=complexity, **{**tracker_config, **config})
+        tracker.pose_future.result()
+        tracker.open()
+        try:
+            for _ in range(warmup):  # let the buffers and the model's graph settle
+                frame, captured_at = tracker.read()
+                if frame is None:
+                    raise ValueError(f"{source} has fewer than {warmup} frames")
+                t = tracker.frame_time(captured_at, tracker.frames_read - 1)
+                tracker.present(tracker.process(frame, t, captured_at)[0], captured_at)
+            gc.collect()
+            collections = gc.get_stats()[0]["collections"]
+            transient = 0
+            count = 0
+            elapsed = 0.0
+            tracemalloc.start()
+            try:
+                while count < frames:
+                    tracemalloc.reset_peak()
+                    before = tracemalloc.get_traced_memory()[0]
+                    start = time.perf_counter()
+                    frame, captured_at = tracker.read()
+                    if frame is None:
+                        break
+                    t = tracker.frame_time(captured_at, tracker.frames_read - 1)
+                    tracker.present(tracker.process(frame, t, captured_at)[0], captured_at)
+                    elapsed += time.perf_counter() - start
+                    transient += tracemalloc.get_traced_memory()[1] - before
+                    count += 1
+            finally:
+                tracemalloc.stop()
+            report[mode] = {
+                "frames": count,
+                "transient_bytes": round(transient / count) if count else 0,
+                "gen0_collections": gc.get_stats()[0]["collections"] - collections,
+                "ms": round(elapsed / count * 1000, 1) if count else None
+            }
+        finally:
+            tracker.close()
+    return report
+
+
+def run_suite(exercises=None, trace_dir=None, **config):
+    config = {**CONFIG, **config}
+    sequences = [(exercise, synthesize(exercise, config)) for exercise in exercises or sorted(EXERCISES)]
+    if trace_dir:
+        sequences += [(exercise, trace) for exercise, trace in find_traces(trace_dir)
+                      if not exercises or exercise in exercises]
+    # Calibrated next to each sequence, so both see the same machine load.
+    return {sequence.name: {"calibration_us": calibrate(config), **benchmark(exercise, sequence, config)}
+            for exercise, sequence in sequences}
+
+
+# === Baseline Comparison ===
+def load_baseline(path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(results, path=BASELINE_PATH):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(results, baseline, alloc_tolerance=CONFIG["alloc_tolerance"]):
+    """
+    Returns a list of (sequence, problem) pairs: counting differences, and
+    allocating more than `alloc_tolerance` bytes per frame above the
+    baseline. Timings are left to slowdowns().
+    """
+    problems = []
+    for name, result in results.items():
+        if result["reps"] != result["replay_reps"]:
+            problems.append((name, f"update() counted {result['reps']} reps but replay counted {result['replay_reps']}"))
+        if result.get("rep_records") not in (None, 0, result["reps"]):
+            problems.append((name, f"{result['rep_records']} rep metrics records for {result['reps']} reps"))
+        for size, reps in result.get("resolution_reps", {}).items():
+            if reps != result["reps"]:
+                problems.append((name, f"counted {reps} reps at {size}, {result['reps']} at full resolution"))
+        for fps, reps in result.get("frame_rate_reps", {}).items():
+            if reps != result["reps"]:
+                problems.append((name, f"counted {reps} reps at {fps}, {result['reps']} at the recorded frame rate"))
+        if "decimated_reps" in result and result["decimated_reps"] != result["reps"]:
+            problems.append((name, f"decimated run counted {result['decimated_reps']} reps, full run {result['reps']}"))
+        if result["expected"] is not None and result["reps"] != result["expected"]:
+            problems.append((name, f"counted {result['reps']} reps, expected {result['expected']}"))
+
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result["reps"] != base["reps"]:
+            problems.append((name, f"counted {result['reps']} reps, baseline {base['reps']}"))
+        if base.get("alloc_bytes") is not None and result["alloc_bytes"] > base["alloc_bytes"] + alloc_tolerance:
+            problems.append((name, f"allocates {result['alloc_bytes']} B per frame, baseline {base['alloc_bytes']} B"))
+    return problems
+
+
+def slowdowns(results, baseline, tolerance=CONFIG["tolerance"], min_slowdown_us=CONFIG["min_slowdown_us"]):
+    """
+    Returns (sequence, note) pairs for timings slower than the baseline by
+    more than `tolerance` and `min_slowdown_us`, once the baseline is scaled
+    by how much slower this run's calibration workload was (see calibrate()).
+    """
+    notes = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        speed = 1.0
+        if base.get("calibration_us") and result.get("calibration_us"):
+            speed = result["calibration_us"] / base["calibration_us"]
+        for key in ("update_us", "step_us"):
+            if not base.get(key):
+                continue
+            expected = base[key] * speed
+            if result[key] > max(expected * (1 + tolerance), expected + min_slowdown_us):
+                notes.append((name, f"{key} {result[key]} vs {expected:.2f} expected from the baseline's "
+                                    f"{base[key]} (+{(result[key] / expected - 1) * 100:.0f}%)"))
+    return notes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m exercise_tracking.bench",
+                                     description="Benchmark exercise rules and check rep counts against a baseline.")
+    parser.add_argument("exercises", nargs="*", metavar="exercise",
+                        help=f"exercises to run (default: all of {', '.join(sorted(EXERCISES))})")
+    parser.add_argument("--traces", metavar="DIR", help="also run recorded <exercise>*.trace files from DIR")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="write these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=CONFIG["tolerance"],
+                        help="slowdown, relative to this machine's calibration, before a timing is "
+                             "reported (default: 0.5); timings never fail the run")
+    parser.add_argument("--decimate", type=int, default=1, metavar="N",
+                        help="also check rep counts with inference on one frame in N (see predict.py)")
+    parser.add_argument("--smoothing", action="store_true",
+                        help="instead, compare rep-count accuracy with and without landmark smoothing "
+                             "at the jitter of each model complexity")
+    parser.add_argument("--fps", metavar="VIDEO",
+                        help="instead, compare tracker FPS on VIDEO with drawing/window versus headless")
+    parser.add_argument("--frame-memory", metavar="VIDEO",
+                        help="instead, measure what the tracker loop allocates per frame on VIDEO")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+    unknown = sorted(set(args.exercises) - set(EXERCISES))
+    if unknown:
+        parser.error(f"unknown exercise(s): {', '.join(unknown)}")
+
+    if args.smoothing:
+        accuracy, cost_us = smoothing_accuracy(args.exercises or None)
+        if args.json:
+            print(json.dumps({"accuracy": accuracy, "smoother_us": cost_us}, indent=2))
+            return 0
+        print(f"{'complexity':<12}{'jitter':>8}{'exact raw':>11}{'smoothed':>10}{'error raw':>11}{'smoothed':>10}")
+        for complexity, r in accuracy.items():
+            print(f"{complexity:<12}{CONFIG['jitter'][complexity]:>8}{r['raw']:>11.0%}{r['smoothed']:>10.0%}"
+                  f"{r['raw_error']:>11}{r['smoothed_error']:>10}")
+        print(f"smoothing costs {cost_us} µs per frame")
+        return 0
+
+    if args.fps:
+        for exercise in args.exercises or ["squat"]:
+            rates = frame_rates(exercise, args.fps)
+            windowed = "windowed" if rates["shown"] else "drawn (no display)"
+            print(f"{exercise}: {windowed} {rates['windowed']} fps, headless {rates['headless']} fps "
+                  f"({rates['headless'] / rates['windowed'] - 1:+.0%})")
+        return 0
+
+    if args.frame_memory:
+        for exercise in args.exercises or ["squat"]:
+            report = frame_memory(exercise, args.frame_memory)
+            if args.json:
+                print(json.dumps({exercise: report}, indent=2))
+                continue
+            for mode, r in report.items():
+                print(f"{exercise} {mode}: {r['transient_bytes'] / 1024:.1f} KiB allocated per frame, "
+                      f"{r['gen0_collections']} gen-0 collections in {r['frames']} frames, {r['ms']} ms/frame")
+        return 0
+
+    results = run_suite(args.exercises or None, args.traces, decimate=args.decimate)
+    baseline = load_baseline(args.baseline)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'sequence':<20}{'frames':>8}{'update µs':>11}{'step µs':>9}{'metrics µs':>12}{'alloc B':>9}{'reps':>6}{'expected':>10}{'baseline':>10}")
+        for name, r in results.items():
+            base = baseline.get(name, {}).get("reps", "-")
+            expected = "-" if r["expected"] is None else r["expected"]
+            print(f"{name:<20}{r['frames']:>8}{r['update_us']:>11}{r['step_us']:>9}{r['metrics_us']:>12}"
+                  f"{r['alloc_bytes']:>9}{r['reps']:>6}{expected:>10}{base:>10}")
+            if "decimated_reps" in r:
+                print(f"{'':<20}decimate {args.decimate}: {r['decimated_reps']} reps, "
+                      f"inference on {r['inferred_share']:.0%} of frames")
+        calibration = [r["calibration_us"] for r in results.values()]
+        print(f"calibration workload: {min(calibration)}-{max(calibration)} µs per round on this machine")
+
+    if args.save_baseline:
+        save_baseline({**baseline, **results}, args.baseline)
+        print(f"baseline written to {args.baseline}", file=sys.stderr)
+        return 0
+
+    for name, note in slowdowns(results, baseline, args.tolerance):
+        print(f"SLOWER {name}: {note}", file=sys.stderr)
+    problems = compare(results, baseline)
+    for name, problem in problems:
+        print(f"REGRESSION {name}: {problem}", file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,6 @@
-import cv2
-import mediapipe as mp
-import os
-import pygame
-
-pygame.mixer.init()
-sound = pygame.mixer.Sound("exercise_tracking/sfx_point.mp3")  # Use WAV for better compatibility if possible
-
-os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'  # Only show errors, no warnings or info
+from .geometry import Features, all_visible
+from .metrics import RepMetrics
+from .rules import ExerciseRule
 
 # === CONFIGURATION ===
 CONFIG = {
@@ -15,106 +9,67 @@ CONFIG = {
     "show_reps": True
 }
 
-# === Setup Pose Detection ===
-mp_pose = mp.solutions.pose
-mp_drawing = mp.solutions.drawing_utils
-pose = mp_pose.Pose(static_image_mode=False, model_complexity=2)
-
-# === Landmark indices ===
-KEYPOINTS = {
-    "LEFT_SHOULDER": 11, "RIGHT_SHOULDER": 12,
-    "LEFT_HIP": 23, "RIGHT_HIP": 24
-}
-
-rep_count = 0
-rep_state = "WAITING_UP"
-hit_top = False
+# === Landmarks and derived features ===
+FEATURES = Features(
+    midpoints={"shoulder": ("LEFT_SHOULDER", "RIGHT_SHOULDER"), "hip": ("LEFT_HIP", "RIGHT_HIP")},
+    visible=["LEFT_SHOULDER", "RIGHT_SHOULDER", "LEFT_HIP", "RIGHT_HIP"],
+    scale=True
+)
+METRICS = RepMetrics(signal="shoulder_y", unit="body", eccentric_first=False)
 
-# === Utility Functions ===
-def get_y(lm, h):
-    return lm.y * h
-
-def visible(lm):
-    return lm.visibility >= CONFIG["min_visibility"]
-
-def average_y(lm1, lm2, h):
-    return (get_y(lm1, h) + get_y(lm2, h)) / 2
-
-def detect_crunch_phase(landmarks, h):
-    required = ["LEFT_SHOULDER", "RIGHT_SHOULDER", "LEFT_HIP", "RIGHT_HIP"]
-    if not all(visible(landmarks[KEYPOINTS[k]]) for k in required):
+def detect_crunch_phase(f, config=CONFIG):
+    if not all_visible(f):
         return {
             "shoulders_up": False,
             "shoulders_down": False
         }
 
-    shoulder_y = average_y(landmarks[KEYPOINTS["LEFT_SHOULDER"]], landmarks[KEYPOINTS["RIGHT_SHOULDER"]], h)
-    hip_y = average_y(landmarks[KEYPOINTS["LEFT_HIP"]], landmarks[KEYPOINTS["RIGHT_HIP"]], h)
-
-    # Distance between shoulders and hips
-    shoulder_hip_dist = abs(shoulder_y - hip_y)
+    # Distance between shoulders and hips, in shoulder widths: the torso
+    # itself is what shrinks during a crunch, so it can't be the unit here.
+    shoulder_hip_dist = abs(f["shoulder_y"] - f["hip_y"]) / max(f["shoulder_width"], 1e-6)
 
     return {
-        "shoulders_up": shoulder_hip_dist < 80,
-        "shoulders_down": shoulder_hip_dist > 130
+        "shoulders_up": shoulder_hip_dist < 1.04,   # 80 px at a 77 px shoulder width
+        "shoulders_down": shoulder_hip_dist > 1.69  # 130 px
     }
 
-# === Webcam Setup ===
-
-cap = cv2.VideoCapture(0)
+# === Crunch Rule ===
+class CrunchRule(ExerciseRule):
+    name = "Crunch"
+    window_title = "Crunch Tracker"
+    initial_state = "WAITING_UP"
+    CONFIG = CONFIG
+    features = FEATURES
+    metrics = METRICS
 
-while cap.isOpened():
-    ret, frame = cap.read()
-    if not ret:
-        break
+    def reset(self):
+        super().reset()
+        self.hit_top = False
 
-    frame = cv2.flip(frame, 1)
-    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    results = pose.process(rgb)
-
-    if results.pose_landmarks:
-        h, w, _ = frame.shape
-        landmarks = results.pose_landmarks.landmark
-
-        phase = detect_crunch_phase(landmarks, h)
+    def step(self, f):
+        phase = self.debounce(detect_crunch_phase(f, self.config))
 
         # === Crunch State Machine ===
-        if rep_state == "WAITING_UP":
+        if self.rep_state == "WAITING_UP":
             if phase["shoulders_up"]:
-                hit_top = True
-                rep_state = "WAITING_DOWN"
-
-        elif rep_state == "WAITING_DOWN":
-            if hit_top and phase["shoulders_down"]:
-                rep_count += 1
-                hit_top = False
-                rep_state = "WAITING_UP"
-                sound.play()
-
-        # === Draw Landmarks ===
-        mp_drawing.draw_landmarks(
-            frame,
-            results.pose_landmarks,
-            mp_pose.POSE_CONNECTIONS,
-            mp_drawing.DrawingSpec(color=(0, 0, 255), thickness=2, circle_radius=4),
-            mp_drawing.DrawingSpec(color=(255, 255, 255), thickness=3)
-        )
-
-        # === Display Info ===
-        if CONFIG["show_labels"]:
-            label = f"Crunch: {rep_state.replace('_', ' ').title()}"
-            if hit_top:
-                label += " (Top ✔)"
-            cv2.putText(frame, label, (30, 40), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 255), 2)
-
-        if CONFIG["show_reps"]:
-            cv2.putText(frame, f"Crunch Reps: {rep_count}", (30, 80), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 100), 2)
-
-    cv2.imshow("Crunch Tracker", frame)
-
-    if cv2.waitKey(5) & 0xFF == ord('q'):
-        break
-
-cap.release()
-cv2.destroyAllWindows()
-pose.close()
+                self.hit_top = True
+                self.rep_state = "WAITING_DOWN"
+
+        elif self.rep_state == "WAITING_DOWN":
+            if self.hit_top and phase["shoulders_down"]:
+                self.rep_count += 1
+                self.hit_top = False
+                self.rep_state = "WAITING_UP"
+                return True
+        return False
+
+    def state_labels(self):
+        label, origin, scale, color = super().state_labels()[0]
+        if self.hit_top:
+            label += " (Top ✔)"
+        return [(label, origin, scale, color)]
+
+
+if __name__ == "__main__":
+    from .tracker import run
+    run(CrunchRule())
@@ -0,0 +1,311 @@
+"""
+Exercise rules written as data: keypoints, derived features, phase
+predicates with thresholds, and a transition table.
+
+    LATERAL_RAISE = Exercise(
+        name="Lateral Raise",
+        keypoints=["LEFT_SHOULDER", "RIGHT_SHOULDER", "LEFT_WRIST", "RIGHT_WRIST"],
+        midpoints={"wrist": ("LEFT_WRIST", "RIGHT_WRIST"), "shoulder": ("LEFT_SHOULDER", "RIGHT_SHOULDER")},
+        thresholds={"raise_margin": 0.15, "lower_margin": 0.38},
+        phases={
+            "arms_up": "all_visible and wrist_y < shoulder_y - raise_margin * body_scale",
+            "arms_down": "all_visible and wrist_y > shoulder_y + lower_margin * body_scale"
+        },
+        initial_state="WAITING_UP",
+        transitions=[
+            ("WAITING_UP", "arms_up", "WAITING_DOWN"),
+            ("WAITING_DOWN", "arms_down", "WAITING_UP", "rep")
+        ])
+    LateralRaiseRule = LATERAL_RAISE.compile()
+
+compile() checks every expression once and turns them into a single
+detect function, the generated equivalent of a hand-written detect_*():
+it takes the features dict of one frame or of a whole (N, 33, 4) batch
+and returns the phase flags (and derived values) as floats/bools or as
+length-N arrays. The rule it returns is an ordinary ExerciseRule: phases
+are debounced as usual and the state machine is a lookup in the
+transition table, so a new exercise needs no loop code, and replays
+evaluate every predicate over all frames in one call (advance_batch()).
+
+Expressions are Python syntax over these names:
+
+    <KEYPOINT>_x, <KEYPOINT>_y     keypoint coordinates, pixels
+    <KEYPOINT>_visible             visibility flag; all_visible for every keypoint
+    angles, <midpoint>_x/_y, distances, as declared (pixels, degrees)
+    body_scale, torso, shoulder_width
+    derived values, in the order they are declared
+    thresholds (the rule's CONFIG, so they can be overridden per rule)
+
+with + - * /, comparisons (chained too), and / or / not, abs(), min()
+and max(); min/max are elementwise.
+"""
+import ast
+
+import numpy as np
+
+from .geometry import LANDMARKS, Features, all_visible
+from .rules import ExerciseRule
+
+SCALE_NAMES = ("body_scale", "torso", "shoulder_width")
+FUNCTIONS = {"abs": abs, "min": np.minimum, "max": np.maximum}
+REP = "rep"
+
+
+def logical_not(x):
+    # A plain bool for a single frame: debouncing and the transition table
+    # expect one, and np.logical_not would give a NumPy bool.
+    if isinstance(x, (bool, np.bool_)):
+        return not x
+    return np.logical_not(x)
+
+
+class Exercise:
+    """
+    Declarative description of one exercise; compile() builds its rule
+    class. Transitions are (state, phase, next state) or (state, phase,
+    next state, "rep") for the one that completes a rep; a state's
+    transitions are tried in order and the first whose phase holds is
+    taken, at most one per frame. `warnings` maps phases to the form
+    correction shown while they hold, and `metrics` is the rule's
+    metrics.RepMetrics spec.
+    """
+
+    def __init__(self, name, phases, transitions, keypoints=(), angles=None, midpoints=None,
+                 distances=None, derived=None, thresholds=None, warnings=None,
+                 initial_state=None, window_title=None, skeleton_style="mediapipe", metrics=None):
+        self.name = name
+        self.keypoints = list(keypoints)
+        self.angles = angles or {}
+        self.midpoints = midpoints or {}
+        self.distances = distances or {}
+        self.derived = derived or {}
+        self.thresholds = thresholds or {}
+        self.phases = phases
+        self.transitions = [tuple(transition) for transition in transitions]
+        self.warnings = warnings or {}
+        self.initial_state = initial_state or self.transitions[0][0]
+        self.window_title = window_title or f"{name} Tracker"
+        self.skeleton_style = skeleton_style
+        self.metrics = metrics
+
+    def compile(self, base=None):
+        """
+        Returns an ExerciseRule subclass (of `base`, default DslRule).
+        Raises ValueError naming the expression at fault.
+        """
+        detect, used = compile_detect(self)
+        if self.metrics is not None:
+            available = {*self.angles, *self.distances, *SCALE_NAMES}
+            for name in (*self.keypoints, *self.midpoints):
+                available |= {f"{name}_x", f"{name}_y"}
+            for key in self.metrics.keys():
+                if key not in available:
+                    raise ValueError(f"{self.name}: metrics read unknown feature '{key}'")
+            used = used | set(self.metrics.keys())
+        points = [keypoint for keypoint in self.keypoints if {f"{keypoint}_x", f"{keypoint}_y"} & used]
+        features = Features(angles=self.angles, midpoints=self.midpoints, distances=self.distances,
+                            points=points, visible=self.keypoints, scale=bool(used & set(SCALE_NAMES)))
+        table = {}
+        for transition in self.transitions:
+            if len(transition) not in (3, 4) or (len(transition) == 4 and transition[3] != REP):
+                raise ValueError(f"{self.name}: bad transition {transition!r}; "
+                                 f"expected (state, phase, next_state) or (..., '{REP}')")
+            state, phase, target = transition[:3]
+            if phase not in self.phases:
+                raise ValueError(f"{self.name}: transition {transition!r} uses unknown phase '{phase}'")
+            table.setdefault(state, []).append((phase, target, len(transition) == 4))
+        for state, rows in table.items():
+            table[state] = tuple(rows)
+        for phase in self.warnings:
+            if phase not in self.phases:
+                raise ValueError(f"{self.name}: warning for unknown phase '{phase}'")
+
+        base = base or DslRule
+        return type(f"{self.name.title().replace(' ', '')}Rule", (base,), {
+            "name": self.name,
+            "window_title": self.window_title,
+            "initial_state": self.initial_state,
+            "skeleton_style": self.skeleton_style,
+            "CONFIG": dict(self.thresholds),
+            "features": features,
+            "metrics": self.metrics,
+            "exercise": self,
+            "detect": staticmethod(detect),
+            "table": table,
+            "warning_phases": tuple(self.warnings.items())
+        })
+
+
+# === Expression Compiler ===
+class Elementwise(ast.NodeTransformer):
+    """
+    Rewrites the boolean operators into forms that work on NumPy arrays as
+    well as on plain floats and bools: and/or -> & / |, not -> logical_not,
+    a < b < c -> (a < b) & (b < c).
+    """
+
+    def visit_BoolOp(self, node):
+        self.generic_visit(node)
+        op = ast.BitAnd() if isinstance(node.op, ast.And) else ast.BitOr()
+        result = node.values[0]
+        for value in node.values[1:]:
+            result = ast.BinOp(left=result, op=op, right=value)
+        return result
+
+    def visit_UnaryOp(self, node):
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Not):
+            return ast.Call(func=ast.Name(id="_not", ctx=ast.Load()), args=[node.operand], keywords=[])
+        return node
+
+    def visit_Compare(self, node):
+        self.generic_visit(node)
+        if len(node.ops) == 1:
+            return node
+        parts, left = [], node.left
+        for op, right in zip(node.ops, node.comparators):
+            parts.append(ast.Compare(left=left, ops=[op], comparators=[right]))
+            left = right
+        result = parts[0]
+        for part in parts[1:]:
+            result = ast.BinOp(left=result, op=ast.BitAnd(), right=part)
+        return result
+
+
+ALLOWED_NODES = (ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not, ast.USub, ast.UAdd,
+                 ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Compare, ast.Lt, ast.LtE, ast.Gt,
+                 ast.GtE, ast.Eq, ast.NotEq, ast.Call, ast.Name, ast.Load, ast.Constant)
+
+
+def parse(exercise, kind, name, source):
+    """
+    Parses one expression and returns (tree, names it reads).
+    """
+    where = f"{exercise.name}: {kind} '{name}'"
+    try:
+        tree = ast.parse(source, mode="eval")
+    except SyntaxError as exc:
+        raise ValueError(f"{where}: {exc.msg} in {source!r}") from None
+    names = []
+    for node in ast.walk(tree):
+        if not isinstance(node, ALLOWED_NODES):
+            raise ValueError(f"{where}: {type(node).__name__} is not allowed in {source!r}")
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS or node.keywords:
+                raise ValueError(f"{where}: only {', '.join(FUNCTIONS)} can be called, in {source!r}")
+        elif isinstance(node, ast.Name) and node.id not in FUNCTIONS:
+            names.append(node.id)
+        elif isinstance(node, ast.Constant) and not isinstance(node.value, (int, float)):
+            raise ValueError(f"{where}: only numbers are allowed as constants, in {source!r}")
+    return Elementwise().visit(tree), names
+
+
+def compile_detect(exercise):
+    """
+    Generates the detect(f, config) function for an Exercise. Returns it
+    and the set of names it reads.
+    """
+    feature_names = {}
+    for keypoint in exercise.keypoints:
+        if keypoint not in LANDMARKS:
+            raise ValueError(f"{exercise.name}: unknown keypoint '{keypoint}'")
+        feature_names[f"{keypoint}_x"] = f"f[{keypoint + '_x'!r}]"
+        feature_names[f"{keypoint}_y"] = f"f[{keypoint + '_y'!r}]"
+        feature_names[f"{keypoint}_visible"] = f"f['visible'][{keypoint!r}]"
+    for group in (exercise.angles, exercise.distances):
+        for name in group:
+            feature_names[name] = f"f[{name!r}]"
+    for name in exercise.midpoints:
+        feature_names[f"{name}_x"] = f"f[{name + '_x'!r}]"
+        feature_names[f"{name}_y"] = f"f[{name + '_y'!r}]"
+    for name in SCALE_NAMES:
+        feature_names[name] = f"f[{name!r}]"
+    if exercise.keypoints:
+        feature_names["all_visible"] = "_all_visible(f)"
+
+    reserved = set(feature_names) | set(FUNCTIONS)
+    for name in (*exercise.thresholds, *exercise.derived, *exercise.phases):
+        if name in reserved or not name.isidentifier():
+            raise ValueError(f"{exercise.name}: '{name}' can't be used as a name")
+
+    # Derived values may read earlier ones; phases may read any of them.
+    body, used = [], []
+    known = set(feature_names) | set(exercise.thresholds)
+    expressions = [("derived value", name, source) for name, source in exercise.derived.items()]
+    expressions += [("phase", name, source) for name, source in exercise.phases.items()]
+    for kind, name, source in expressions:
+        tree, names = parse(exercise, kind, name, source)
+        for read in names:
+            if read not in known:
+                raise ValueError(f"{exercise.name}: {kind} '{name}' reads unknown name '{read}' in {source!r}")
+            if read not in used:
+                used.append(read)
+        body.append(f"    {name} = {ast.unparse(tree)}")
+        if kind == "derived value":
+            known.add(name)
+
+    loads = [f"    {name} = {feature_names[name]}" for name in used if name in feature_names]
+    loads += [f"    {name} = config[{name!r}]" for name in used if name in exercise.thresholds]
+    results = ", ".join(f"{name!r}: {name}" for name in (*exercise.derived, *exercise.phases))
+    source = "\n".join(["def detect(f, config):", *loads, *body, f"    return {{{results}}}"])
+    namespace = {"_all_visible": all_visible, "_not": logical_not, **FUNCTIONS}
+    exec(compile(source, f"<{exercise.name} rule>", "exec"), namespace)
+    detect = namespace["detect"]
+    detect.source = source
+    return detect, set(used)
+
+
+# === Rule ===
+class DslRule(ExerciseRule):
+    """
+    ExerciseRule driven by a compiled Exercise: detect() gives the phase
+    flags, which are debounced, and `table` maps the current state to the
+    transitions to try.
+    """
+    exercise = None
+    table = {}
+    warning_phases = ()
+
+    @staticmethod
+    def detect(f, config):
+        raise NotImplementedError
+
+    def reset(self):
+        super().reset()
+        self.phase = None
+
+    def step(self, f):
+        return self.transition(self.detect(f, self.config))
+
+    def transition(self, phase):
+        phase = self.phase = self.debounce(phase)
+        for name, target, counts in self.table.get(self.rep_state, ()):
+            if phase[name]:
+                self.rep_state = target
+                if counts:
+                    self.rep_count += 1
+                return counts
+        return False
+
+    def advance_batch(self, points, timestamps, h, w):
+        # Every predicate over the whole batch in one call; only the
+        # debounce and the table lookups run per frame.
+        features = self.features(points, h, w, self.config["min_visibility"])
+        columns = self.detect(features, self.config)
+        names = list(columns)
+        values = [column.tolist() if isinstance(column, np.ndarray) else [column] * len(points)
+                  for column in columns.values()]
+        samples = self.metrics.rows(features) if self.recorder is not None else None
+        for t, row in zip(timestamps, zip(*values)):
+            self.t = t
+            counted = self.confirm(self.transition(dict(zip(names, row))))
+            if samples is not None:
+                self.record(next(samples), counted)
+        return self.rep_count
+
+    def form_warning(self):
+        if self.phase:
+            for name, text in self.warning_phases:
+                if self.phase[name]:
+                    return text
+        return None
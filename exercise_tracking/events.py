@@ -0,0 +1,116 @@
+"""
+Structured tracker events, written as JSON lines.
+
+    {"event": "start", "t": 0.0, "exercise": "Squat", "rep_state": "WAITING_DOWN", ...}
+    {"event": "state", "t": 1.83, "rep_state": "WAITING_UP", "previous": "WAITING_DOWN", ...}
+    {"event": "rep", "t": 3.12, "rep_count": 1, "rep_seconds": 3.12, ...}
+    {"event": "form_warning", "t": 4.0, "warning": "Make sure to keep your knees aligned ..."}
+    {"event": "set", "t": 41.5, "set": 1, "sets": 3, "reps": 10, "rep_count": 10, ...}
+    {"event": "end", "t": 60.2, "rep_count": 14, ...}
+
+`t` is seconds since the session started; "set" events come from workout
+sessions (session.py) when a set is done. A "rep" event carries the rep's
+tempo, range and velocity record (metrics.py) as "metrics" when the rule
+keeps one. Sinks are plain callables taking
+an event dict; JsonLinesSink writes to a stream (stdout by default) and
+SocketSink to a TCP or Unix socket.
+"""
+import json
+import socket
+import sys
+import time
+
+
+class JsonLinesSink:
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def __call__(self, event):
+        self.stream.write(json.dumps(event) + "\n")
+        self.stream.flush()
+
+    def close(self):
+        pass
+
+
+class SocketSink:
+    """
+    Sends JSON lines to "host:port" (TCP) or a Unix socket path. A reader
+    that goes away doesn't stop tracking; events are dropped from then on.
+    """
+
+    def __init__(self, address):
+        if ":" in address and not address.startswith("/"):
+            host, port = address.rsplit(":", 1)
+            self.socket = socket.create_connection((host, int(port)))
+        else:
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.socket.connect(address)
+        self.broken = False
+
+    def __call__(self, event):
+        if self.broken:
+            return
+        try:
+            self.socket.sendall((json.dumps(event) + "\n").encode())
+        except OSError:
+            self.broken = True
+
+    def close(self):
+        self.socket.close()
+
+
+def open_sink(target):
+    """
+    "-" or None for stdout, otherwise a socket address.
+    """
+    if target in (None, "-"):
+        return JsonLinesSink()
+    return SocketSink(target)
+
+
+class EventEmitter:
+    """
+    Watches a rule after every evaluated frame and emits an event whenever
+    its state, rep count or form warning changes.
+    """
+
+    def __init__(self, rule, sink):
+        self.rule = rule
+        self.sink = sink
+        self.started = None
+        self.last_rep = None
+        self.state = None
+        self.warning = None
+
+    def emit(self, kind, t, **fields):
+        self.sink({"event": kind, "t": round(float(t - self.started), 3), "exercise": self.rule.name, **fields})
+
+    def start(self, t):
+        self.started = self.last_rep = t
+        self.state = self.rule.rep_state
+        self.emit("start", t, rep_state=self.state, rep_count=self.rule.rep_count)
+
+    def observe(self, t, counted):
+        if self.started is None:
+            self.start(t)
+        rule = self.rule
+        if counted:
+            fields = {}
+            if rule.rep_records and rule.rep_records[-1]["rep"] == rule.rep_count:
+                fields["metrics"] = rule.rep_records[-1]
+            self.emit("rep", t, rep_count=rule.rep_count, rep_seconds=round(float(t - self.last_rep), 3), **fields)
+            self.last_rep = t
+        if rule.rep_state != self.state:
+            self.emit("state", t, rep_state=rule.rep_state, previous=self.state, rep_count=rule.rep_count)
+            self.state = rule.rep_state
+        warning = rule.form_warning()
+        if warning != self.warning:
+            if warning:
+                self.emit("form_warning", t, warning=warning, rep_state=rule.rep_state)
+            self.warning = warning
+
+    def end(self, t):
+        if self.started is None:
+            self.start(t)
+        self.emit("end", t, rep_count=self.rule.rep_count, rep_state=self.rule.rep_state)
@@ -0,0 +1,238 @@
+"""
+Rep cues and form corrections, delivered off the frame loop.
+
+The tracker only drops events on a queue (Feedback.rep / Feedback.observe
+never block and never touch audio); a feedback thread decides what is
+worth saying and hands it to a backend:
+
+    AudioBackend   rep sound through pygame, corrections spoken through
+                   pyttsx3 on a thread of its own; whichever library is
+                   missing is skipped with one warning
+    NullBackend    nothing; headless runs, servers and benchmarks
+
+Rate limiting and duplicate suppression happen on the feedback thread:
+reps closer together than rep_cue_interval share one cue, spoken
+corrections are at least correction_interval apart, the same correction
+isn't repeated within repeat_after, and a correction that waited longer
+than correction_max_age (e.g. behind another one) is dropped as stale.
+"""
+import os
+import queue
+import sys
+import threading
+import time
+
+SOUND_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sfx_point.mp3")
+
+# === CONFIGURATION ===
+CONFIG = {
+    "queue_size": 16,             # pending events; when full the oldest is dropped
+    "rep_cue_interval": 0.25,     # seconds; reps closer together share one cue
+    "correction_interval": 4.0,   # seconds between two spoken corrections
+    "repeat_after": 10.0,         # the same correction isn't repeated sooner than this
+    "correction_max_age": 2.0,    # corrections older than this when their turn comes are skipped
+    "speech_rate": 170            # words per minute for spoken corrections
+}
+
+
+# === Backends ===
+class NullBackend:
+    """
+    Accepts every cue and says nothing.
+    """
+
+    def open(self):
+        pass
+
+    def rep(self):
+        pass
+
+    def say(self, text):
+        pass
+
+    def close(self):
+        pass
+
+
+class AudioBackend:
+    """
+    pygame for the rep sound, pyttsx3 for spoken corrections. Both load on
+    the feedback thread, never on the frame loop. Speech blocks while it
+    plays, so it gets its own thread holding only the newest utterance;
+    rep cues never wait behind a sentence.
+    """
+
+    def __init__(self, sound=True, speech=False, speech_rate=CONFIG["speech_rate"]):
+        self.sound_enabled = sound
+        self.speech_enabled = speech
+        self.speech_rate = speech_rate
+        self.sound = None
+        self.pending = None
+        self.speech_ready = threading.Condition()
+        self.speaker = None
+        self.closed = False
+
+    def open(self):
+        if self.sound_enabled:
+            self.sound = load_sound()
+        if self.speech_enabled:
+            self.speaker = threading.Thread(target=self.speak_loop, name="feedback-speech", daemon=True)
+            self.speaker.start()
+
+    def rep(self):
+        if self.sound is not None:
+            self.sound.play()
+
+    def say(self, text):
+        if self.speaker is None:
+            return
+        with self.speech_ready:
+            self.pending = text
+            self.speech_ready.notify()
+
+    def speak_loop(self):
+        try:
+            import pyttsx3
+            engine = pyttsx3.init()
+            engine.setProperty("rate", self.speech_rate)
+        except Exception as exc:
+            print(f"Spoken corrections disabled: {exc}", file=sys.stderr)
+            return
+        while True:
+            with self.speech_ready:
+                while self.pending is None and not self.closed:
+                    self.speech_ready.wait()
+                if self.closed:
+                    return
+                text, self.pending = self.pending, None
+            engine.say(text)
+            engine.runAndWait()
+
+    def close(self):
+        with self.speech_ready:
+            self.closed = True
+            self.speech_ready.notify()
+
+
+def load_sound():
+    """
+    Returns the rep sound, or None (with a warning) when audio isn't available.
+    """
+    try:
+        import pygame
+        pygame.mixer.init()
+        return pygame.mixer.Sound(SOUND_PATH)  # Use WAV for better compatibility if possible
+    except Exception as exc:
+        print(f"Rep sound disabled: {exc}", file=sys.stderr)
+        return None
+
+
+# === Feedback Thread ===
+class Feedback:
+    """
+    Queue plus thread between a tracker and a backend. The tracker calls
+    observe() once per frame with the rule's latest decision; it costs a
+    comparison and, when something happened, one non-blocking put.
+
+        feedback = Feedback(AudioBackend(speech=True))
+        feedback.observe(t, counted, rule.form_warning())
+        ...
+        feedback.close()
+
+    stats counts what was delivered, suppressed and dropped.
+    """
+
+    def __init__(self, backend=None, **config):
+        self.config = {**CONFIG, **config}
+        self.backend = backend or NullBackend()
+        self.queue = queue.Queue(maxsize=self.config["queue_size"])
+        self.warning = None
+        self.last_cue = None
+        self.last_spoken = None
+        self.spoken = {}
+        self.stats = {"reps": 0, "rep_cues": 0, "corrections": 0, "spoken": 0,
+                      "suppressed": 0, "stale": 0, "dropped": 0}
+        self.thread = threading.Thread(target=self.loop, name="feedback", daemon=True)
+        self.thread.start()
+
+    # === Frame Loop Side ===
+    def put(self, event):
+        while True:
+            try:
+                self.queue.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()  # the oldest event is the least useful one
+                    self.stats["dropped"] += 1
+                except queue.Empty:
+                    pass
+
+    def rep(self, t):
+        self.put(("rep", t, None, None))
+
+    def correction(self, t, text):
+        # `t` is on the rule's clock (a video file's own time, for one), so
+        # how long the correction waits is timed from here on ours.
+        self.put(("correction", t, text, time.perf_counter()))
+
+    def observe(self, t, counted, warning=None):
+        """
+        Queues a rep cue when counted, and a correction when the warning
+        changes to a new non-empty one (a warning that stays up is one
+        correction, not one per frame).
+        """
+        if counted:
+            self.rep(t)
+        if warning != self.warning:
+            if warning:
+                self.correction(t, warning)
+            self.warning = warning
+
+    # === Feedback Thread Side ===
+    def loop(self):
+        self.backend.open()
+        while True:
+            event = self.queue.get()
+            if event is None:
+                return
+            kind, t, text, queued_at = event
+            if kind == "rep":
+                self.deliver_rep(t)
+            else:
+                self.deliver_correction(t, text, queued_at)
+
+    def deliver_rep(self, t):
+        self.stats["reps"] += 1
+        if self.last_cue is not None and t - self.last_cue < self.config["rep_cue_interval"]:
+            self.stats["suppressed"] += 1
+            return
+        self.last_cue = t
+        self.backend.rep()
+        self.stats["rep_cues"] += 1
+
+    def deliver_correction(self, t, text, queued_at):
+        config = self.config
+        self.stats["corrections"] += 1
+        if time.perf_counter() - queued_at > config["correction_max_age"]:
+            self.stats["stale"] += 1
+            return
+        said = self.spoken.get(text)
+        too_soon = self.last_spoken is not None and t - self.last_spoken < config["correction_interval"]
+        if too_soon or (said is not None and t - said < config["repeat_after"]):
+            self.stats["suppressed"] += 1
+            return
+        self.last_spoken = self.spoken[text] = t
+        self.backend.say(text)
+        self.stats["spoken"] += 1
+
+    def close(self, timeout=1.0):
+        """
+        Delivers what is still queued (up to `timeout`) and stops the thread.
+        """
+        if self.thread is None:
+            return
+        self.put(None)
+        self.thread.join(timeout)
+        self.thread = None
+        self.backend.close()
@@ -0,0 +1,214 @@
+import math
+
+import numpy as np
+
+# === Landmark Array Layout ===
+# One frame is a (33, 4) float32 array of normalized (x, y, z, visibility);
+# a batch of frames is (N, 33, 4). Everything below works on either shape.
+NUM_LANDMARKS = 33
+X, Y, Z, VISIBILITY = range(4)
+
+LANDMARKS = {
+    "NOSE": 0,
+    "LEFT_EYE_INNER": 1, "LEFT_EYE": 2, "LEFT_EYE_OUTER": 3,
+    "RIGHT_EYE_INNER": 4, "RIGHT_EYE": 5, "RIGHT_EYE_OUTER": 6,
+    "LEFT_EAR": 7, "RIGHT_EAR": 8,
+    "MOUTH_LEFT": 9, "MOUTH_RIGHT": 10,
+    "LEFT_SHOULDER": 11, "RIGHT_SHOULDER": 12,
+    "LEFT_ELBOW": 13, "RIGHT_ELBOW": 14,
+    "LEFT_WRIST": 15, "RIGHT_WRIST": 16,
+    "LEFT_PINKY": 17, "RIGHT_PINKY": 18,
+    "LEFT_INDEX": 19, "RIGHT_INDEX": 20,
+    "LEFT_THUMB": 21, "RIGHT_THUMB": 22,
+    "LEFT_HIP": 23, "RIGHT_HIP": 24,
+    "LEFT_KNEE": 25, "RIGHT_KNEE": 26,
+    "LEFT_ANKLE": 27, "RIGHT_ANKLE": 28,
+    "LEFT_HEEL": 29, "RIGHT_HEEL": 30,
+    "LEFT_FOOT_INDEX": 31, "RIGHT_FOOT_INDEX": 32
+}
+
+# === Body Scale ===
+# Rules measure distances in body-scale units instead of pixels, so the same
+# thresholds hold at any camera resolution and distance. The unit is the
+# torso (shoulder midpoint to hip midpoint), but never less than this many
+# shoulder widths, so a torso foreshortened by leaning toward the camera
+# doesn't shrink it.
+TORSO_PER_SHOULDER_WIDTH = 1.6
+
+
+# Each landmark's mirror-image counterpart: LEFT_* <-> RIGHT_*, the nose
+# (and any other midline landmark) to itself.
+_SWAP_SIDE = {"LEFT": "RIGHT", "RIGHT": "LEFT"}
+MIRROR_ORDER = np.array([LANDMARKS["_".join(_SWAP_SIDE.get(part, part) for part in name.split("_"))]
+                         for name in sorted(LANDMARKS, key=LANDMARKS.get)], dtype=np.intp)
+
+
+def landmarks_to_array(landmarks, out=None, mirror=False):
+    """
+    Converts MediaPipe's landmark list into a (33, 4) float32 array in one pass.
+
+    mirror=True returns the landmarks the model would have found in the
+    horizontally flipped image, x -> 1 - x with left and right swapped, so
+    the camera frame itself never has to be flipped before inference.
+    """
+    if mirror:
+        values = np.fromiter((v for i in MIRROR_ORDER.tolist() for lm in (landmarks[i],)
+                              for v in (1.0 - lm.x, lm.y, lm.z, lm.visibility)),
+                             dtype=np.float32, count=NUM_LANDMARKS * 4).reshape(NUM_LANDMARKS, 4)
+    else:
+        values = np.fromiter((v for lm in landmarks for v in (lm.x, lm.y, lm.z, lm.visibility)),
+                             dtype=np.float32, count=NUM_LANDMARKS * 4).reshape(NUM_LANDMARKS, 4)
+    if out is None:
+        return values
+    out[:] = values
+    return out
+
+
+def mirror_landmarks(points, out=None):
+    """
+    The (..., 33, 4) landmarks of the horizontally flipped image; its own
+    inverse. `out` must not be `points`.
+    """
+    out = np.take(points, MIRROR_ORDER, axis=-2, out=out)
+    np.subtract(1.0, out[..., X], out=out[..., X])
+    return out
+
+
+def indices(names):
+    return np.array([LANDMARKS[name] for name in names], dtype=np.intp)
+
+
+# === Vectorized Geometry ===
+def pixels(points, h, w):
+    """
+    Returns (..., 33, 2) pixel coordinates.
+    """
+    return points[..., :2] * np.array([w, h], dtype=np.float32)
+
+def visible_mask(points, idx, min_visibility):
+    return points[..., idx, VISIBILITY] >= min_visibility
+
+def joint_angles(xy, a, b, c):
+    """
+    Angle ABC in degrees for each (a[k], b[k], c[k]) index triple, shape (..., K).
+    Degenerate joints (zero-length limb) return 0.
+    """
+    ba = xy[..., a, :] - xy[..., b, :]
+    bc = xy[..., c, :] - xy[..., b, :]
+    dot = (ba * bc).sum(axis=-1)
+    norm = np.sqrt((ba * ba).sum(axis=-1) * (bc * bc).sum(axis=-1))
+    cosine = np.divide(dot, norm, out=np.ones_like(dot), where=norm > 0)
+    angle = np.degrees(np.arccos(np.clip(cosine, -1.0, 1.0)))
+    return np.where(norm > 0, angle, 0.0)
+
+def midpoints(xy, a, b):
+    return (xy[..., a, :] + xy[..., b, :]) / 2
+
+def distances(xy, a, b):
+    diff = xy[..., a, :] - xy[..., b, :]
+    return np.sqrt((diff * diff).sum(axis=-1))
+
+
+SCALE_IDX = indices(["LEFT_SHOULDER", "RIGHT_SHOULDER", "LEFT_HIP", "RIGHT_HIP"])
+
+def body_scale(xy):
+    """
+    {"torso", "shoulder_width", "body_scale"} in pixels for (33, 2) or (N, 33, 2)
+    pixel coordinates. Single frames take a plain-float path; it runs every
+    frame and NumPy's per-call overhead would dominate four points.
+    """
+    if xy.ndim == 2:
+        (lsx, lsy), (rsx, rsy), (lhx, lhy), (rhx, rhy) = xy[SCALE_IDX].tolist()
+        torso = math.hypot((lsx + rsx - lhx - rhx) / 2, (lsy + rsy - lhy - rhy) / 2)
+        width = math.hypot(lsx - rsx, lsy - rsy)
+        return {"torso": torso, "shoulder_width": width,
+                "body_scale": max(torso, TORSO_PER_SHOULDER_WIDTH * width)}
+    ls, rs, lh, rh = (xy[..., i, :] for i in SCALE_IDX)
+    torso = np.hypot(*np.moveaxis((ls + rs - lh - rh) / 2, -1, 0))
+    width = np.hypot(*np.moveaxis(ls - rs, -1, 0))
+    return {"torso": torso, "shoulder_width": width,
+            "body_scale": np.maximum(torso, TORSO_PER_SHOULDER_WIDTH * width)}
+
+
+class Features:
+    """
+    A fixed set of joint angles, midpoints, distances, coordinates and
+    visibility flags, resolved to index arrays once so that computing all of
+    them for a frame (or a batch of frames) is a handful of NumPy calls.
+
+        FEATURES = Features(
+            angles={"left_elbow": ("LEFT_SHOULDER", "LEFT_ELBOW", "LEFT_WRIST")},
+            midpoints={"shoulder": ("LEFT_SHOULDER", "RIGHT_SHOULDER")},
+            visible=["LEFT_SHOULDER", "LEFT_ELBOW", "LEFT_WRIST"])
+        f = FEATURES(points, h, w)
+        f["left_elbow"], f["shoulder_y"], f["visible"]["LEFT_ELBOW"]
+
+    Midpoints yield "<name>_x" / "<name>_y" and points listed in `points`
+    yield "<NAME>_x" / "<NAME>_y", all in pixels. With scale=True there are
+    also "torso", "shoulder_width" and "body_scale" (see TORSO_PER_SHOULDER_WIDTH),
+    in pixels too, to divide distances by. For a single (33, 4) frame
+    the values are plain Python floats/bools; for (N, 33, 4) they are arrays
+    of length N.
+    """
+
+    def __init__(self, angles=None, midpoints=None, distances=None, points=None, visible=None, scale=False):
+        self.scale = scale
+        self.angles = angles or {}
+        self.midpoints = midpoints or {}
+        self.distances = distances or {}
+
+        self.points = points or []
+        self.visible = visible or []
+
+        self.angle_idx = [indices(column) for column in zip(*self.angles.values())] if self.angles else None
+        self.midpoint_idx = [indices(column) for column in zip(*self.midpoints.values())] if self.midpoints else None
+        self.distance_idx = [indices(column) for column in zip(*self.distances.values())] if self.distances else None
+        self.point_idx = indices(self.points)
+        self.visible_idx = indices(self.visible)
+
+    def __call__(self, points, h, w, min_visibility=0.5):
+        xy = pixels(points, h, w)
+        single = points.ndim == 2
+        unpack = (lambda values: values.tolist()) if single else (lambda values: list(np.moveaxis(values, -1, 0)))
+        features = {}
+
+        if self.angle_idx is not None:
+            features.update(zip(self.angles, unpack(joint_angles(xy, *self.angle_idx))))
+        if self.midpoint_idx is not None:
+            mids = midpoints(xy, *self.midpoint_idx)
+            for name, x, y in zip(self.midpoints, unpack(mids[..., X]), unpack(mids[..., Y])):
+                features[f"{name}_x"] = x
+                features[f"{name}_y"] = y
+        if self.distance_idx is not None:
+            features.update(zip(self.distances, unpack(distances(xy, *self.distance_idx))))
+        if self.points:
+            coords = xy[..., self.point_idx, :]
+            for name, x, y in zip(self.points, unpack(coords[..., X]), unpack(coords[..., Y])):
+                features[f"{name}_x"] = x
+                features[f"{name}_y"] = y
+        if self.scale:
+            features.update(body_scale(xy))
+        if self.visible:
+            mask = visible_mask(points, self.visible_idx, min_visibility)
+            features["visible"] = dict(zip(self.visible, unpack(mask)))
+        return features
+
+    def rows(self, points, h, w, min_visibility=0.5):
+        """
+        Computes the features for an (N, 33, 4) batch in one call and yields
+        them back as N single-frame dicts, the shape rules step() through.
+        """
+        batch = self(points, h, w, min_visibility)
+        visible = {name: mask.tolist() for name, mask in batch.pop("visible", {}).items()}
+        columns = {name: values.tolist() for name, values in batch.items()}
+        for i in range(len(points)):
+            row = {name: values[i] for name, values in columns.items()}
+            row["visible"] = {name: mask[i] for name, mask in visible.items()}
+            yield row
+
+
+def all_visible(features):
+    visible = features["visible"].values()
+    if isinstance(next(iter(visible)), bool):
+        return all(visible)
+    return np.logical_and.reduce(list(visible))
@@ -0,0 +1,105 @@
+# === CONFIGURATION ===
+CONFIG = {
+    "target_fps": 15,
+    "budget_fraction": 0.8,    # share of each frame's time budget pose inference may use
+    "step_down_ratio": 1.0,    # go lighter when avg inference > budget * ratio
+    "step_up_ratio": 0.55,     # go heavier when avg inference < budget * ratio
+    "smoothing": 0.1,          # weight of the newest sample in the moving average
+    "cooldown_frames": 30,     # frames to wait after a switch before judging again
+    "max_cooldown_frames": 600
+}
+
+# Heaviest first. "scale" shrinks the frame handed to pose.process; landmarks
+# come back normalized, so the rules still see full-frame pixel coordinates.
+LEVELS = [
+    {"model_complexity": 2, "scale": 1.0},
+    {"model_complexity": 1, "scale": 1.0},
+    {"model_complexity": 1, "scale": 0.75},
+    {"model_complexity": 0, "scale": 0.75},
+    {"model_complexity": 0, "scale": 0.5}
+]
+
+
+def start_level(model_complexity):
+    for index, level in enumerate(LEVELS):
+        if level["model_complexity"] == model_complexity:
+            return index
+    return 0
+
+
+class ComplexityGovernor:
+    """
+    Picks the pose model complexity and input scale that keep per-frame
+    inference inside the budget implied by target_fps.
+
+    Hysteresis comes from three places: separate thresholds for stepping down
+    and up, a cooldown after every switch, and a cooldown that doubles each
+    time a step up has to be undone, so a level that is almost fast enough is
+    retried less and less often instead of flapping.
+    """
+
+    def __init__(self, level=0, **config):
+        self.config = {**CONFIG, **config}
+        self.index = level
+        self.avg = None
+        self.cooldown = self.config["cooldown_frames"]
+        self.frames_since_switch = 0
+        self.last_step_up = False
+        self.switches = 0
+
+    @property
+    def level(self):
+        return LEVELS[self.index]
+
+    @property
+    def budget(self):
+        return self.config["budget_fraction"] / self.config["target_fps"]
+
+    def record(self, seconds):
+        """
+        Feeds one inference duration. Returns True when the level changed.
+        """
+        alpha = self.config["smoothing"]
+        self.avg = seconds if self.avg is None else (1 - alpha) * self.avg + alpha * seconds
+        self.frames_since_switch += 1
+        if self.frames_since_switch < self.cooldown:
+            return False
+
+        if self.avg > self.budget * self.config["step_down_ratio"] and self.index < len(LEVELS) - 1:
+            # A step up that immediately fails makes us wait longer next time.
+            if self.last_step_up:
+                self.cooldown = min(self.cooldown * 2, self.config["max_cooldown_frames"])
+            self.switch(self.index + 1, stepped_up=False)
+            return True
+        if self.avg < self.budget * self.config["step_up_ratio"] and self.index > 0:
+            self.switch(self.index - 1, stepped_up=True)
+            return True
+
+        if self.frames_since_switch > self.config["max_cooldown_frames"]:
+            # Stable for a long time: forgive earlier failed attempts.
+            self.cooldown = self.config["cooldown_frames"]
+            self.last_step_up = False
+        return False
+
+    def switch(self, index, stepped_up):
+        self.index = index
+        self.avg = None
+        self.frames_since_switch = 0
+        self.last_step_up = stepped_up
+        self.switches += 1
+
+    def status(self):
+        return {
+            "level": self.index,
+            "model_complexity": self.level["model_complexity"],
+            "scale": self.level["scale"],
+            "avg_inference_ms": None if self.avg is None else round(self.avg * 1000, 1),
+            "budget_ms": round(self.budget * 1000, 1),
+            "switches": self.switches
+        }
+
+    def label(self):
+        status = self.status()
+        avg = "--" if status["avg_inference_ms"] is None else f"{status['avg_inference_ms']:.0f}"
+        return (f"Model {status['model_complexity']} @ {status['scale']:.0%} | "
+                f"{avg}/{status['budget_ms']:.0f} ms")
@@ -0,0 +1,175 @@
+"""
+Per-stage latency instrumentation for the tracking loop.
+
+    python -m exercise_tracking squat --latency-overlay --latency-report latency.json
+
+With `latency=True` (tracker config) every frame is timestamped as it goes
+through capture, prepare (BGR -> RGB), infer (pose.process), rule
+(landmarks, smoothing, rule and events), draw and display. Each stage keeps
+a rolling window of recent durations for p50/p95/p99, and two end-to-end
+spans are kept the same way:
+
+    frame   capture -> frame shown (glass-to-glass, minus the camera's own delay)
+    rep     capture -> rep event of the frame that completed the rep
+
+Frames the camera delivered but the tracker never saw are counted as
+dropped, from gaps in the capture timestamps (live sources) and from the
+pipelined tracker's newest-frame-wins queues.
+"""
+import json
+import time
+
+import cv2
+import numpy as np
+
+# === CONFIGURATION ===
+CONFIG = {
+    "window": 512,            # most recent samples each percentile is taken over
+    "percentiles": (50, 95, 99),
+    "overlay_every": 15,      # frames between refreshes of the on-frame overlay text
+    "drop_ratio": 1.5         # a capture gap this many frame periods long means frames were lost
+}
+
+STAGES = ("capture", "prepare", "infer", "rule", "draw", "display")
+SPANS = ("frame", "rep")
+
+
+class RollingPercentiles:
+    """
+    Ring buffer of the last `window` durations (seconds). Adding a sample
+    is one array store; percentiles are only computed when asked for.
+    """
+
+    def __init__(self, window):
+        self.samples = np.zeros(window)
+        self.count = 0
+        self.total = 0.0
+        self.peak = 0.0
+
+    def add(self, seconds):
+        self.samples[self.count % len(self.samples)] = seconds
+        self.count += 1
+        self.total += seconds
+        if seconds > self.peak:
+            self.peak = seconds
+
+    def summary(self, percentiles):
+        """
+        {"count", "mean", "max", "p50", ...} with durations in milliseconds;
+        percentiles cover the rolling window, mean and max the whole run.
+        """
+        if not self.count:
+            return {"count": 0}
+        recent = self.samples[:min(self.count, len(self.samples))]
+        values = np.percentile(recent, percentiles) * 1000
+        summary = {"count": self.count, "mean": round(self.total / self.count * 1000, 3),
+                   "max": round(self.peak * 1000, 3)}
+        for q, value in zip(percentiles, values.tolist()):
+            summary[f"p{q}"] = round(value, 3)
+        return summary
+
+
+class LatencyMonitor:
+    """
+    Stage and end-to-end timings for one tracker. Each stage is written by
+    one thread only (the pipelined tracker runs stages on different
+    threads), so recording takes no lock.
+
+        mark = monitor.lap("prepare", start)   # records now - start, returns now
+        mark = monitor.lap("infer", mark)
+    """
+
+    def __init__(self, **config):
+        self.config = {**CONFIG, **config}
+        window = self.config["window"]
+        self.stages = {name: RollingPercentiles(window) for name in STAGES}
+        self.spans = {name: RollingPercentiles(window) for name in SPANS}
+        self.frames = 0
+        self.dropped = 0
+        self.queue_dropped = 0
+        self.period = None
+        self.last_capture = None
+        self.started = None
+        self.rows = []
+
+    def lap(self, stage, since):
+        now = time.perf_counter()
+        self.stages[stage].add(now - since)
+        return now
+
+    def captured(self, start, captured_at):
+        """
+        Records one read from the source: `start` is when the read began,
+        `captured_at` when the frame arrived. Gaps longer than drop_ratio
+        frame periods count the frames the camera produced in between.
+        """
+        self.stages["capture"].add(captured_at - start)
+        if self.period and self.last_capture is not None:
+            gap = captured_at - self.last_capture
+            if gap > self.config["drop_ratio"] * self.period:
+                self.dropped += int(round(gap / self.period)) - 1
+        self.last_capture = captured_at
+
+    def displayed(self, captured_at):
+        now = time.perf_counter()
+        if self.started is None:
+            self.started = now
+        self.frames += 1
+        self.spans["frame"].add(now - captured_at)
+
+    def rep(self, captured_at):
+        self.spans["rep"].add(time.perf_counter() - captured_at)
+
+    def set_frame_rate(self, fps):
+        """
+        The source's nominal frame rate; enables drop detection for live sources.
+        """
+        self.period = 1.0 / fps if fps and fps > 0 else None
+
+    def report(self):
+        percentiles = self.config["percentiles"]
+        elapsed = time.perf_counter() - self.started if self.started is not None else 0.0
+        return {
+            "frames": self.frames,
+            "dropped": self.dropped + self.queue_dropped,
+            "fps": round((self.frames - 1) / elapsed, 2) if elapsed > 0 else 0.0,
+            "stages": {name: stats.summary(percentiles) for name, stats in self.stages.items() if stats.count},
+            "capture_to_display": self.spans["frame"].summary(percentiles),
+            "capture_to_rep": self.spans["rep"].summary(percentiles)
+        }
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+
+    # === Overlay ===
+    def overlay_rows(self):
+        """
+        Rows of cells for the on-frame overlay, recomputed every
+        overlay_every frames.
+        """
+        if self.frames % self.config["overlay_every"] == 0 or not self.rows:
+            report = self.report()
+            rows = [("ms", *(f"p{q}" for q in self.config["percentiles"]))]
+            spans = {"frame": report["capture_to_display"], "rep": report["capture_to_rep"]}
+            for name, s in [*report["stages"].items(), *spans.items()]:
+                if s["count"]:
+                    rows.append((name, *(f"{s[f'p{q}']:.1f}" for q in self.config["percentiles"])))
+            rows.append((f"{report['fps']:.0f} fps, {report['dropped']} dropped",))
+            self.rows = rows
+        return self.rows
+
+    def draw(self, frame):
+        """
+        Draws the overlay in the bottom-right corner, above the status line.
+        """
+        rows = self.overlay_rows()
+        h, w, _ = frame.shape
+        x0, y0 = max(0, w - 250), max(0, h - 50 - 16 * len(rows))
+        cv2.rectangle(frame, (x0, y0), (w - 5, h - 45), (0, 0, 0), -1)
+        for row, cells in enumerate(rows):
+            y = y0 + 14 + 16 * row
+            for column, text in enumerate(cells):
+                cv2.putText(frame, text, (x0 + 6 + (70 + 55 * (column - 1) if column else 0), y),
+                            cv2.FONT_HERSHEY_PLAIN, 1.0, (0, 255, 255), 1)
+        return frame
@@ -1,80 +1,43 @@
-import cv2
-import mediapipe as mp
-import math
-import os
-import pygame
+from .geometry import Features, all_visible
+from .metrics import RepMetrics
+from .rules import ExerciseRule, LABEL_COLOR, WARNING_COLOR
 
-pygame.mixer.init()
-sound = pygame.mixer.Sound("exercise_tracking/sfx_point.mp3")  # Use WAV for better compatibility if possible
-
-os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'  # Only show errors, no warnings or info
 # === CONFIGURATION ===
 CONFIG = {
     "show_labels": True,
     "min_visibility": 0.5,
     "show_reps": True,
-    "knee_ankle_threshold": 40  # threshold for how far knee can go ahead of ankle (in pixels)
+    "knee_ankle_threshold": 0.31  # threshold for how far knee can go ahead of ankle (in body-scale units, 40 px at a 130 px torso)
 }
 
-# === Setup Pose Detection ===
-mp_pose = mp.solutions.pose
-mp_drawing = mp.solutions.drawing_utils
-pose = mp_pose.Pose(static_image_mode=False, model_complexity=2)
-
-# === Landmark indices ===
-KEYPOINTS = {
-    "LEFT_HIP": 23, "RIGHT_HIP": 24,
-    "LEFT_KNEE": 25, "RIGHT_KNEE": 26,
-    "LEFT_ANKLE": 27, "RIGHT_ANKLE": 28
-}
-
-rep_count = 0
-rep_state = "WAITING_DOWN"
-hit_bottom = False
-
-# === Utility Functions ===
-def visible(lm):
-    return lm.visibility >= CONFIG["min_visibility"]
-
-def get_point(lm, h, w):
-    return (int(lm.x * w), int(lm.y * h))
-
-def calc_angle(a, b, c):
-    ba = [a[0] - b[0], a[1] - b[1]]
-    bc = [c[0] - b[0], c[1] - b[1]]
-    dot = ba[0] * bc[0] + ba[1] * bc[1]
-    mag_ba = math.sqrt(ba[0]**2 + ba[1]**2)
-    mag_bc = math.sqrt(bc[0]**2 + bc[1]**2)
-    angle = math.acos(dot / (mag_ba * mag_bc + 1e-6))
-    return math.degrees(angle)
+# === Landmarks and derived features ===
+FEATURES = Features(
+    angles={
+        "LEFT_knee_angle": ("LEFT_HIP", "LEFT_KNEE", "LEFT_ANKLE"),
+        "RIGHT_knee_angle": ("RIGHT_HIP", "RIGHT_KNEE", "RIGHT_ANKLE")
+    },
+    points=["LEFT_KNEE", "RIGHT_KNEE", "LEFT_ANKLE", "RIGHT_ANKLE"],
+    visible=["LEFT_KNEE", "RIGHT_KNEE"],
+    scale=True
+)
+METRICS = RepMetrics(signal=("LEFT_knee_angle", "RIGHT_knee_angle"),
+                     sides=("LEFT_knee_angle", "RIGHT_knee_angle"))
 
 # === Lunge Detection with Automatic Front Leg ===
-def detect_lunge_phase(landmarks, h, w):
-    if not all(visible(landmarks[KEYPOINTS[k]]) for k in ["LEFT_KNEE", "RIGHT_KNEE"]):
+def detect_lunge_phase(f, config=CONFIG):
+    if not all_visible(f):
         return None
 
     # Decide which knee is more forward (closer to camera in X)
-    left_knee_x = landmarks[KEYPOINTS["LEFT_KNEE"]].x
-    right_knee_x = landmarks[KEYPOINTS["RIGHT_KNEE"]].x
-
-    if left_knee_x < right_knee_x:
-        # Left leg is leading
-        front_knee = get_point(landmarks[KEYPOINTS["LEFT_KNEE"]], h, w)
-        front_ankle = get_point(landmarks[KEYPOINTS["LEFT_ANKLE"]], h, w)
-        front_hip = get_point(landmarks[KEYPOINTS["LEFT_HIP"]], h, w)
-    else:
-        # Right leg is leading
-        front_knee = get_point(landmarks[KEYPOINTS["RIGHT_KNEE"]], h, w)
-        front_ankle = get_point(landmarks[KEYPOINTS["RIGHT_ANKLE"]], h, w)
-        front_hip = get_point(landmarks[KEYPOINTS["RIGHT_HIP"]], h, w)
+    front = "LEFT" if f["LEFT_KNEE_x"] < f["RIGHT_KNEE_x"] else "RIGHT"
 
     # === Phase detection ===
-    angle = calc_angle(front_hip, front_knee, front_ankle)
+    angle = f[f"{front}_knee_angle"]
     deep_lunge = angle < 100
     recovered = angle > 160
 
     # === Incorrect form check ===
-    knee_ahead = abs(front_knee[0] - front_ankle[0]) > CONFIG["knee_ankle_threshold"]
+    knee_ahead = abs(f[f"{front}_KNEE_x"] - f[f"{front}_ANKLE_x"]) > config["knee_ankle_threshold"] * f["body_scale"]
     incorrect_form = knee_ahead
 
     return {
@@ -84,74 +47,66 @@ def detect_lunge_phase(landmarks, h, w):
         "incorrect_form": incorrect_form
     }
 
-# === Webcam Setup ===
-
-cap = cv2.VideoCapture(0)
-
-while cap.isOpened():
-    ret, frame = cap.read()
-    if not ret:
-        break
-
-    frame = cv2.flip(frame, 1)
-    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    results = pose.process(rgb)
-
-    if results.pose_landmarks:
-        h, w, _ = frame.shape
-        landmarks = results.pose_landmarks.landmark
-
-        phase = detect_lunge_phase(landmarks, h, w)
-
-        if phase:
-            if rep_state == "WAITING_DOWN":
-                if phase["deep_lunge"]:
-                    hit_bottom = True
-                    rep_state = "WAITING_UP"
-
-            elif rep_state == "WAITING_UP":
-                if hit_bottom and phase["recovered"]:
-                    if not phase["incorrect_form"]:
-                        rep_count += 1
-                        rep_state = "WAITING_DOWN"
-                        sound.play()
-                    else:
-                        rep_state = "INCORRECT FORM!"
-                    hit_bottom = False
-
-            elif rep_state == "INCORRECT FORM!":
-                if phase["recovered"]:
-                    rep_state = "WAITING_DOWN"
-
-        # === Draw Landmarks ===
-        mp_drawing.draw_landmarks(
-            frame,
-            results.pose_landmarks,
-            mp_pose.POSE_CONNECTIONS,
-            mp_drawing.DrawingSpec(color=(0, 0, 255), thickness=2, circle_radius=4),
-            mp_drawing.DrawingSpec(color=(255, 255, 255), thickness=3)
-        )
-
-        # === Display Info ===
-        if CONFIG["show_labels"] and phase:
-            label_color = (0, 0, 255) if phase["incorrect_form"] else (0, 255, 255)
-            label = f"Lunge: {rep_state.replace('_', ' ').title()} | Angle: {phase['knee_angle']}"
-            correct_label = "Make sure your knee doesn't go too far ahead of your ankle!"
-            if hit_bottom:
-                label += " (Deep ✔)"
-            cv2.putText(frame, label, (30, 40), cv2.FONT_HERSHEY_SIMPLEX, 0.8, label_color, 2)
-            if phase["incorrect_form"]:
-                cv2.putText(frame, correct_label, (30, 110), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
-
-        if CONFIG["show_reps"]:
-            cv2.putText(frame, f"Lunge Reps: {rep_count}", (30, 80),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 100), 2)
-
-    cv2.imshow("Lunge Tracker", frame)
-
-    if cv2.waitKey(5) & 0xFF == ord('q'):
-        break
-
-cap.release()
-cv2.destroyAllWindows()
-pose.close()
+# === Lunge Rule ===
+class LungeRule(ExerciseRule):
+    name = "Lunge"
+    window_title = "Lunge Tracker"
+    initial_state = "WAITING_DOWN"
+    CONFIG = CONFIG
+    features = FEATURES
+    metrics = METRICS
+
+    def reset(self):
+        super().reset()
+        self.hit_bottom = False
+        self.phase = None
+
+    def step(self, f):
+        phase = self.phase = self.debounce(detect_lunge_phase(f, self.config))
+        if not phase:
+            return False
+
+        if self.rep_state == "WAITING_DOWN":
+            if phase["deep_lunge"]:
+                self.hit_bottom = True
+                self.rep_state = "WAITING_UP"
+
+        elif self.rep_state == "WAITING_UP":
+            if self.hit_bottom and phase["recovered"]:
+                counted = not phase["incorrect_form"]
+                if counted:
+                    self.rep_count += 1
+                    self.rep_state = "WAITING_DOWN"
+                else:
+                    self.rep_state = "INCORRECT FORM!"
+                self.hit_bottom = False
+                return counted
+
+        elif self.rep_state == "INCORRECT FORM!":
+            if phase["recovered"]:
+                self.rep_state = "WAITING_DOWN"
+        return False
+
+    def state_labels(self):
+        phase = self.phase
+        if not phase:
+            return []
+        label_color = WARNING_COLOR if phase["incorrect_form"] else LABEL_COLOR
+        label = f"Lunge: {self.rep_state.replace('_', ' ').title()} | Angle: {phase['knee_angle']}"
+        if self.hit_bottom:
+            label += " (Deep ✔)"
+        overlays = [(label, (30, 40), 0.8, label_color)]
+        correct_label = self.form_warning()
+        if correct_label:
+            overlays.append((correct_label, (30, 110), 0.6, WARNING_COLOR))
+        return overlays
+
+    def form_warning(self):
+        if self.phase and self.phase["incorrect_form"]:
+            return "Make sure your knee doesn't go too far ahead of your ankle!"
+        return None
+
+
+if __name__ == "__main__":
+    from .tracker import run
+    run(LungeRule())
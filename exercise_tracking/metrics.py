@@ -0,0 +1,223 @@
+"""
+Per-rep tempo, range of motion, velocity and left/right symmetry, computed
+as the frames stream.
+
+A rule says what to measure with a RepMetrics spec next to its Features:
+
+    metrics = RepMetrics(signal=("left_angle", "right_angle"), sides=("left_angle", "right_angle"),
+                         eccentric_first=False)
+
+The signal is a feature (or the mean of several) that goes from one end of
+the movement to the other and back once per rep: a joint angle in degrees,
+or with unit="body" a pixel coordinate divided by body_scale. The rule's
+RepRecorder folds every frame into a fixed set of running values, never a
+per-frame history, and turns them into one record per counted rep:
+
+    {"rep": 3, "seconds": 1.9, "eccentric_seconds": 1.0, "pause_seconds": 0.1,
+     "concentric_seconds": 0.8, "range": 84.2, "unit": "deg", "peak_velocity": 171.0,
+     "mean_velocity": 105.3, "path_speed": 1.42, "asymmetry": 6.3, "range_asymmetry": 4.1}
+
+A rep runs from the previous count to this one. Its turning point is the
+end of its range farthest from where it was counted; the first half runs
+from leaving the previous count's position (by more than
+motion_threshold) to the turning point, the pause lasts until the signal
+leaves the turning point, and the second half ends at the count.
+`eccentric_first` says which half is which, so it depends on where the
+rule counts: a squat counted back at the top goes down first, and so does
+a pull-up counted at the top. The first rep is measured from the first
+frame.
+
+peak_velocity is the fastest the signal moved (units per second, from a
+smoothed derivative), mean_velocity the range over the concentric half,
+path_speed the peak speed of `path` (the bar or the wrists) in body
+scales per second, asymmetry the mean |left - right| of `sides` over the
+rep and range_asymmetry the difference between the two sides' ranges.
+Fields a spec doesn't declare are left out.
+"""
+import copy
+import math
+
+# === CONFIGURATION ===
+CONFIG = {
+    "motion_threshold": {"deg": 10.0, "body": 0.05},  # how far the signal moves from a position to have left it
+    "velocity_half_life": 0.05   # seconds; smooths the frame-to-frame derivative
+}
+
+
+class RepMetrics:
+    """
+    What a rule measures per rep. `signal` names a feature or a tuple of
+    them to average, `sides` the (left, right) pair, `path` a midpoint or
+    keypoint ("wrist" reads wrist_x / wrist_y) of a rule whose features
+    have body_scale.
+    """
+
+    def __init__(self, signal, unit="deg", eccentric_first=True, sides=None, path=None, **config):
+        self.signal = (signal,) if isinstance(signal, str) else tuple(signal)
+        self.unit = unit
+        self.eccentric_first = eccentric_first
+        self.sides = sides
+        self.path = (f"{path}_x", f"{path}_y") if path else None
+        self.config = {**CONFIG, **config}
+        if unit not in self.config["motion_threshold"]:
+            raise ValueError(f"unit must be one of {', '.join(self.config['motion_threshold'])}, not {unit!r}")
+
+    def recorder(self):
+        return RepRecorder(self)
+
+    def keys(self):
+        """
+        The features a recorder reads.
+        """
+        keys = list(self.signal)
+        if self.sides:
+            keys += self.sides
+        if self.path:
+            keys += self.path
+        if self.unit == "body" or self.path:
+            keys.append("body_scale")
+        return keys
+
+    def rows(self, features):
+        """
+        Single-frame dicts of just keys() from a batch of features.
+        """
+        keys = self.keys()
+        columns = [features[key].tolist() for key in keys]
+        for values in zip(*columns):
+            yield dict(zip(keys, values))
+
+
+class RepRecorder:
+    """
+    The running values of the rep in progress; observe() every frame,
+    finish() when the rule counts a rep.
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.threshold = spec.config["motion_threshold"][spec.unit]
+        self.half_life = spec.config["velocity_half_life"]
+        self.last_t = None
+        self.last_value = None
+        self.last_x = self.last_y = None
+        self.last_dt = self.weight = None
+        self.velocity = 0.0
+        self.path_speed = 0.0
+        self.start = None
+        self.begin()
+
+    def begin(self):
+        # Each end of the range: its value, when it was reached, when the
+        # movement towards it left the start position, and the last time
+        # the signal was still near it.
+        self.low = self.high = None
+        self.low_t = self.low_start = self.low_leave = None
+        self.high_t = self.high_start = self.high_leave = None
+        self.still_t = self.last_t  # the count's frame, at the start position by definition
+        self.peak_velocity = 0.0
+        self.peak_path = 0.0
+        self.side_diff = 0.0
+        self.side_frames = 0
+        self.left_low = self.right_low = math.inf
+        self.left_high = self.right_high = -math.inf
+
+    def copy(self):
+        return copy.copy(self)
+
+    def mean(self, f, keys):
+        if len(keys) == 1:
+            return f[keys[0]]
+        if len(keys) == 2:
+            return (f[keys[0]] + f[keys[1]]) / 2
+        return sum(f[key] for key in keys) / len(keys)
+
+    def observe(self, t, f):
+        spec = self.spec
+        threshold = self.threshold
+        value = self.mean(f, spec.signal)
+        if spec.unit == "body":
+            value /= f["body_scale"] or 1.0
+        if self.start is None:
+            self.start = value
+        if abs(value - self.start) < threshold:
+            self.still_t = t
+
+        if self.low is None or value < self.low:
+            self.low, self.low_t, self.low_start = value, t, self.still_t
+        if value - self.low < threshold:
+            self.low_leave = t
+        if self.high is None or value > self.high:
+            self.high, self.high_t, self.high_start = value, t, self.still_t
+        if self.high - value < threshold:
+            self.high_leave = t
+
+        last_t = self.last_t
+        if last_t is not None and t > last_t:
+            dt = t - last_t
+            if dt != self.last_dt:  # frames are mostly evenly spaced
+                self.last_dt = dt
+                self.weight = 1.0 - 0.5 ** (dt / self.half_life)
+            weight = self.weight
+            self.velocity += weight * ((value - self.last_value) / dt - self.velocity)
+            speed = abs(self.velocity)
+            if speed > self.peak_velocity:
+                self.peak_velocity = speed
+            if spec.path:
+                x, y = f[spec.path[0]], f[spec.path[1]]
+                path = math.hypot(x - self.last_x, y - self.last_y) / (f["body_scale"] or 1.0) / dt
+                self.path_speed += weight * (path - self.path_speed)
+                if self.path_speed > self.peak_path:
+                    self.peak_path = self.path_speed
+        if spec.path:
+            self.last_x, self.last_y = f[spec.path[0]], f[spec.path[1]]
+        self.last_t = t
+        self.last_value = value
+
+        if spec.sides:
+            left, right = f[spec.sides[0]], f[spec.sides[1]]
+            self.side_diff += abs(left - right)
+            self.side_frames += 1
+            if left < self.left_low:
+                self.left_low = left
+            if left > self.left_high:
+                self.left_high = left
+            if right < self.right_low:
+                self.right_low = right
+            if right > self.right_high:
+                self.right_high = right
+
+    def finish(self, t, rep):
+        """
+        The record of the rep counted at time t (after observing its
+        frame); starts the next one from here.
+        """
+        spec = self.spec
+        end = self.last_value
+        if end - self.low >= self.high - end:
+            turn, started, left = self.low_t, self.low_start, self.low_leave
+        else:
+            turn, started, left = self.high_t, self.high_start, self.high_leave
+        first, pause, second = turn - started, left - turn, t - left
+        span = self.high - self.low
+        concentric = second if spec.eccentric_first else first
+        record = {
+            "rep": rep,
+            "seconds": round(float(t - started), 3),
+            "eccentric_seconds": round(float(first if spec.eccentric_first else second), 3),
+            "pause_seconds": round(float(pause), 3),
+            "concentric_seconds": round(float(concentric), 3),
+            "range": round(float(span), 3),
+            "unit": spec.unit,
+            "peak_velocity": round(float(self.peak_velocity), 3),
+            "mean_velocity": round(float(span / concentric), 3) if concentric > 0 else 0.0
+        }
+        if spec.path:
+            record["path_speed"] = round(float(self.peak_path), 3)
+        if spec.sides and self.side_frames:
+            record["asymmetry"] = round(float(self.side_diff / self.side_frames), 3)
+            record["range_asymmetry"] = round(float(abs((self.left_high - self.left_low) -
+                                                        (self.right_high - self.right_low))), 3)
+        self.start = end
+        self.begin()
+        return record
@@ -0,0 +1,243 @@
+"""
+Rep counting for several athletes in one camera.
+
+    python -m exercise_tracking.multiperson squat --source class.mp4 --max-people 4
+
+MediaPipe's pose solution follows one person, so every athlete gets their
+own tracking pose model, fed a crop around them (see roi.py), and their own
+rule. New athletes are found by a detection pass with the athletes already
+tracked blacked out; it runs every `detect_every` frames, each time on the
+next of a few search windows (the full frame, then square tiles across
+it, since the detector struggles with several people in one wide frame),
+and finds at most one newcomer. Per-frame cost is one small-crop landmark
+pass per person plus a shared detection pass amortized over several
+frames, not one full-frame pipeline per person.
+"""
+import argparse
+import sys
+import time
+
+import cv2
+
+from . import EXERCISES, create_rule
+from .geometry import landmarks_to_array
+from .roi import RegionOfInterest
+from .tracker import CONFIG as TRACKER_CONFIG, Tracker, create_pose, draw_point_skeleton
+
+# === CONFIGURATION ===
+CONFIG = {
+    "max_people": 4,
+    "detect_every": 10,       # frames between searches for newcomers
+    "max_misses": 15,         # frames a person may go unseen before they are dropped
+    "duplicate_iou": 0.6,     # two people whose boxes overlap this much are the same person
+    "inference_size": 256     # longest side of each person's crop
+}
+
+LABEL_COLORS = [(0, 200, 255), (255, 180, 0), (120, 255, 120), (255, 100, 255), (100, 160, 255), (255, 255, 120)]
+
+
+def box_iou(a, b):
+    x0, y0 = max(a[0], b[0]), max(a[1], b[1])
+    x1, y1 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, x1 - x0) * max(0, y1 - y0)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union else 0.0
+
+
+def search_windows(h, w):
+    """
+    The full frame, then square tiles half a tile apart along its longer side.
+    """
+    side = min(h, w)
+    windows = [(0, 0, w, h)]
+    for start in range(0, max(h, w) - side + 1, side // 2):
+        windows.append((start, 0, start + side, h) if w > h else (0, start, w, start + side))
+    if max(h, w) > side and windows[-1][2:] != (w, h):
+        windows.append((w - side, 0, w, h) if w > h else (0, h - side, w, h))
+    return windows
+
+
+class Person:
+    """
+    One tracked athlete: their crop, pose model, rule and last landmarks.
+    """
+
+    def __init__(self, person_id, rule, pose, roi):
+        self.person_id = person_id
+        self.rule = rule
+        self.pose = pose
+        self.roi = roi
+        self.points = None
+        self.misses = 0
+
+
+class MultiPersonTracker(Tracker):
+    """
+    Tracker that counts reps for every athlete in view. run() returns
+    {person_id: rep_count}, including people who have left.
+    """
+
+    def __init__(self, exercise, source=None, **config):
+        self.people_config = {**CONFIG, **{key: config.pop(key) for key in CONFIG if key in config}}
+        self.exercise = exercise
+        super().__init__(create_rule(exercise), source=source, **config)
+        self.people = []
+        self.spare_poses = []
+        self.left = {}
+        self.next_id = 1
+        self.frames = 0
+        self.searches = 0
+
+    def load_pose(self, model_complexity):
+        # The full-frame model is only used to find newcomers, a different
+        # crop every time, so it doesn't track between frames.
+        if model_complexity not in self.poses:
+            self.poses[model_complexity] = create_pose(model_complexity, static_image_mode=True)
+        return self.poses[model_complexity]
+
+    def counts(self):
+        return {**self.left, **{person.person_id: person.rule.rep_count for person in self.people}}
+
+    # === People ===
+    def follow(self, person, rgb):
+        box = person.roi.box
+        results = person.pose.process(person.roi.crop(rgb))
+        person.roi.update(results)
+        if person.roi.box is None:
+            # Never fall back to the full frame: that would jump to whoever
+            # else is in view. Hold the last box until they reappear.
+            person.roi.box = box
+            person.misses += 1
+            person.points = None
+            return None
+        person.misses = 0
+        person.points = self.landmarks(results)
+        return person.points
+
+    def detect(self, rgb):
+        """
+        Looks for one untracked person in the next search window, with
+        everyone already tracked masked out.
+        """
+        h, w, _ = rgb.shape
+        windows = search_windows(h, w)
+        wx0, wy0, wx1, wy1 = windows[self.searches % len(windows)]
+        self.searches += 1
+        masked = rgb[wy0:wy1, wx0:wx1].copy()
+        for person in self.people:
+            x0, y0, x1, y1 = person.roi.box
+            masked[max(0, y0 - wy0):max(0, y1 - wy0), max(0, x0 - wx0):max(0, x1 - wx0)] = 0
+        results = self.pose.process(masked)
+        if not results.pose_landmarks:
+            return
+        # Boxes stay in the coordinates of the unflipped frame the crops come from.
+        points = landmarks_to_array(results.pose_landmarks.landmark)
+        points[:, 0] = (wx0 + points[:, 0] * (wx1 - wx0)) / w
+        points[:, 1] = (wy0 + points[:, 1] * (wy1 - wy0)) / h
+        roi = RegionOfInterest(inference_size=self.people_config["inference_size"])
+        roi.box = roi.next_box(points, h, w)
+        if roi.box is None:
+            return
+        pose = self.spare_poses.pop() if self.spare_poses else create_pose(self.config["model_complexity"])
+        self.people.append(Person(self.next_id, create_rule(self.exercise), pose, roi))
+        self.next_id += 1
+
+    def prune(self):
+        """
+        Drops people who have been gone too long, and the younger of any two
+        that ended up following the same athlete.
+        """
+        config = self.people_config
+        kept = []
+        for person in self.people:
+            duplicate = any(box_iou(person.roi.box, other.roi.box) > config["duplicate_iou"] for other in kept)
+            if duplicate or person.misses > config["max_misses"]:
+                if person.rule.rep_count or not duplicate:
+                    self.left[person.person_id] = person.rule.rep_count
+                self.spare_poses.append(person.pose)
+            else:
+                kept.append(person)
+        self.people = kept
+
+    # === Loop ===
+    def process(self, frame, t=None, captured_at=None):
+        now = self.t = time.perf_counter() if t is None else t
+        h, w, _ = frame.shape
+        if self.live and not self.pose_ready():
+            return self.render(frame, None, None), False
+        if self.pose is None:
+            self.pose = self.pose_future.result()
+
+        rgb = self.prepare(frame)
+        counted = False
+        for person in self.people:
+            points = self.follow(person, rgb)
+            if points is not None:
+                counted = person.rule.update(points, h, w, now) or counted
+        self.prune()
+
+        config = self.people_config
+        searching = not self.people or self.frames % config["detect_every"] == 0
+        if searching and len(self.people) < config["max_people"]:
+            self.detect(rgb)
+        self.frames += 1
+
+        if self.feedback is not None:
+            self.feedback.observe(now, counted)
+        return self.render(frame, None, None), counted
+
+    def render(self, frame, results, points, labels=None):
+        if self.config["headless"]:
+            return frame
+        frame = self.display(frame)
+        h, w, _ = frame.shape
+        for person in self.people:
+            color = LABEL_COLORS[(person.person_id - 1) % len(LABEL_COLORS)]
+            if person.points is not None:
+                draw_point_skeleton(frame, person.points, person.rule, h, w)
+            x0, y0, x1, y1 = person.roi.box
+            if self.config["mirror"]:
+                x0, x1 = w - x1, w - x0
+            cv2.rectangle(frame, (x0, y0), (x1, y1), color, 1)
+            cv2.putText(frame, f"#{person.person_id}: {person.rule.rep_count} ({person.rule.rep_state})",
+                        (x0 + 4, max(20, y0 + 20)), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+        status = "Loading pose model..." if self.pose is None else f"{len(self.people)} people"
+        cv2.putText(frame, status, (30, h - 20), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (200, 200, 200), 1)
+        return frame
+
+    def run(self):
+        super().run()
+        return self.counts()
+
+    def close(self):
+        super().close()
+        for pose in self.spare_poses + [person.pose for person in self.people]:
+            pose.close()
+        self.spare_poses = []
+        for person in self.people:
+            self.left[person.person_id] = person.rule.rep_count
+        self.people = []
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m exercise_tracking.multiperson",
+                                     description="Count reps for several athletes in one camera.")
+    parser.add_argument("exercise", choices=sorted(EXERCISES))
+    parser.add_argument("--source", default=None, help="camera index or video file (default: camera 0)")
+    parser.add_argument("--max-people", type=int, default=CONFIG["max_people"])
+    parser.add_argument("--model-complexity", type=int, default=TRACKER_CONFIG["model_complexity"], choices=(0, 1, 2))
+    parser.add_argument("--headless", action="store_true", help="no drawing or window")
+    args = parser.parse_args(argv)
+
+    source = args.source
+    if source is not None and source.isdigit():
+        source = int(source)
+    counts = MultiPersonTracker(args.exercise, source=source, max_people=args.max_people,
+                                model_complexity=args.model_complexity, headless=args.headless).run()
+    for person_id, reps in sorted(counts.items()):
+        print(f"#{person_id}: {reps} reps")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
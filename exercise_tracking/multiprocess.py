@@ -0,0 +1,350 @@
+"""
+Capture, pose inference and rules in separate processes for one camera.
+
+    python -m exercise_tracking squat --processes 2
+
+The threaded trackers run pose inference under the same GIL as capture,
+the rules and drawing. Here a capture process decodes frames straight into
+a shared-memory ring (ring.py), `processes` inference processes each take
+a frame from it and write that frame's landmarks into a second ring, and
+the tracker's own process runs the rule, drawing and window on them in
+frame order. Frames and landmarks are never pickled; only ring names and
+a few counters cross process boundaries.
+
+A camera overwrites the oldest frame when inference falls behind, and
+inference always takes the newest frame (the ones skipped count as
+dropped). A video file is read no faster than its frames are scored, and
+inference takes its frames in order, so none are skipped.
+"""
+import multiprocessing
+import queue
+import time
+import traceback
+
+import numpy as np
+
+from .geometry import NUM_LANDMARKS, landmarks_to_array
+from .ring import SharedRing
+from .tracker import FILE_FPS, Tracker, load_mediapipe
+
+# === CONFIGURATION ===
+CONFIG = {
+    "frame_slots": 8,         # frames the capture ring holds before the oldest is overwritten
+    "landmark_slots": 64,     # landmark arrays held for the rule process
+    "poll_interval": 0.001,   # seconds between looks at a ring with nothing new
+    "start_timeout": 10.0     # seconds to wait for the capture process to deliver a first frame
+}
+
+# Landmark ring meta: (capture time, inference seconds, status)
+FOUND, NO_POSE, LOST = 1.0, 0.0, -1.0
+
+
+class Channels:
+    """
+    The small shared state every process gets besides the rings.
+
+        claims[0]          newest frame sequence number an inference process took
+        claims[1 + slot]   which frame sequence number took that landmark slot
+        done               last frame the rule process finished (paces video files)
+        ended              last frame of the source, 0 while it is still running
+        ready              inference processes with a warm model
+    """
+
+    def __init__(self, context, landmark_slots):
+        self.stop = context.Event()
+        self.claims = context.Array("q", 1 + landmark_slots)
+        self.done = context.Value("q", 0)
+        self.ended = context.Value("q", 0)
+        self.ready = context.Value("i", 0)
+        self.errors = context.Queue()
+        self.frame_specs = context.Queue()
+
+
+# === Capture Process ===
+def capture_process(source, live, channels, config):
+    import cv2
+
+    frames = None
+    try:
+        cap = cv2.VideoCapture(source)
+        ret, frame = cap.read() if cap.isOpened() else (False, None)
+        if not ret:
+            channels.frame_specs.put(None)
+            return
+        frames = SharedRing(frame.shape, frame.dtype, config["frame_slots"], meta=1)
+        channels.frame_specs.put((frames.spec(), cap.get(cv2.CAP_PROP_FPS)))
+        seq = frames.put(frame, meta=(time.perf_counter(),))
+        while not channels.stop.is_set():
+            if not live:
+                # Never overwrite a frame of a file that isn't scored yet.
+                while seq - channels.done.value >= frames.slots - 1 and not channels.stop.is_set():
+                    time.sleep(config["poll_interval"])
+            slot = frames.claim(seq + 1)
+            ret, decoded = cap.read(slot)  # decodes into shared memory when the size matches
+            captured_at = time.perf_counter()
+            if not ret:
+                break
+            if decoded is not slot:
+                np.copyto(slot, decoded)
+            seq += 1
+            frames.commit(seq, (captured_at,))
+        channels.ended.value = seq
+        cap.release()
+    except Exception:
+        channels.errors.put(f"capture: {traceback.format_exc()}")
+    finally:
+        if frames is not None:
+            frames.close()
+
+
+# === Inference Process ===
+def claim_frame(frames, channels, live):
+    """
+    Takes the newest frame (cameras) or the next one (files) that no other
+    inference process took yet. Returns its sequence number, or None.
+    """
+    claims = channels.claims
+    with claims.get_lock():
+        newest = frames.head
+        seq = newest if live else claims[0] + 1
+        if seq <= claims[0] or seq > newest:
+            return None
+        claims[0] = seq
+        claims[1 + seq % (len(claims) - 1)] = seq
+    return seq
+
+
+def inference_process(frame_spec, landmark_spec, lock, live, tracker_config, channels, config):
+    import cv2
+    from .tracker import create_pose
+
+    frames = landmarks = pose = None
+    try:
+        frames = SharedRing.attach(frame_spec)
+        landmarks = SharedRing.attach(landmark_spec, lock)
+        pose = create_pose(tracker_config["model_complexity"])
+        pose.process(np.zeros((256, 256, 3), dtype=np.uint8))
+        with channels.ready.get_lock():
+            channels.ready.value += 1
+
+        mirror = tracker_config["mirror"]
+        rgb = None
+        while not channels.stop.is_set():
+            seq = claim_frame(frames, channels, live)
+            if seq is None:
+                ended = channels.ended.value
+                if ended and channels.claims[0] >= ended:
+                    break
+                time.sleep(config["poll_interval"])
+                continue
+            item = frames.view(seq)
+            if item is not None:
+                rgb = cv2.cvtColor(item, cv2.COLOR_BGR2RGB, dst=rgb)
+                captured_at = frames.meta[seq % frames.slots, 0]
+            if item is None or not frames.intact(seq):
+                landmarks.claim(seq)
+                landmarks.commit(seq, (0.0, 0.0, LOST))  # overwritten before inference got to it
+                continue
+            start = time.perf_counter()
+            results = pose.process(rgb)
+            elapsed = time.perf_counter() - start
+            points = landmarks.claim(seq)
+            status = NO_POSE
+            if results.pose_landmarks:
+                landmarks_to_array(results.pose_landmarks.landmark, out=points, mirror=mirror)
+                status = FOUND
+            landmarks.commit(seq, (captured_at, elapsed, status))
+    except Exception:
+        channels.errors.put(f"inference: {traceback.format_exc()}")
+    finally:
+        if pose is not None:
+            pose.close()
+        for ring in (frames, landmarks):
+            if ring is not None:
+                ring.close()
+
+
+# === Rule / Render Process ===
+class MultiProcessTracker(Tracker):
+    """
+    Tracker whose capture and pose inference run in their own processes
+    (`processes` of them for inference) and whose rules, drawing and window
+    run here, fed through shared-memory rings. Frames reach the rule in
+    capture order even when several inference processes finish out of order.
+    """
+
+    def __init__(self, rule, source=None, **config):
+        self.process_config = {**CONFIG, **{key: config.pop(key) for key in CONFIG if key in config}}
+        super().__init__(rule, source, **config)
+        if self.roi is not None or self.governor is not None or self.decimator is not None:
+            raise ValueError("roi, target_fps and decimate run inside the tracker's own process; "
+                             "they can't be combined with processes")
+        self.context = multiprocessing.get_context("spawn")  # never fork a process that has threads
+        self.channels = Channels(self.context, self.process_config["landmark_slots"])
+        self.children = []
+        self.frames = None
+        self.landmark_ring = None
+        self.points = np.zeros((NUM_LANDMARKS, 4), dtype=np.float32)
+        self.preview = None
+        self.previewed = 0
+        self.dropped = 0
+
+    def warm_up(self, model_complexity):
+        # The pose models load in the inference processes; this one only
+        # needs MediaPipe's skeleton drawing.
+        if not self.config["headless"]:
+            load_mediapipe()
+        return None
+
+    def pose_ready(self):
+        return self.channels.ready.value > 0
+
+    def display(self, frame):
+        # The frame is a view into the capture ring; never draw on it.
+        if self.config["mirror"]:
+            return super().display(frame)
+        if self.display_buffer is None or self.display_buffer.shape != frame.shape:
+            self.display_buffer = np.empty_like(frame)
+        np.copyto(self.display_buffer, frame)
+        return self.display_buffer
+
+    def check(self):
+        try:
+            error = self.channels.errors.get_nowait()
+        except queue.Empty:
+            return
+        raise RuntimeError(f"tracker process failed in {error}")
+
+    def open(self):
+        config = self.process_config
+        channels = self.channels
+        capture = self.context.Process(target=capture_process, name="tracker-capture", daemon=True,
+                                       args=(self.source, self.live, channels, config))
+        capture.start()
+        self.children.append(capture)
+        try:
+            spec = channels.frame_specs.get(timeout=config["start_timeout"])
+        except queue.Empty:
+            self.check()
+            raise RuntimeError(f"no frames from {self.source!r} after {config['start_timeout']} s")
+        if spec is None:
+            raise RuntimeError(f"could not read frames from {self.source!r}")
+        frame_spec, fps = spec
+        self.frames = SharedRing.attach(frame_spec)
+        if not self.live:
+            self.frame_rate = fps or FILE_FPS
+        if self.latency is not None and self.live:
+            self.latency.set_frame_rate(fps)
+
+        lock = self.context.Lock()
+        self.landmark_ring = SharedRing((NUM_LANDMARKS, 4), np.float32, config["landmark_slots"], meta=3, lock=lock)
+        settings = {key: self.config[key] for key in ("model_complexity", "mirror")}
+        for index in range(self.config["processes"]):
+            worker = self.context.Process(target=inference_process, name=f"tracker-inference-{index}", daemon=True,
+                                          args=(frame_spec, self.landmark_ring.spec(), lock, self.live,
+                                                settings, channels, config))
+            worker.start()
+            self.children.append(worker)
+
+    def next_landmarks(self, seq):
+        """
+        Landmarks of frame seq: (points or None, meta), "skip" when no
+        inference process took the frame (or its landmarks were
+        overwritten), None while they are still to come.
+        """
+        claims = self.channels.claims
+        if seq > claims[0]:
+            return None
+        if claims[1 + seq % (len(claims) - 1)] != seq:
+            return "skip"
+        item = self.landmark_ring.read(seq, out=self.points)
+        if item is None:
+            return "skip" if self.landmark_ring.holding(seq) > seq else None
+        points, meta = item
+        if meta[2] == LOST:
+            return "skip"
+        return (points if meta[2] == FOUND else None), meta
+
+    def show_preview(self):
+        """
+        Shows the newest camera frame, untracked, while the models load.
+        """
+        seq = self.frames.head
+        item = self.frames.read(seq, out=self.preview) if seq > self.previewed else None
+        if item is None:
+            time.sleep(self.process_config["poll_interval"])
+            return True
+        self.preview, (captured_at,) = item
+        self.previewed = seq
+        return self.present(self.render(self.preview, None, None), captured_at)
+
+    def run(self):
+        try:
+            self.open()
+            h, w, _ = self.frames.shape
+            seq = 1
+            while not self.stop_event.is_set():
+                self.check()
+                ended = self.channels.ended.value
+                if ended and seq > ended:
+                    break
+                if self.live and not self.pose_ready():
+                    if not self.show_preview():
+                        break
+                    seq = self.frames.head + 1  # previewed frames are not dropped ones
+                    continue
+                item = self.next_landmarks(seq)
+                if item is None:
+                    if not any(child.is_alive() for child in self.children[1:]):
+                        break  # every inference process is gone; check() reports why
+                    time.sleep(self.process_config["poll_interval"])
+                    continue
+                if item == "skip":
+                    self.dropped += 1
+                    seq += 1
+                    continue
+                points, (captured_at, inferred, _) = item
+                mark = time.perf_counter()
+                t = self.frame_time(captured_at, seq - 1)
+                points = self.smooth(t, points)
+                self.record(t, points, h, w)
+                self.evaluate(points, h, w, t, captured_at)
+                if self.latency is not None:
+                    self.latency.stages["infer"].add(inferred)
+                    self.latency.queue_dropped = self.dropped
+                mark = self.lap("rule", mark)
+
+                frame = None
+                drawn = True
+                if not self.config["headless"]:
+                    frame = self.frames.view(seq)
+                    if frame is not None:
+                        frame = self.render(frame, None, points)  # drawn on a copy (see display())
+                    drawn = frame is not None and self.frames.intact(seq)
+                    if drawn:
+                        self.lap("draw", mark)
+                    else:
+                        self.dropped += 1  # the camera overwrote it before it was drawn
+                shown = self.present(frame, captured_at) if drawn else True
+                self.channels.done.value = seq
+                if not shown:
+                    break
+                seq += 1
+            self.check()
+        finally:
+            self.close()
+        return self.rule.rep_count
+
+    def close(self):
+        self.channels.stop.set()
+        for child in self.children:
+            child.join(timeout=2)
+            if child.is_alive():
+                child.terminate()
+        self.children = []
+        for ring in (self.frames, self.landmark_ring):
+            if ring is not None:
+                ring.close()
+                ring.unlink()
+        self.frames = self.landmark_ring = None
+        super().close()
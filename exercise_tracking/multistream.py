@@ -0,0 +1,419 @@
+"""
+Many cameras in one process, sharing a fixed pool of pose models.
+
+    python -m exercise_tracking.multistream squat=0 pull_up=1 bench_press=clip.mp4@10
+    python -m exercise_tracking.multistream --synthetic 4 8 16 --seconds 10
+
+Each stream is `exercise=source`, optionally `@fps` for its own frame-rate
+target. Capture threads keep only the newest frame of every stream (older
+ones are dropped and counted), and the inference workers - one per CPU core
+by default - always take the stream that is most overdue against its
+target. A stream never has more than one frame in flight, so its rule
+still sees its frames in order.
+
+Pose models are shared between streams, so they run in static-image mode:
+MediaPipe's frame-to-frame tracking would otherwise carry one athlete's
+landmarks over to another camera.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+from . import EXERCISES, create_rule
+
+# === CONFIGURATION ===
+CONFIG = {
+    "workers": None,          # inference workers (default: one per CPU core)
+    "model_complexity": 1,
+    "mirror": True,           # track the mirrored pose, as the single-camera tracker does
+    "target_fps": 15,         # per-stream frame-rate target unless the stream sets its own
+    "max_frame_age": 0.5,     # drop frames that waited longer than this (seconds)
+    "latency_window": 1000,   # latency samples kept per stream for the percentiles
+    "synthetic_height": 480,
+    "synthetic_width": 640,
+    "synthetic_fps": 30,
+    "synthetic_clip": os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir,
+                                   "train-buddy", "public", "exercises", "lunges.gif")  # the app's demo
+}
+
+
+# === Sources ===
+class VideoSource:
+    """
+    Camera or video file. Files are paced at their own frame rate so they
+    behave like a live camera.
+    """
+
+    def __init__(self, source):
+        self.cap = cv2.VideoCapture(source)
+        self.interval = None
+        if not isinstance(source, int):
+            self.interval = 1.0 / (self.cap.get(cv2.CAP_PROP_FPS) or 30)
+        self.next_at = None
+
+    def read(self):
+        if not self.cap.isOpened():
+            return None
+        ret, frame = self.cap.read()
+        if not ret:
+            return None
+        if self.interval is not None:
+            now = time.perf_counter()
+            self.next_at = now if self.next_at is None else self.next_at + self.interval
+            if self.next_at > now:
+                time.sleep(self.next_at - now)
+        return frame
+
+    def close(self):
+        self.cap.release()
+
+
+class SyntheticSource:
+    """
+    Endless camera-sized frames at a fixed rate, for load testing: a demo
+    clip of a person exercising, looped and letterboxed to the camera size.
+    A frame without a person would only run MediaPipe's detector, not its
+    landmark model, and flatter the throughput. `seed` picks the frame each
+    stream starts on, so streams don't run in lockstep.
+    """
+
+    def __init__(self, height, width, fps, seed=0, clip=CONFIG["synthetic_clip"]):
+        cap = cv2.VideoCapture(clip)
+        self.frames = []
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            self.frames.append(letterbox(frame, height, width))
+        cap.release()
+        if not self.frames:
+            raise FileNotFoundError(f"Can't read the synthetic clip {clip}")
+        self.interval = 1.0 / fps
+        self.next_at = None
+        self.index = seed
+
+    def read(self):
+        now = time.perf_counter()
+        self.next_at = now if self.next_at is None else self.next_at + self.interval
+        if self.next_at > now:
+            time.sleep(self.next_at - now)
+        self.index += 1
+        return self.frames[self.index % len(self.frames)]
+
+    def close(self):
+        pass
+
+
+def letterbox(frame, height, width):
+    """
+    `frame` scaled to fit height x width, centred on black.
+    """
+    h, w, _ = frame.shape
+    scale = min(height / h, width / w)
+    fitted = cv2.resize(frame, (round(w * scale), round(h * scale)), interpolation=cv2.INTER_AREA)
+    out = np.zeros((height, width, 3), dtype=np.uint8)
+    top, left = (height - fitted.shape[0]) // 2, (width - fitted.shape[1]) // 2
+    out[top:top + fitted.shape[0], left:left + fitted.shape[1]] = fitted
+    return out
+
+
+# === Streams ===
+class Stream:
+    """
+    One camera: its source, its rule and the newest frame not yet inferred.
+    """
+
+    def __init__(self, name, rule, source, target_fps=None, latency_window=CONFIG["latency_window"]):
+        self.name = name
+        self.rule = rule
+        self.source = source
+        self.target_fps = target_fps
+        self.frame = None
+        self.captured_at = None
+        self.in_flight = False
+        self.next_due = None
+        self.ended = False
+        self.stats = {"captured": 0, "processed": 0, "posed": 0, "dropped": 0, "stale": 0}
+        self.latencies = deque(maxlen=latency_window)
+
+    @property
+    def idle(self):
+        return self.ended and self.frame is None and not self.in_flight
+
+    def report(self, elapsed):
+        latencies = np.array(self.latencies) * 1000
+        percentiles = np.percentile(latencies, [50, 95, 99]) if len(latencies) else [float("nan")] * 3
+        return {
+            "exercise": self.rule.name,
+            "target_fps": self.target_fps,
+            "fps": round(self.stats["processed"] / elapsed, 2) if elapsed else 0.0,
+            "rep_count": self.rule.rep_count,
+            **self.stats,
+            "latency_ms": dict(zip(("p50", "p95", "p99"), (round(float(p), 1) for p in percentiles)))
+        }
+
+
+class FairScheduler:
+    """
+    Hands frames to inference workers, earliest deadline first.
+
+    Every stream is due once per 1/target_fps. A worker takes the due
+    stream whose deadline passed longest ago, so under overload each stream
+    keeps a share of the workers proportional to its target rather than
+    whichever camera delivers fastest. A stream that fell behind is owed at
+    most one period, so it can't burst ahead of the others once it catches
+    up.
+    """
+
+    def __init__(self, streams, max_frame_age):
+        self.streams = streams
+        self.max_frame_age = max_frame_age
+        self.condition = threading.Condition()
+        self.stopped = False
+
+    def offer(self, stream, frame, captured_at):
+        with self.condition:
+            stream.stats["captured"] += 1
+            if stream.frame is not None:
+                stream.stats["dropped"] += 1
+            stream.frame, stream.captured_at = frame, captured_at
+            if stream.next_due is None:
+                stream.next_due = captured_at
+            self.condition.notify()
+
+    def end(self, stream):
+        with self.condition:
+            stream.ended = True
+            self.condition.notify_all()
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+
+    def take(self):
+        """
+        Blocks until a stream is due and returns (stream, frame, captured_at),
+        or None once every stream has ended or the scheduler was stopped.
+        """
+        with self.condition:
+            while True:
+                if self.stopped or all(stream.idle for stream in self.streams):
+                    return None
+                now = time.perf_counter()
+                chosen, wake_at = None, None
+                for stream in self.streams:
+                    if stream.frame is None or stream.in_flight:
+                        continue
+                    if now - stream.captured_at > self.max_frame_age:
+                        stream.frame = None
+                        stream.stats["dropped"] += 1
+                        stream.stats["stale"] += 1
+                        continue
+                    due = stream.next_due
+                    if due > now:
+                        wake_at = due if wake_at is None else min(wake_at, due)
+                    elif chosen is None or due < chosen_due:
+                        chosen, chosen_due = stream, due
+                if chosen is not None:
+                    period = 1.0 / chosen.target_fps
+                    chosen.next_due = max(chosen_due + period, now - period)
+                    frame, captured_at = chosen.frame, chosen.captured_at
+                    chosen.frame = None
+                    chosen.in_flight = True
+                    return chosen, frame, captured_at
+                self.condition.wait(None if wake_at is None else wake_at - now)
+
+    def done(self, stream, captured_at):
+        with self.condition:
+            stream.in_flight = False
+            stream.stats["processed"] += 1
+            stream.latencies.append(time.perf_counter() - captured_at)
+            self.condition.notify_all()
+
+
+# === Runner ===
+class MultiStreamRunner:
+    """
+    Runs every stream's capture on its own thread and its inference and
+    rule on a shared pool of pose models.
+    """
+
+    def __init__(self, streams, **config):
+        self.config = {**CONFIG, **config}
+        self.streams = streams
+        for stream in streams:
+            stream.target_fps = stream.target_fps or self.config["target_fps"]
+        self.scheduler = FairScheduler(streams, self.config["max_frame_age"])
+        self.workers = self.config["workers"] or os.cpu_count() or 1
+        self.elapsed = 0.0
+
+    def capture(self, stream):
+        try:
+            while not self.scheduler.stopped:
+                frame = stream.source.read()
+                if frame is None:
+                    break
+                self.scheduler.offer(stream, frame, time.perf_counter())
+        finally:
+            stream.source.close()
+            self.scheduler.end(stream)
+
+    def infer(self, pose):
+        from .geometry import landmarks_to_array
+
+        while True:
+            job = self.scheduler.take()
+            if job is None:
+                return
+            stream, frame, captured_at = job
+            try:
+                h, w, _ = frame.shape
+                results = pose.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+                if results.pose_landmarks:
+                    stream.stats["posed"] += 1
+                    points = landmarks_to_array(results.pose_landmarks.landmark, mirror=self.config["mirror"])
+                    stream.rule.update(points, h, w, captured_at)
+            finally:
+                self.scheduler.done(stream, captured_at)
+
+    def run(self, seconds=None):
+        """
+        Runs until every source ends, `seconds` pass or stop() is called.
+        Returns report().
+        """
+        from .tracker import create_pose
+
+        poses = []
+        for _ in range(self.workers):
+            pose = create_pose(self.config["model_complexity"], static_image_mode=True)
+            pose.process(np.zeros((self.config["synthetic_height"], self.config["synthetic_width"], 3),
+                                  dtype=np.uint8))
+            poses.append(pose)
+
+        threads = [threading.Thread(target=self.infer, args=(pose,), daemon=True) for pose in poses]
+        threads += [threading.Thread(target=self.capture, args=(stream,), daemon=True) for stream in self.streams]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        try:
+            deadline = None if seconds is None else start + seconds
+            while any(thread.is_alive() for thread in threads[:self.workers]):
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+                threads[0].join(0.1)
+        finally:
+            self.elapsed = time.perf_counter() - start
+            self.stop()
+            for thread in threads:
+                thread.join()
+            for pose in poses:
+                pose.close()
+        return self.report()
+
+    def stop(self):
+        self.scheduler.stop()
+
+    def report(self):
+        streams = {stream.name: stream.report(self.elapsed) for stream in self.streams}
+        processed = sum(stream.stats["processed"] for stream in self.streams)
+        posed = sum(stream.stats["posed"] for stream in self.streams)
+        captured = sum(stream.stats["captured"] for stream in self.streams)
+        latencies = np.concatenate([np.array(stream.latencies) for stream in self.streams] or [[]]) * 1000
+        return {
+            "streams": len(self.streams),
+            "workers": self.workers,
+            "seconds": round(self.elapsed, 2),
+            "throughput_fps": round(processed / self.elapsed, 1) if self.elapsed else 0.0,
+            # Frames without a pose skip the landmark model and cost less.
+            "pose_share": round(posed / processed, 3) if processed else 0.0,
+            "dropped_share": round(1 - processed / captured, 3) if captured else 0.0,
+            "latency_ms": {name: round(float(np.percentile(latencies, q)), 1) if len(latencies) else None
+                           for name, q in (("p50", 50), ("p95", 95), ("p99", 99))},
+            "per_stream": streams
+        }
+
+
+def synthetic_streams(count, exercise="lunges", **config):
+    config = {**CONFIG, **config}
+    return [Stream(f"synthetic-{index}", create_rule(exercise),
+                   SyntheticSource(config["synthetic_height"], config["synthetic_width"],
+                                   config["synthetic_fps"], seed=index, clip=config["synthetic_clip"]))
+            for index in range(count)]
+
+
+def parse_stream(spec):
+    """
+    "exercise=source[@fps]" -> (exercise, source, fps or None).
+    """
+    exercise, _, source = spec.partition("=")
+    if not source:
+        raise ValueError(f"expected exercise=source, got '{spec}'")
+    fps = None
+    if "@" in source:
+        source, _, fps = source.rpartition("@")
+        fps = float(fps)
+    if exercise not in EXERCISES:
+        raise ValueError(f"unknown exercise '{exercise}'")
+    return exercise, int(source) if source.isdigit() else source, fps
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m exercise_tracking.multistream",
+                                     description="Track several video sources with a shared pool of pose models.")
+    parser.add_argument("streams", nargs="*", metavar="exercise=source[@fps]")
+    parser.add_argument("--synthetic", type=int, nargs="+", metavar="N",
+                        help="instead, load-test with N synthetic camera streams (several counts allowed)")
+    parser.add_argument("--seconds", type=float, default=None,
+                        help="stop after this long (default: until every source ends; 10 for --synthetic)")
+    parser.add_argument("--workers", type=int, default=None, help="inference workers (default: CPU cores)")
+    parser.add_argument("--target-fps", type=float, default=CONFIG["target_fps"],
+                        help="frame-rate target for streams that don't set their own")
+    parser.add_argument("--model-complexity", type=int, default=CONFIG["model_complexity"], choices=(0, 1, 2))
+    parser.add_argument("--no-mirror", action="store_true", help="track frames as recorded, without flipping")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+    if not args.streams and not args.synthetic:
+        parser.error("give at least one exercise=source stream or --synthetic N")
+
+    config = {"workers": args.workers, "target_fps": args.target_fps, "model_complexity": args.model_complexity,
+              "mirror": not args.no_mirror}
+    if args.synthetic:
+        runs = [(synthetic_streams(count), args.seconds or 10) for count in args.synthetic]
+    else:
+        try:
+            specs = [parse_stream(spec) for spec in args.streams]
+        except ValueError as exc:
+            parser.error(str(exc))
+        streams = [Stream(f"{exercise}@{source}", create_rule(exercise), VideoSource(source), fps)
+                   for exercise, source, fps in specs]
+        runs = [(streams, args.seconds)]
+
+    reports = [MultiStreamRunner(streams, **config).run(seconds) for streams, seconds in runs]
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return 0
+    for report in reports:
+        latency = report["latency_ms"]
+        print(f"{report['streams']} streams on {report['workers']} workers: {report['throughput_fps']} fps total "
+              f"({report['pose_share']:.0%} with a pose), {report['dropped_share']:.0%} frames dropped, latency p50 {latency['p50']} / p95 {latency['p95']} / "
+              f"p99 {latency['p99']} ms")
+        if not args.synthetic:
+            for name, stream in report["per_stream"].items():
+                print(f"  {name:<24} {stream['fps']:>6} fps  {stream['rep_count']:>3} reps  "
+                      f"p95 {stream['latency_ms']['p95']} ms  dropped {stream['dropped']}")
+        else:
+            rates = [stream["fps"] for stream in report["per_stream"].values()]
+            print(f"  per stream {min(rates)}-{max(rates)} fps (target {args.target_fps})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
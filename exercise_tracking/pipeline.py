@@ -0,0 +1,174 @@
+import threading
+import time
+from collections import deque
+
+import cv2
+
+from .tracker import Tracker
+
+
+class LatestQueue:
+    """
+    Bounded hand-off between two pipeline stages. When the queue is full a
+    put() drops the oldest item instead of blocking, so a slow consumer always
+    picks up the newest frame and never stalls the producer.
+
+    With block=True a full queue makes put() wait for room instead (until
+    the queue is closed), for sources where every item counts: a video
+    file would otherwise be read far faster than it is inferred.
+    """
+
+    def __init__(self, maxsize=1, block=False):
+        self.items = deque(maxlen=maxsize)
+        self.cond = threading.Condition()
+        self.block = block
+        self.dropped = 0
+        self.closed = False
+
+    def put(self, item):
+        with self.cond:
+            if self.block:
+                while len(self.items) == self.items.maxlen and not self.closed:
+                    self.cond.wait()
+            if len(self.items) == self.items.maxlen:
+                self.dropped += 1
+            self.items.append(item)
+            self.cond.notify_all()
+
+    def get(self, timeout=0.5):
+        """
+        Returns the oldest buffered item, or None on timeout / once closed.
+        """
+        with self.cond:
+            if not self.items and not self.closed:
+                self.cond.wait(timeout)
+            if not self.items:
+                return None
+            self.cond.notify_all()  # a blocked put() has room now
+            return self.items.popleft()
+
+    @property
+    def drained(self):
+        return self.closed and not self.items
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+
+class PipelinedTracker(Tracker):
+    """
+    Tracker that runs capture, pose inference and rule evaluation on their own
+    threads and renders on the calling thread (cv2.imshow must stay there).
+
+    Stages talk through LatestQueues, so inference always works on the newest
+    camera frame and the camera buffer never fills with stale frames. The rule
+    stage gets a slightly deeper queue so short inference bursts don't make
+    the state machine skip landmark frames. A video file has no newest frame
+    to catch up to, so there the queues block instead and every frame is
+    scored, as the sequential tracker does.
+
+    The rule belongs to the rule thread: its overlay labels are taken there,
+    right after the frame is evaluated, and handed to the render stage with
+    the frame, so drawing never reads rule state that is being updated.
+    """
+    # Frames are in flight between threads (and some are dropped), so every
+    # read gets its own array.
+    reuse_frames = False
+
+    def __init__(self, rule, source=None, **config):
+        super().__init__(rule, source, **config)
+        size = self.config["queue_size"]
+        block = not self.live
+        self.captured = LatestQueue(size, block)
+        self.inferred = LatestQueue(max(size, 4), block)
+        self.evaluated = LatestQueue(size, block)
+        self.stats = {"captured": 0, "inferred": 0, "rendered": 0}
+
+    # === Stage Loops ===
+    # Each stage closes its output queue when its input is drained, so a
+    # finished video file flushes through the pipeline before run() returns.
+    def capture_loop(self):
+        seq = 0
+        while not self.stop_event.is_set() and self.cap.isOpened():
+            frame, captured_at = self.read()
+            if frame is None:
+                break
+            seq += 1
+            self.stats["captured"] = seq
+            self.captured.put((seq, captured_at, frame))
+        self.captured.close()
+
+    def inference_loop(self):
+        while not self.stop_event.is_set() and not self.captured.drained:
+            item = self.captured.get()
+            if item is None:
+                continue
+            seq, captured_at, frame = item
+            if self.live and not self.pose_ready():
+                self.inferred.put((seq, captured_at, frame, None, None))
+                continue
+            mark = time.perf_counter()
+            rgb = self.prepare(frame)
+            mark = self.lap("prepare", mark)
+            results = self.infer(rgb)
+            self.lap("infer", mark)
+            self.stats["inferred"] += 1
+            self.inferred.put((seq, captured_at, frame, results, self.landmarks(results)))
+        self.inferred.close()
+
+    def rule_loop(self):
+        while not self.stop_event.is_set() and not self.inferred.drained:
+            item = self.inferred.get()
+            if item is None:
+                continue
+            seq, captured_at, frame, results, points = item
+            mark = time.perf_counter()
+            h, w, _ = frame.shape
+            t = self.frame_time(captured_at, seq - 1)
+            points = self.smooth(t, points)
+            self.record(t, points, h, w)
+            self.evaluate(points, h, w, t, captured_at)
+            labels = self.rule.labels() if points is not None and not self.config["headless"] else None
+            self.lap("rule", mark)
+            self.evaluated.put((seq, captured_at, frame, results, points, labels))
+        self.evaluated.close()
+
+    def stop(self):
+        super().stop()
+        for queue in (self.captured, self.inferred, self.evaluated):
+            queue.close()
+
+    @property
+    def dropped(self):
+        return self.captured.dropped + self.inferred.dropped + self.evaluated.dropped
+
+    def run(self):
+        self.open()
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # we keep our own one-frame buffer
+        threads = [threading.Thread(target=target, daemon=True)
+                   for target in (self.capture_loop, self.inference_loop, self.rule_loop)]
+        for thread in threads:
+            thread.start()
+
+        try:
+            while not self.stop_event.is_set() and not self.evaluated.drained:
+                item = self.evaluated.get()
+                if item is None:
+                    continue
+                seq, captured_at, frame, results, points, labels = item
+                mark = time.perf_counter()
+                frame = self.render(frame, results, points, labels)
+                self.lap("draw", mark)
+                self.stats["rendered"] += 1
+                if self.latency is not None:
+                    self.latency.queue_dropped = self.dropped
+                if not self.present(frame, captured_at):
+                    break
+        finally:
+            self.stop()
+            for thread in threads:
+                thread.join(timeout=2)
+            self.close()
+        return self.rule.rep_count
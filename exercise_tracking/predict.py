@@ -0,0 +1,168 @@
+import numpy as np
+
+from .geometry import NUM_LANDMARKS, VISIBILITY
+
+# === CONFIGURATION ===
+CONFIG = {
+    "every": 3,                 # run pose inference on one frame in this many
+    "process_noise": 0.5,       # white-noise acceleration density of the motion model
+    "measurement_noise": 3e-3,  # landmark jitter std, normalized units
+    "max_uncertainty_px": 15.0, # force inference once a predicted joint is this uncertain
+    "min_visibility": 0.5
+}
+
+
+class LandmarkPredictor:
+    """
+    Constant-velocity Kalman filter run independently on the x, y and z of
+    every landmark, vectorized over the (33, 3) coordinates. observe() feeds
+    a real inference; predict() extrapolates to any later time.
+    """
+
+    def __init__(self, **config):
+        self.config = {**CONFIG, **config}
+        self.reset()
+
+    def reset(self):
+        self.t = None
+        self.pos = None
+        self.vel = None
+        self.visibility = None
+
+    @property
+    def tracking(self):
+        return self.t is not None
+
+    def propagate(self, dt):
+        """
+        Covariance (p00, p01, p11) after moving the state forward by dt.
+        """
+        q = self.config["process_noise"]
+        p00 = self.p00 + 2 * dt * self.p01 + dt * dt * self.p11 + q * dt ** 3 / 3
+        p01 = self.p01 + dt * self.p11 + q * dt * dt / 2
+        p11 = self.p11 + q * dt
+        return p00, p01, p11
+
+    def observe(self, t, points):
+        if points is None:
+            self.reset()
+            return
+        z = points[:, :3].astype(np.float64)
+        r = self.config["measurement_noise"] ** 2
+        self.visibility = points[:, VISIBILITY].copy()
+
+        if self.t is None:
+            self.pos = z
+            self.vel = np.zeros_like(z)
+            self.p00 = np.full_like(z, r)
+            self.p01 = np.zeros_like(z)
+            self.p11 = np.ones_like(z)  # velocity unknown until the second frame
+            self.t = t
+            return
+
+        dt = max(t - self.t, 1e-3)
+        p00, p01, p11 = self.propagate(dt)
+        predicted = self.pos + self.vel * dt
+        s = p00 + r
+        k0, k1 = p00 / s, p01 / s
+        innovation = z - predicted
+        self.pos = predicted + k0 * innovation
+        self.vel = self.vel + k1 * innovation
+        self.p00 = (1 - k0) * p00
+        self.p01 = (1 - k0) * p01
+        self.p11 = p11 - k1 * p01
+        self.t = t
+
+    def predict(self, t, out=None):
+        """
+        Returns the (33, 4) landmarks extrapolated to time t, with the
+        visibility of the last observation.
+        """
+        if out is None:
+            out = np.empty((NUM_LANDMARKS, 4), dtype=np.float32)
+        out[:, :3] = self.pos + self.vel * (t - self.t)
+        out[:, VISIBILITY] = self.visibility
+        return out
+
+    def uncertainty(self, t, h, w):
+        """
+        Largest predicted position std, in pixels, over the visible joints.
+        """
+        p00 = self.propagate(t - self.t)[0]
+        visible = self.visibility >= self.config["min_visibility"]
+        if not visible.any():
+            return float("inf")
+        return float(np.sqrt(p00[visible, :2].max()) * max(h, w))
+
+
+class Decimator:
+    """
+    Decides per frame whether to run pose inference or to predict the
+    landmarks, and steps the rule on predicted frames.
+
+    A predicted frame is only accepted if neither it nor the prediction one
+    decimation window ahead would change the rule's decision (rep state or
+    count). Otherwise the rule is rolled back and the frame gets a real
+    inference, so every rep decision is made on real landmarks.
+    """
+
+    def __init__(self, rule, **config):
+        self.rule = rule
+        self.config = {**CONFIG, **config}
+        self.predictor = LandmarkPredictor(**self.config)
+        self.since_real = 0
+        self.frame_interval = None
+        self.last_t = None
+        self.stats = {"inferred": 0, "predicted": 0, "forced": 0}
+
+    def tick(self, t):
+        if self.last_t is not None:
+            dt = t - self.last_t
+            self.frame_interval = dt if self.frame_interval is None else 0.9 * self.frame_interval + 0.1 * dt
+        self.last_t = t
+
+    def predict(self, t, h, w):
+        """
+        Returns predicted (33, 4) landmarks for the frame at time t after
+        stepping the rule on them, or None when the frame needs inference.
+        """
+        self.tick(t)
+        every = self.config["every"]
+        if every <= 1 or not self.predictor.tracking or self.since_real >= every - 1:
+            return None
+        if self.predictor.uncertainty(t, h, w) > self.config["max_uncertainty_px"]:
+            self.stats["forced"] += 1
+            return None
+
+        rule = self.rule
+        before = rule.snapshot()
+        decision = rule.decision()
+        points = self.predictor.predict(t)
+        rule.update(points, h, w, t)
+        if rule.decision() == decision:
+            stepped = rule.snapshot()
+            ahead = t + (self.frame_interval or 0.0) * every
+            rule.update(self.predictor.predict(ahead), h, w, ahead)
+            changed = rule.decision() != decision
+            rule.restore(stepped)
+            if not changed:
+                self.since_real += 1
+                self.stats["predicted"] += 1
+                return points
+
+        rule.restore(before)
+        self.stats["forced"] += 1
+        return None
+
+    def observe(self, t, points):
+        """
+        Feeds the landmarks of a real inference (None if no pose was found).
+        """
+        self.predictor.observe(t, points)
+        self.since_real = 0
+        self.stats["inferred"] += 1
+
+    def label(self):
+        total = self.stats["inferred"] + self.stats["predicted"]
+        share = self.stats["inferred"] / total if total else 1.0
+        return f"inference {share:.0%} of frames"
@@ -0,0 +1,47 @@
+"""
+Re-scores a recorded landmark trace without running pose detection.
+
+    python -m exercise_tracking --record session.trace squat
+    python -m exercise_tracking.replay session.trace squat
+
+Features for the whole trace are computed in one batch, so replaying a long
+session costs a fraction of a second instead of its original length.
+"""
+import argparse
+import time
+
+from . import EXERCISES, create_rule
+from .trace import read_trace
+
+
+def replay(trace, rule):
+    """
+    Steps `rule` through every frame of `trace` that had a detected pose and
+    returns its rep count. Frames without a pose are skipped, exactly as the
+    live tracker skips them.
+    """
+    if isinstance(trace, str):
+        trace = read_trace(trace)
+    points = trace.landmarks[trace.present]
+    if len(points):
+        rule.advance_batch(points, trace.timestamps[trace.present].tolist(), trace.h, trace.w)
+    return rule.rep_count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m exercise_tracking.replay",
+                                     description="Re-score a recorded landmark trace.")
+    parser.add_argument("trace")
+    parser.add_argument("exercise", choices=sorted(EXERCISES))
+    args = parser.parse_args(argv)
+
+    trace = read_trace(args.trace)
+    start = time.perf_counter()
+    reps = replay(trace, create_rule(args.exercise))
+    elapsed = time.perf_counter() - start
+    print(f"{args.exercise}: {reps} reps "
+          f"({len(trace)} frames, {trace.duration:.1f}s session, replayed in {elapsed * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
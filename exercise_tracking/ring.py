@@ -0,0 +1,173 @@
+"""
+Shared-memory ring buffer for handing frames and landmarks between processes.
+
+    frames = SharedRing((480, 640, 3), np.uint8, slots=8, meta=1)  # creates the block
+    seq = frames.put(frame, meta=(captured_at,))
+    ...
+    frames = SharedRing.attach(spec)                               # in another process
+    item = frames.read(seq, out=buffer)                            # (array, meta) or None
+
+Every item gets a sequence number (1, 2, ...) and lives in slot seq % slots
+until a newer item overwrites it; writers never wait for readers. A slot
+records the sequence number of the item it holds, and is marked as being
+written while a writer fills it, so a reader checks after copying (or
+after using a zero-copy view()) that the slot still holds the item it
+asked for, seqlock style.
+
+Nothing is pickled: other processes attach by name, from spec().
+"""
+import time
+
+import numpy as np
+from multiprocessing import shared_memory
+
+WRITING = -1   # slot sequence number while a writer is filling it
+EMPTY = 0      # never written; real sequence numbers start at 1
+ALIGN = 64
+
+
+class SharedRing:
+    """
+    `slots` arrays of one shape and dtype, plus `meta` float64 values per
+    item (timestamps, flags), in one shared-memory block.
+
+    One writer per ring can let put() number items itself. Several writers
+    (e.g. inference processes writing landmarks for the frames they took)
+    pass the sequence numbers explicitly and share a multiprocessing lock,
+    which only guards the head.
+    """
+
+    def __init__(self, shape, dtype, slots, meta=0, name=None, lock=None):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.slots = slots
+        self.meta_size = meta
+        self.lock = lock
+        header_bytes = 8 * (1 + slots) + 8 * slots * meta
+        data_offset = -(-header_bytes // ALIGN) * ALIGN
+        item_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        size = data_offset + slots * item_bytes
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size if self.owner else 0)
+
+        buffer = self.shm.buf
+        self.header = np.ndarray((1 + slots,), dtype=np.int64, buffer=buffer)
+        self.sequences = self.header[1:]
+        self.meta = np.ndarray((slots, meta), dtype=np.float64, buffer=buffer, offset=8 * (1 + slots))
+        self.data = np.ndarray((slots, *self.shape), dtype=self.dtype, buffer=buffer, offset=data_offset)
+        if self.owner:
+            self.header[:] = EMPTY
+
+    @classmethod
+    def attach(cls, spec, lock=None):
+        return cls(spec["shape"], spec["dtype"], spec["slots"], spec["meta"], name=spec["name"], lock=lock)
+
+    def spec(self):
+        """
+        What another process needs to attach(): plain, picklable values.
+        """
+        return {"name": self.shm.name, "shape": self.shape, "dtype": self.dtype.str,
+                "slots": self.slots, "meta": self.meta_size}
+
+    @property
+    def head(self):
+        """
+        Sequence number of the newest item written, 0 before the first.
+        """
+        return int(self.header[0])
+
+    # === Writing ===
+    def claim(self, seq):
+        """
+        Marks seq's slot as being written and returns it as a writable view,
+        e.g. for cv2.VideoCapture.read() to decode straight into. Finish
+        with commit(seq).
+        """
+        slot = seq % self.slots
+        self.sequences[slot] = WRITING
+        return self.data[slot]
+
+    def commit(self, seq, meta=()):
+        slot = seq % self.slots
+        self.meta[slot, :len(meta)] = meta
+        self.sequences[slot] = seq
+        if self.lock is None:
+            if seq > self.header[0]:
+                self.header[0] = seq
+            return
+        with self.lock:
+            if seq > self.header[0]:
+                self.header[0] = seq
+
+    def put(self, array, seq=None, meta=()):
+        """
+        Copies one item in, overwriting the oldest; returns its sequence number.
+        """
+        if seq is None:
+            seq = self.head + 1
+        np.copyto(self.claim(seq), array)
+        self.commit(seq, meta)
+        return seq
+
+    # === Reading ===
+    def holding(self, seq):
+        """
+        The sequence number seq's slot holds now: seq itself, an older one
+        (not written yet), a newer one (overwritten) or WRITING.
+        """
+        return int(self.sequences[seq % self.slots])
+
+    def intact(self, seq):
+        return self.sequences[seq % self.slots] == seq
+
+    def view(self, seq):
+        """
+        Zero-copy view of item seq, or None if its slot no longer (or not
+        yet) holds it. Check intact(seq) once done with the view.
+        """
+        slot = seq % self.slots
+        if self.sequences[slot] != seq:
+            return None
+        return self.data[slot]
+
+    def read(self, seq, out=None):
+        """
+        Copies item seq out; returns (array, meta tuple), or None if it was
+        overwritten before or while copying.
+        """
+        slot = seq % self.slots
+        if self.sequences[slot] != seq:
+            return None
+        if out is None:
+            out = self.data[slot].copy()
+        else:
+            np.copyto(out, self.data[slot])
+        meta = tuple(self.meta[slot].tolist())
+        if self.sequences[slot] != seq:
+            return None
+        return out, meta
+
+    def wait(self, after, timeout=None, poll_interval=0.001):
+        """
+        Polls until an item newer than `after` is written. Returns the head,
+        or None on timeout.
+        """
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while self.header[0] <= after:
+            if deadline is not None and time.perf_counter() >= deadline:
+                return None
+            time.sleep(poll_interval)
+        return self.head
+
+    # === Lifetime ===
+    def close(self):
+        # The arrays must go before the buffer they view can be released.
+        self.header = self.sequences = self.meta = self.data = None
+        self.shm.close()
+
+    def unlink(self):
+        """
+        Frees the block once every process has closed it. Call once, from
+        the process that owns the ring's lifetime.
+        """
+        self.shm.unlink()
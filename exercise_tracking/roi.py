@@ -0,0 +1,113 @@
+import cv2
+import numpy as np
+
+from .geometry import VISIBILITY, X, Y, Z, landmarks_to_array
+
+# === CONFIGURATION ===
+CONFIG = {
+    "inference_size": 384,   # longest side of the crop handed to pose.process
+    "padding": 0.3,          # grow the landmark bounding box by this share on each side
+    "margin": 0.08,          # keep the box while landmarks stay this far inside it
+    "min_visibility": 0.5
+}
+
+
+class RegionOfInterest:
+    """
+    Crops each frame to the padded bounding box of the previous frame's
+    landmarks and shrinks the crop to a fixed inference size, so pose
+    inference cost no longer scales with the camera resolution.
+
+    The box is sticky: it only moves once the landmarks get close to its
+    edge (or the athlete shrinks well inside it), so MediaPipe's own
+    frame-to-frame tracking sees a stable image. When no pose is found the
+    next frame is processed whole.
+    """
+
+    def __init__(self, **config):
+        self.config = {**CONFIG, **config}
+        self.box = None        # (x0, y0, x1, y1) in full-frame pixels, or None for the full frame
+        self.used = None       # box the last crop() actually used
+        self.shape = None
+        self.misses = 0
+
+    def crop(self, rgb, scale=1.0):
+        """
+        Returns the image to run pose inference on. `scale` is the
+        governor's input scale; it applies to the crop size as well.
+        """
+        h, w = rgb.shape[:2]
+        self.shape = (h, w)
+        if self.box is None:
+            self.used = None
+            if scale != 1.0:
+                rgb = cv2.resize(rgb, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            return rgb
+
+        x0, y0, x1, y1 = self.used = self.box
+        crop = rgb[y0:y1, x0:x1]
+        size = self.config["inference_size"] * scale
+        factor = size / max(x1 - x0, y1 - y0)
+        if factor < 1.0:
+            # INTER_AREA is ~10x slower at these non-integer factors and the
+            # pose model resamples to its own input size anyway.
+            crop = cv2.resize(crop, (int((x1 - x0) * factor), int((y1 - y0) * factor)),
+                              interpolation=cv2.INTER_LINEAR)
+        return crop
+
+    def update(self, results):
+        """
+        Maps the landmarks of a cropped inference back to full-frame
+        normalized coordinates (in place, so drawing and the rules see the
+        full frame) and picks the box for the next frame.
+        """
+        if not results.pose_landmarks:
+            self.box = None
+            self.misses += 1
+            return
+        landmarks = results.pose_landmarks.landmark
+        points = landmarks_to_array(landmarks)
+        h, w = self.shape
+
+        if self.used is not None:
+            x0, y0, x1, y1 = self.used
+            points[:, X] = (x0 + points[:, X] * (x1 - x0)) / w
+            points[:, Y] = (y0 + points[:, Y] * (y1 - y0)) / h
+            points[:, Z] *= (x1 - x0) / w
+            for lm, (x, y, z) in zip(landmarks, points[:, :3].tolist()):
+                lm.x, lm.y, lm.z = x, y, z
+
+        self.box = self.next_box(points, h, w)
+
+    def next_box(self, points, h, w):
+        visible = points[:, VISIBILITY] >= self.config["min_visibility"]
+        if visible.sum() < 4:
+            return None  # too little of the body in view to trust a crop
+        xs = np.clip(points[visible, X], 0.0, 1.0) * w
+        ys = np.clip(points[visible, Y], 0.0, 1.0) * h
+        left, right, top, bottom = xs.min(), xs.max(), ys.min(), ys.max()
+
+        if self.box is not None:
+            x0, y0, x1, y1 = self.box
+            margin = self.config["margin"] * max(x1 - x0, y1 - y0)
+            inside = (left >= x0 + margin or x0 == 0) and (right <= x1 - margin or x1 == w) \
+                and (top >= y0 + margin or y0 == 0) and (bottom <= y1 - margin or y1 == h)
+            loose = max(right - left, bottom - top) < 0.5 * max(x1 - x0, y1 - y0)
+            if inside and not loose:
+                return self.box
+
+        pad = self.config["padding"] * max(right - left, bottom - top)
+        cx, cy = (left + right) / 2, (top + bottom) / 2
+        half_w = (right - left) / 2 + pad
+        half_h = (bottom - top) / 2 + pad
+        x0, x1 = int(max(0, cx - half_w)), int(min(w, cx + half_w))
+        y0, y1 = int(max(0, cy - half_h)), int(min(h, cy + half_h))
+        if x1 - x0 < 2 or y1 - y0 < 2:
+            return None
+        return (x0, y0, x1, y1)
+
+    def label(self):
+        if self.box is None:
+            return "ROI: full frame"
+        x0, y0, x1, y1 = self.box
+        return f"ROI: {x1 - x0}x{y1 - y0}"
@@ -0,0 +1,206 @@
+import time
+
+import numpy as np
+
+# === Shared Configuration ===
+# Every exercise rule starts from these and layers its own CONFIG on top.
+BASE_CONFIG = {
+    "show_labels": True,
+    "min_visibility": 0.5,
+    "show_reps": True,
+    "debounce_seconds": 0.12,  # a detection flag must hold about this long before it changes (see debounce())
+    "min_rep_seconds": 0.3,    # a rep completed sooner than this after the last one is a flicker, not a rep
+    "rep_metrics": True        # per-rep tempo, range, velocity and symmetry records (see metrics.py)
+}
+
+# === Utility Functions ===
+# Landmarks arrive as a (33, 4) array (see geometry.py); detection code works on
+# the dict returned by a geometry.Features spec.
+def visible_average(features, joint, axis="y"):
+    """
+    Averages the LEFT_/RIGHT_ coordinate of a joint over whichever sides are
+    visible. Returns None when neither side is.
+    """
+    values = [features[f"{side}_{joint}_{axis}"] for side in ("LEFT", "RIGHT")
+              if features["visible"][f"{side}_{joint}"]]
+    if not values:
+        return None
+    return sum(values) / len(values)
+
+# Detection flags are plain bools from replayed rows and NumPy bools from
+# single-frame features.
+FLAG_TYPES = {bool, np.bool_}
+
+# === Label Colors (BGR) ===
+LABEL_COLOR = (0, 255, 255)
+REPS_COLOR = (0, 255, 100)
+WARNING_COLOR = (0, 0, 255)
+
+
+class ExerciseRule:
+    """
+    Base class for a single exercise: detection thresholds, rep state machine
+    and the labels drawn on top of the frame.
+
+    update(landmarks, h, w, t) advances the state machine by one (33, 4)
+    landmark array captured at time t and returns True when a rep was
+    counted. Subclasses set `features` and implement step(f) on the computed
+    features, which lets replays feed features computed for a whole batch of
+    frames at once. Rules never touch the camera, the pose model or the
+    window; the Tracker owns those.
+
+    Anything timed (holds, debouncing, tempo) reads `self.t`, the capture time
+    of the frame being stepped, never a frame count, so a rule behaves the
+    same at any frame rate.
+
+    A rule with a `metrics` spec (metrics.RepMetrics) also keeps
+    `rep_records`, one dict of tempo, range of motion, velocity and
+    symmetry per counted rep.
+    """
+    name = "Exercise"
+    window_title = "Exercise Tracker"
+    initial_state = "WAITING_DOWN"
+    skeleton_style = "mediapipe"   # or "styled" for the per-bone colored skeleton
+    CONFIG = {}
+    features = None                # geometry.Features spec this rule reads
+    metrics = None                 # metrics.RepMetrics spec of what to measure per rep
+
+    def __init__(self, **config):
+        self.config = {**BASE_CONFIG, **self.CONFIG, **config}
+        self.reset()
+
+    def reset(self):
+        self.rep_count = 0
+        self.rep_state = self.initial_state
+        self.t = None
+        self.last_rep_t = None
+        self.flags = {}
+        self.debounced_at = None
+        # A tuple, so the shallow snapshot() below stays a snapshot.
+        self.rep_records = ()
+        self.recorder = self.metrics.recorder() if self.metrics is not None and self.config["rep_metrics"] else None
+
+    def update(self, landmarks, h, w, t=None):
+        return self.advance(self.features(landmarks, h, w, self.config["min_visibility"]), t)
+
+    def advance(self, f, t=None):
+        """
+        step(f) for the frame captured at time t (seconds on any monotonic
+        clock; now when None). A rep that completes within min_rep_seconds
+        of the previous one is taken back: the state machine moves on, but
+        the count doesn't.
+        """
+        self.t = time.perf_counter() if t is None else t
+        counted = self.confirm(self.step(f))
+        if self.recorder is not None:
+            self.record(f, counted)
+        return counted
+
+    def confirm(self, counted):
+        """
+        Applies min_rep_seconds to the outcome of a step at self.t.
+        """
+        if counted:
+            if self.last_rep_t is not None and self.t - self.last_rep_t < self.config["min_rep_seconds"]:
+                self.rep_count -= 1
+                return False
+            self.last_rep_t = self.t
+        return counted
+
+    def record(self, f, counted):
+        """
+        Feeds the frame to the rep recorder; closes the rep's record when
+        one was counted.
+        """
+        self.recorder.observe(self.t, f)
+        if counted:
+            self.rep_records += (self.recorder.finish(self.t, self.rep_count),)
+
+    def advance_batch(self, points, timestamps, h, w):
+        """
+        advance() through an (N, 33, 4) batch of landmarks captured at
+        `timestamps`, features computed in one call. Returns the rep count.
+        """
+        rows = self.features.rows(points, h, w, self.config["min_visibility"])
+        for t, f in zip(timestamps, rows):
+            self.advance(f, t)
+        return self.rep_count
+
+    def step(self, f):
+        """
+        Advances the state machine with one frame's features (the dict
+        produced by self.features). Returns True when a rep was counted.
+        """
+        raise NotImplementedError
+
+    def debounce(self, phase):
+        """
+        Debounces the boolean flags of a detection dict in place. Each flag
+        keeps a level, its raw value averaged over time with a half-life of
+        debounce_seconds, and reads True while that level is above one half:
+        a clean change comes through after debounce_seconds at any frame
+        rate, while a flag flickering on jittery frames follows whichever
+        value holds most of the time rather than the latest frame.
+        Numeric entries pass through. Call it on every step.
+        """
+        if not phase:
+            return phase
+        dt = self.t - self.debounced_at if self.debounced_at is not None else None
+        weight = 1.0 if dt is None else 1.0 - 0.5 ** (dt / self.config["debounce_seconds"])
+        self.debounced_at = self.t
+        previous = self.flags
+        flags = {}
+        for key, value in phase.items():
+            if value.__class__ in FLAG_TYPES:
+                # As floats: NumPy bools don't subtract.
+                value = float(value)
+                level = previous.get(key, value)
+                level += weight * (value - level)
+                flags[key] = level
+                phase[key] = level > 0.5
+        # A new dict every frame rather than an update, so snapshot() copies
+        # stay untouched (see predict.py).
+        self.flags = flags
+        return phase
+
+    # === State Snapshots ===
+    # Rule state lives in plain instance attributes, so a shallow copy is
+    # enough to try a frame and roll it back (see predict.py); only the rep
+    # recorder's running values are copied along.
+    def snapshot(self):
+        state = dict(self.__dict__)
+        if self.recorder is not None:
+            state["recorder"] = self.recorder.copy()
+        return state
+
+    def restore(self, state):
+        self.__dict__.clear()
+        self.__dict__.update(state)
+
+    def decision(self):
+        """
+        The part of the state that a rep decision changes.
+        """
+        return self.rep_state, self.rep_count
+
+    def form_warning(self):
+        """
+        Returns the form correction that applies to the latest frame, or None.
+        """
+        return None
+
+    def labels(self):
+        """
+        Returns the text overlays for the current state as
+        (text, (x, y), font_scale, color) tuples.
+        """
+        overlays = []
+        if self.config["show_labels"]:
+            overlays.extend(self.state_labels())
+        if self.config["show_reps"]:
+            overlays.append((f"{self.name} Reps: {self.rep_count}", (30, 80), 0.8, REPS_COLOR))
+        return overlays
+
+    def state_labels(self):
+        label = f"{self.name}: {self.rep_state.replace('_', ' ').title()}"
+        return [(label, (30, 40), 0.9, LABEL_COLOR)]
@@ -0,0 +1,500 @@
+"""
+Pool of long-lived tracker worker processes.
+
+Each worker imports cv2/mediapipe and loads its pose model once, then runs
+one tracking session at a time and goes back to idle, so starting an
+exercise only costs opening the camera. The Flask backend owns one pool:
+
+    pool = TrackerPool()
+    pool.start()
+    session_id = pool.start_session("squat")
+    session_id = pool.start_workout([{"name": "Squats", "sets": 3, "reps": 10}, ...])
+    pool.status(session_id)   # {"state": "running", "rep_count": 3, ...}
+    pool.latency(session_id)  # per-stage p50/p95/p99, dropped frames, ...
+    pool.stop_session(session_id)
+
+Clients that want changes as they happen subscribe to a session stream
+instead of polling status(); see SessionStream.
+"""
+import multiprocessing
+import queue
+import threading
+import time
+import uuid
+
+from . import EXERCISES, workout_sets
+
+# === CONFIGURATION ===
+CONFIG = {
+    "workers": 1,            # warm workers started up front
+    "max_workers": 4,        # upper bound on concurrent sessions
+    "spare_workers": 1,      # keep this many idle workers warm while sessions run
+    "model_complexity": None,  # pose model to pre-load (default: the tracker's)
+    "start_timeout": 60,     # seconds to wait for a worker to warm up
+    "latency": True,         # time every session's tracking loop (see latency.py)
+    "latency_interval": 2.0,  # seconds between latency reports from a running session
+    "health_interval": 1.0,  # seconds between checks for workers that died mid-session
+    "session_retention": 600  # seconds an ended session's final status stays queryable
+}
+
+
+# === Worker Process ===
+def worker_main(worker_id, commands, events, stop, config):
+    """
+    Runs in the worker process: warm up, then run sessions until told to quit.
+    """
+    import numpy as np
+
+    from . import create_rule
+    from .session import WorkoutSession
+    from .tracker import CONFIG as TRACKER_CONFIG, Tracker, create_pose
+
+    class SessionReporting:
+        """
+        Reports a tracker's progress to the pool and stops on its event.
+        """
+
+        def __init__(self, session_id, *args, **tracker_config):
+            super().__init__(*args, **tracker_config)
+            self.session_id = session_id
+            self.stop_event = stop
+            self.last_progress = None
+            self.frames = 0
+            self.next_latency = 0.0
+
+        def progress(self):
+            rep_state, rep_count = self.rule.decision()
+            records = self.rule.rep_records
+            return {"rep_state": rep_state, "rep_count": rep_count, "form_warning": self.rule.form_warning(),
+                    "rep_metrics": records[-1] if records else None}
+
+        def process(self, frame, t=None, captured_at=None):
+            frame, counted = super().process(frame, t, captured_at)
+            self.frames += 1
+            if self.frames == 1:
+                events.put(("first_frame", worker_id, self.session_id, time.time()))
+            progress = self.progress()
+            if progress != self.last_progress:
+                self.last_progress = progress
+                events.put(("progress", worker_id, self.session_id, progress))
+            if self.latency is not None and time.perf_counter() >= self.next_latency:
+                self.next_latency = time.perf_counter() + config["latency_interval"]
+                self.report_latency()
+            return frame, counted
+
+        def report_latency(self):
+            events.put(("latency", worker_id, self.session_id, self.latency.report()))
+
+    class SessionTracker(SessionReporting, Tracker):
+        pass
+
+    class WorkoutSessionTracker(SessionReporting, WorkoutSession):
+        """
+        A whole workout as one session; its status adds the current set.
+        """
+
+        def progress(self):
+            return {**super().progress(), **WorkoutSession.progress(self)}
+
+    complexity = config["model_complexity"]
+    if complexity is None:
+        complexity = TRACKER_CONFIG["model_complexity"]
+    poses = {}
+    try:
+        # The first process() call builds MediaPipe's graph, so run one blank
+        # frame through the model now rather than on the user's first frame.
+        poses[complexity] = create_pose(complexity)
+        poses[complexity].process(np.zeros((480, 640, 3), dtype=np.uint8))
+    except Exception as exc:
+        events.put(("failed", worker_id, None, repr(exc)))
+        return
+    events.put(("ready", worker_id, None, None))
+
+    while True:
+        command = commands.get()
+        if command is None:
+            break
+        session_id, exercise, session_config = command
+        try:
+            settings = {"model_complexity": complexity, "latency": config["latency"], **session_config}
+            if isinstance(exercise, list):  # a workout's exercises, see TrackerPool.start_workout()
+                tracker = WorkoutSessionTracker(session_id, exercise, poses=poses, **settings)
+            else:
+                tracker = SessionTracker(session_id, create_rule(exercise), poses=poses, **settings)
+            reps = tracker.run()
+            if tracker.latency is not None:
+                tracker.report_latency()
+            events.put(("finished", worker_id, session_id, reps))
+        except Exception as exc:
+            events.put(("failed", worker_id, session_id, repr(exc)))
+
+    for pose in poses.values():
+        pose.close()
+
+
+# === Streams ===
+class SessionStream:
+    """
+    One client's live view of a session. Publishing merges the changed
+    fields into a pending delta and never waits on the reader, so a slow
+    client costs a dict update per change rather than a growing backlog,
+    and it gets a single up-to-date delta when it catches up.
+
+        stream = pool.subscribe(session_id)
+        while not stream.finished:
+            delta = stream.next(timeout=15)   # {} on timeout
+    """
+
+    def __init__(self, snapshot):
+        self.condition = threading.Condition()
+        self.pending = dict(snapshot)
+        self.closed = False
+        self.sequence = 0
+
+    def publish(self, delta, final=False):
+        with self.condition:
+            self.pending.update(delta)
+            self.closed = self.closed or final
+            self.condition.notify()
+
+    def next(self, timeout=None):
+        """
+        Returns the fields changed since the last call, with a "seq" number
+        that increases per delivered delta. Waits up to `timeout` seconds
+        for a change; returns {} if none came.
+        """
+        with self.condition:
+            if not self.pending and not self.closed:
+                self.condition.wait(timeout)
+            delta, self.pending = self.pending, {}
+        if delta:
+            self.sequence += 1
+            delta["seq"] = self.sequence
+        return delta
+
+    @property
+    def finished(self):
+        with self.condition:
+            return self.closed and not self.pending
+
+
+# === Pool ===
+class TrackerPool:
+    """
+    Hands tracking sessions to warm worker processes and keeps per-session
+    status (rep count, state, time to first frame) for the backend to query.
+    Workers are reused across sessions and exercises. An ended session's
+    final status stays available for session_retention seconds.
+    """
+
+    def __init__(self, **config):
+        self.config = {**CONFIG, **config}
+        # spawn, not fork: the parent is a threaded web server and MediaPipe
+        # doesn't survive being forked mid-initialization.
+        self.context = multiprocessing.get_context("spawn")
+        self.events = self.context.Queue()
+        self.workers = {}
+        self.sessions = {}
+        self.streams = {}
+        self.latency_reports = {}
+        self.lock = threading.Lock()
+        self.ready = threading.Condition(self.lock)
+        self.collector = None
+        self.next_worker = 0
+        self.warmup_error = None
+
+    def start(self):
+        self.collector = threading.Thread(target=self.collect, daemon=True)
+        self.collector.start()
+        with self.lock:
+            for _ in range(self.config["workers"]):
+                self.spawn()
+        return self
+
+    def spawn(self):
+        """
+        Starts a worker process. Caller holds the lock.
+        """
+        worker_id = self.next_worker
+        self.next_worker += 1
+        commands = self.context.Queue()
+        stop = self.context.Event()
+        process = self.context.Process(target=worker_main, name=f"tracker-worker-{worker_id}", daemon=True,
+                                       args=(worker_id, commands, self.events, stop, self.config))
+        process.start()
+        self.workers[worker_id] = {"process": process, "commands": commands, "stop": stop,
+                                   "state": "starting", "session": None}
+        return worker_id
+
+    def collect(self):
+        """
+        Collector thread: folds worker events into worker and session state.
+        """
+        interval = self.config["health_interval"]
+        next_check = time.monotonic() + interval
+        while True:
+            try:
+                event = self.events.get(timeout=max(0.0, next_check - time.monotonic()))
+            except queue.Empty:
+                event = ()
+            if event is None:
+                break
+            with self.lock:
+                if event:
+                    self.fold(*event)
+                # On a clock rather than when the queue goes quiet: a busy
+                # worker's progress events would otherwise put it off.
+                if time.monotonic() >= next_check:
+                    self.reap()
+                    self.prune()
+                    next_check = time.monotonic() + interval
+                self.ready.notify_all()
+
+    def fold(self, kind, worker_id, session_id, payload):
+        """
+        Applies one worker event. Caller holds the lock.
+        """
+        worker = self.workers.get(worker_id)
+        session = self.sessions.get(session_id)
+        before = dict(session) if session is not None else None
+        if kind == "ready" and worker is not None:
+            worker["state"] = "idle"
+        elif kind == "first_frame" and session is not None:
+            if session["state"] == "starting":  # not if stopped before its first frame
+                session["state"] = "running"
+            session["time_to_first_frame"] = round(payload - session["started_at"], 3)
+        elif kind == "progress" and session is not None:
+            session.update(payload)
+        elif kind == "latency" and session is not None:
+            # Kept apart from the session status so the report
+            # doesn't ride along on every stream update.
+            self.latency_reports[session_id] = payload
+        elif kind in ("finished", "failed"):
+            if session is not None:
+                if kind == "failed":
+                    session["state"] = "failed"
+                    session["error"] = payload
+                else:
+                    session["state"] = "stopped" if session["state"] == "stopping" else "finished"
+                    session["rep_count"] = payload
+                session["ended_at"] = time.time()
+            if worker is not None:
+                if session_id is None:  # failed while warming up
+                    worker["state"] = "dead"
+                    self.warmup_error = payload
+                else:
+                    worker["state"] = "idle"
+                    worker["session"] = None
+        if session is not None:
+            self.publish(session_id, before, session)
+
+    def reap(self):
+        """
+        Marks workers whose process has exited as dead and fails the session
+        each was running, which would otherwise stay "running" with its
+        streams open. Caller holds the lock.
+        """
+        for worker in self.workers.values():
+            process = worker["process"]
+            if worker["state"] == "dead" or process.is_alive():
+                continue
+            worker["state"] = "dead"
+            session_id, worker["session"] = worker["session"], None
+            session = self.sessions.get(session_id)
+            if session is not None and session["ended_at"] is None:
+                before = dict(session)
+                session["state"] = "failed"
+                session["error"] = f"Tracker worker exited with code {process.exitcode}"
+                session["ended_at"] = time.time()
+                self.publish(session_id, before, session)
+            self.ready.notify_all()
+
+    def prune(self):
+        """
+        Forgets sessions that ended more than session_retention seconds ago,
+        with their latency reports. Their streams were closed when they
+        ended. Caller holds the lock.
+        """
+        cutoff = time.time() - self.config["session_retention"]
+        for session_id in [session_id for session_id, session in self.sessions.items()
+                           if session["ended_at"] is not None and session["ended_at"] < cutoff]:
+            del self.sessions[session_id]
+            self.latency_reports.pop(session_id, None)
+
+    def publish(self, session_id, before, session):
+        """
+        Sends the fields that changed to the session's streams. Caller holds
+        the lock.
+        """
+        delta = {key: value for key, value in session.items() if before.get(key) != value}
+        final = session["ended_at"] is not None
+        if not delta and not final:
+            return
+        for stream in self.streams.get(session_id, ()):
+            stream.publish(delta, final)
+        if final:
+            self.streams.pop(session_id, None)
+
+    def idle_worker(self):
+        for worker_id, worker in self.workers.items():
+            if worker["state"] == "idle" and worker["process"].is_alive():
+                return worker_id
+        return None
+
+    def live_workers(self):
+        return [w for w in self.workers.values() if w["state"] != "dead" and w["process"].is_alive()]
+
+    def start_session(self, exercise, session_id=None, **tracker_config):
+        """
+        Starts tracking `exercise` on an idle worker and returns the session
+        ID. Waits for a worker to finish warming up if none is idle yet;
+        raises RuntimeError when every worker is busy.
+        """
+        if exercise not in EXERCISES:
+            raise KeyError(f"Unknown exercise '{exercise}'. Choose from: {', '.join(sorted(EXERCISES))}")
+        return self.dispatch(exercise, exercise, session_id, tracker_config)
+
+    def start_workout(self, exercises, session_id=None, **tracker_config):
+        """
+        Starts tracking a whole workout ({"name", "sets", "reps"} items, as
+        generated) as one session on one worker, set after set, and returns
+        the session ID. Its status also reports the current set. Raises
+        KeyError for exercises without a tracker, RuntimeError as
+        start_session() does.
+        """
+        sets = workout_sets(exercises)
+        if not sets:
+            raise KeyError("The workout has no exercises to track")
+        return self.dispatch(list(exercises), sets[0]["exercise"], session_id, tracker_config)
+
+    def dispatch(self, command, exercise, session_id, tracker_config):
+        """
+        Hands a session to an idle worker, starting or waiting for one.
+        """
+        session_id = session_id or uuid.uuid4().hex
+        deadline = time.monotonic() + self.config["start_timeout"]
+
+        with self.lock:
+            if session_id in self.sessions and self.sessions[session_id]["state"] in ("starting", "running"):
+                raise RuntimeError(f"Session '{session_id}' is already running")
+            while True:
+                worker_id = self.idle_worker()
+                if worker_id is not None:
+                    break
+                starting = any(w["state"] == "starting" for w in self.live_workers())
+                if not starting and self.warmup_error:
+                    raise RuntimeError(f"Tracker workers failed to start: {self.warmup_error}")
+                if not starting:
+                    if len(self.live_workers()) >= self.config["max_workers"]:
+                        raise RuntimeError("All tracker workers are busy")
+                    self.spawn()
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise RuntimeError("Timed out waiting for a tracker worker")
+                self.ready.wait(remaining)
+
+            worker = self.workers[worker_id]
+            # Cleared here rather than by the worker when the command
+            # arrives, which would lose a stop_session() sent before that.
+            worker["stop"].clear()
+            worker["state"] = "busy"
+            worker["session"] = session_id
+            self.sessions[session_id] = {
+                "session_id": session_id,
+                "exercise": exercise,
+                "worker": worker_id,
+                "state": "starting",
+                "rep_state": None,
+                "rep_count": 0,
+                "form_warning": None,
+                "rep_metrics": None,
+                "started_at": time.time(),
+                "time_to_first_frame": None,
+                "ended_at": None,
+                "error": None
+            }
+            worker["commands"].put((session_id, command, tracker_config))
+
+            # Keep a spare warm so the next click doesn't wait for a cold start.
+            idle = sum(1 for w in self.live_workers() if w["state"] in ("idle", "starting"))
+            if idle < self.config["spare_workers"] and len(self.live_workers()) < self.config["max_workers"]:
+                self.spawn()
+        return session_id
+
+    def subscribe(self, session_id):
+        """
+        Returns a SessionStream that starts with the session's full status,
+        or None for an unknown session. A finished session yields its final
+        status once.
+        """
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                return None
+            stream = SessionStream(session)
+            if session["ended_at"] is not None:
+                stream.publish({}, final=True)
+            else:
+                self.streams.setdefault(session_id, []).append(stream)
+        return stream
+
+    def unsubscribe(self, session_id, stream):
+        with self.lock:
+            streams = self.streams.get(session_id, [])
+            if stream in streams:
+                streams.remove(stream)
+
+    def stop_session(self, session_id):
+        """
+        Stops a running session. Returns False for unknown or finished ones.
+        """
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if session is None or session["state"] not in ("starting", "running"):
+                return False
+            session["state"] = "stopping"
+            self.workers[session["worker"]]["stop"].set()
+        return True
+
+    def status(self, session_id=None):
+        """
+        One session's status, or all sessions plus worker states.
+        """
+        with self.lock:
+            self.reap()
+            if session_id is not None:
+                session = self.sessions.get(session_id)
+                return dict(session) if session else None
+            return {
+                "sessions": [dict(s) for s in self.sessions.values()],
+                "workers": {worker_id: w["state"] for worker_id, w in self.workers.items()}
+            }
+
+    def latency(self, session_id=None):
+        """
+        The latest latency report of one session (None if unknown or not yet
+        reported), or {session_id: report} for every session.
+        """
+        with self.lock:
+            if session_id is not None:
+                return self.latency_reports.get(session_id)
+            return dict(self.latency_reports)
+
+    def shutdown(self, timeout=5):
+        with self.lock:
+            workers = list(self.workers.values())
+        for worker in workers:
+            worker["stop"].set()
+            worker["commands"].put(None)
+        for worker in workers:
+            worker["process"].join(timeout)
+            if worker["process"].is_alive():
+                worker["process"].terminate()
+        self.events.put(None)
+        if self.collector is not None:
+            self.collector.join(timeout)
+        with self.lock:
+            streams = [stream for streams in self.streams.values() for stream in streams]
+            self.streams.clear()
+        for stream in streams:
+            stream.publish({"state": "shutdown"}, final=True)
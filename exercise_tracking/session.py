@@ -0,0 +1,243 @@
+"""
+A whole generated workout in one tracker: every exercise, every set.
+
+    python -m exercise_tracking.session plan.json --workout 2
+    python -m exercise_tracking.session squat=3x10 lunges=2x12 --source clip.mp4 --headless
+
+plan.json is the /generate-plan response, one workout from it, or its
+"exercises" list. Inline sets are exercise=SETSxREPS (registry names).
+
+The camera stays open and the pose model loaded for the whole session.
+Every exercise's rule is built before the first frame, so when a set's
+reps are done the next set starts on the very next frame: the tracker's
+rule is swapped for the next one (reset), which is a few attribute
+assignments, not an import, a model load or a new window. With
+rest_seconds set, the frames in between are shown with a countdown and
+not scored.
+
+The session runs the sequential Tracker loop; pipelined and
+multi-process tracking keep the rule in other threads or processes and
+are not supported here.
+"""
+import argparse
+import json
+import sys
+import time
+
+import cv2
+
+from . import EXERCISES, create_rule, workout_sets
+from .tracker import Tracker
+
+# === CONFIGURATION ===
+CONFIG = {
+    "rest_seconds": 0.0  # untracked rest between sets, shown as a countdown
+}
+
+PROGRESS_COLOR = (255, 200, 0)
+
+
+class WorkoutSession(Tracker):
+    """
+    Tracker that works through a workout's sets in order and stops after
+    the last one. `completed` holds one record per set:
+
+        {"exercise": "squat", "name": "Squats", "set": 1, "sets": 3,
+         "reps": 10, "rep_count": 10, "seconds": 41.2, "complete": True,
+         "rep_metrics": [...]}
+
+    with the rule's tempo and range record of each rep (see metrics.py).
+
+    run() returns the total rep count; `switch_seconds` has the time each
+    rule swap took.
+    """
+
+    def __init__(self, exercises, source=None, poses=None, **config):
+        self.workout_config = {**CONFIG, **{key: config.pop(key) for key in CONFIG if key in config}}
+        self.sets = workout_sets(exercises)
+        if not self.sets:
+            raise ValueError("The workout has no sets to track")
+        # One rule per exercise, built up front; sets of the same exercise
+        # reuse it after a reset().
+        self.rules = {}
+        for item in self.sets:
+            if item["exercise"] not in self.rules:
+                self.rules[item["exercise"]] = create_rule(item["exercise"])
+        super().__init__(self.rules[self.sets[0]["exercise"]], source, poses, **config)
+        self.window_title = "Workout Tracker"
+        self.index = 0
+        self.completed = []
+        self.set_started = None
+        self.rest_until = None
+        self.switch_seconds = []
+
+    @property
+    def current(self):
+        return self.sets[self.index]
+
+    def evaluate(self, points, h, w, t=None, captured_at=None):
+        # The session's own clock: during a rest the rule isn't stepped, and
+        # its time was cleared by reset().
+        now = self.t = time.perf_counter() if t is None else t
+        if self.rest_until is not None:
+            if now < self.rest_until:
+                return False
+            # Predicted frames may have stepped the rule during the rest.
+            self.rest_until = None
+            self.rule.reset()
+            self.set_started = None
+        if self.set_started is None:
+            self.set_started = now
+        counted = super().evaluate(points, h, w, now, captured_at)
+        if counted and self.rule.rep_count >= self.current["reps"]:
+            self.finish_set(self.rule.t)
+        return counted
+
+    def finish_set(self, t, complete=True):
+        """
+        Records the current set and moves on to the next one, or stops the
+        session after the last.
+        """
+        start = time.perf_counter()
+        record = {**self.current, "rep_count": self.rule.rep_count,
+                  "seconds": round(float(t - self.set_started), 3) if self.set_started is not None else 0.0,
+                  "complete": complete, "rep_metrics": list(self.rule.rep_records)}
+        self.completed.append(record)
+        if self.events is not None:
+            self.events.emit("set", t, set=record["set"], sets=record["sets"], reps=record["reps"],
+                             rep_count=record["rep_count"], seconds=record["seconds"])
+        self.index += 1
+        if self.index == len(self.sets):
+            self.stop()
+            return
+        rule = self.rules[self.current["exercise"]]
+        rule.reset()
+        self.switch(rule, t)
+        self.set_started = None
+        if self.workout_config["rest_seconds"] > 0:
+            self.rest_until = t + self.workout_config["rest_seconds"]
+        self.switch_seconds.append(time.perf_counter() - start)
+
+    def switch(self, rule, t):
+        """
+        Points everything that follows the tracker's rule at `rule`.
+        """
+        self.rule = rule
+        if self.decimator is not None:
+            self.decimator.rule = rule
+        if self.events is not None:
+            self.events.rule = rule
+            self.events.state = rule.rep_state
+            self.events.warning = None
+            self.events.last_rep = t
+
+    def progress(self):
+        """
+        Where the session is: the current set and how many are done.
+        """
+        item = self.current if self.index < len(self.sets) else self.completed[-1]
+        return {"exercise": item["exercise"], "set": item["set"], "sets": item["sets"],
+                "target_reps": item["reps"], "resting": self.rest_until is not None,
+                "completed_sets": len(self.completed), "total_sets": len(self.sets)}
+
+    def progress_label(self):
+        if self.index == len(self.sets):
+            return "Workout complete"
+        item = self.current
+        label = f"{item['name']} set {item['set']}/{item['sets']}: {self.rule.rep_count}/{item['reps']} reps"
+        if self.rest_until is not None and self.t is not None:
+            label = f"Rest {max(0.0, self.rest_until - self.t):.0f} s - next: {label}"
+        return label
+
+    def render(self, frame, results, points, labels=None):
+        frame = super().render(frame, results, points, labels)
+        if not self.config["headless"]:
+            cv2.putText(frame, self.progress_label(), (30, frame.shape[0] - 50),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, PROGRESS_COLOR, 2)
+        return frame
+
+    def run(self):
+        super().run()
+        if self.index < len(self.sets) and self.rule.rep_count:
+            self.finish_set(self.rule.t, complete=False)  # stopped mid-set
+        return sum(record["rep_count"] for record in self.completed)
+
+
+# === Command Line ===
+def parse_plan(items, workout_id=None):
+    """
+    Reads the CLI's plan arguments: one JSON file or exercise=SETSxREPS items.
+    Returns the exercise list.
+    """
+    if len(items) == 1 and items[0].endswith(".json"):
+        with open(items[0]) as f:
+            plan = json.load(f)
+        if isinstance(plan, dict) and "workouts" in plan:
+            plan = plan["workouts"]
+        if isinstance(plan, list) and plan and "exercises" in plan[0]:
+            if workout_id is None:
+                plan = plan[0]
+            else:
+                matches = [workout for workout in plan if workout.get("id") == workout_id]
+                if not matches:
+                    raise SystemExit(f"No workout with id {workout_id} in {items[0]}")
+                plan = matches[0]
+        return plan["exercises"] if isinstance(plan, dict) else plan
+
+    exercises = []
+    for item in items:
+        name, _, scheme = item.partition("=")
+        sets, _, reps = scheme.partition("x")
+        if not (sets.isdigit() and reps.isdigit()):
+            raise SystemExit(f"Expected exercise=SETSxREPS, got {item!r}")
+        exercises.append({"name": name, "sets": int(sets), "reps": int(reps)})
+    return exercises
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m exercise_tracking.session",
+                                     description="Track a whole workout, set by set, in one session.")
+    parser.add_argument("plan", nargs="+",
+                        help="a workout JSON file, or exercise=SETSxREPS items "
+                             f"(exercises: {', '.join(sorted(EXERCISES))})")
+    parser.add_argument("--workout", type=int, default=None, metavar="ID",
+                        help="which workout of a /generate-plan response to run (default: the first)")
+    parser.add_argument("--source", default=None,
+                        help="camera index or video file (default: camera 0)")
+    parser.add_argument("--rest", type=float, default=CONFIG["rest_seconds"], metavar="SECONDS",
+                        help="untracked rest between sets")
+    parser.add_argument("--headless", action="store_true",
+                        help="no drawing or window; emit JSON-line events (on stdout unless --events is given)")
+    parser.add_argument("--events", metavar="TARGET", default=None,
+                        help="write JSON-line events to '-' (stdout), host:port or a Unix socket path")
+    parser.add_argument("--speak-corrections", action="store_true",
+                        help="read form corrections aloud as well as showing them (needs pyttsx3)")
+    args = parser.parse_args(argv)
+
+    source = args.source
+    if source is not None and source.isdigit():
+        source = int(source)
+    events = args.events
+    if args.headless and events is None:
+        events = "-"
+
+    try:
+        session = WorkoutSession(parse_plan(args.plan, args.workout), source=source, rest_seconds=args.rest,
+                                 headless=args.headless, events=events,
+                                 speak_corrections=args.speak_corrections)
+    except KeyError as exc:
+        parser.error(exc.args[0])
+    total = session.run()
+
+    out = sys.stderr if events == "-" else sys.stdout  # keep stdout clean for the event stream
+    for record in session.completed:
+        status = "" if record["complete"] else " (stopped)"
+        print(f"{record['name']} set {record['set']}/{record['sets']}: "
+              f"{record['rep_count']}/{record['reps']} reps in {record['seconds']:.1f} s{status}", file=out)
+    switch = max(session.switch_seconds, default=0.0)
+    print(f"{len(session.completed)}/{len(session.sets)} sets, {total} reps; "
+          f"slowest exercise switch {switch * 1e6:.0f} us", file=out)
+
+
+if __name__ == "__main__":
+    main()
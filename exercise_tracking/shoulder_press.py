@@ -1,101 +1,56 @@
-import cv2
-import mediapipe as mp
-import math
-import pygame
-
-pygame.mixer.init()
-sound = pygame.mixer.Sound("exercise_tracking/sfx_point.mp3")  # Use WAV for better compatibility if possible
-
+from .geometry import Features, all_visible
+from .metrics import RepMetrics
+from .rules import ExerciseRule, LABEL_COLOR, WARNING_COLOR
 
 # === CONFIGURATION ===
 CONFIG = {
     "show_labels": True,
     "min_visibility": 0.5,
     "show_reps": True,
-    "wrist_alignment_tolerance": 10,   # wrists must be within 10 pixels of each other
-    "shoulder_press_margin": 105,      # how much higher the wrist must go to count as 'pressed'
+    "wrist_alignment_tolerance": 0.08, # wrists must be within this many body-scale units of each other (10 px at a 130 px torso)
+    "shoulder_press_margin": 0.81,     # how much higher the wrist must go to count as 'pressed' (105 px)
     "max_arm_angle": 120               # max angle allowed when arms are extended (in degrees)
 }
 
-# === Setup Pose Detection ===
-mp_pose = mp.solutions.pose
-mp_drawing = mp.solutions.drawing_utils
-pose = mp_pose.Pose(static_image_mode=False, model_complexity=2)
-
-# === Landmark indices ===
-KEYPOINTS = {
-    "LEFT_SHOULDER": 11,
-    "RIGHT_SHOULDER": 12,
-    "LEFT_WRIST": 15,
-    "RIGHT_WRIST": 16
-}
-
-rep_count = 0
-rep_state = "WAITING_DOWN"
-hit_bottom = False
-
-# === Utility Functions ===
-def get_y(lm, h):
-    return lm.y * h
-
-def get_x(lm, w):
-    return lm.x * w
-
-def visible(lm):
-    return lm.visibility >= CONFIG["min_visibility"]
-
-def average_y(lm1, lm2, h):
-    return (get_y(lm1, h) + get_y(lm2, h)) / 2
-
-def calc_angle(a, b, c):
-    """
-    Returns angle ABC in degrees
-    """
-    ba = (a[0] - b[0], a[1] - b[1])
-    bc = (c[0] - b[0], c[1] - b[1])
-    dot_product = ba[0]*bc[0] + ba[1]*bc[1]
-    magnitude_ba = math.sqrt(ba[0]**2 + ba[1]**2)
-    magnitude_bc = math.sqrt(bc[0]**2 + bc[1]**2)
-    if magnitude_ba * magnitude_bc == 0:
-        return 0
-    angle = math.acos(dot_product / (magnitude_ba * magnitude_bc))
-    return math.degrees(angle)
+# === Landmarks and derived features ===
+FEATURES = Features(
+    angles={
+        "left_angle": ("RIGHT_SHOULDER", "LEFT_SHOULDER", "LEFT_WRIST"),
+        "right_angle": ("LEFT_SHOULDER", "RIGHT_SHOULDER", "RIGHT_WRIST")
+    },
+    midpoints={"wrist": ("LEFT_WRIST", "RIGHT_WRIST"), "shoulder": ("LEFT_SHOULDER", "RIGHT_SHOULDER")},
+    points=["LEFT_WRIST", "RIGHT_WRIST"],
+    visible=["LEFT_SHOULDER", "RIGHT_SHOULDER", "LEFT_WRIST", "RIGHT_WRIST"],
+    scale=True
+)
+METRICS = RepMetrics(signal=("left_angle", "right_angle"), sides=("left_angle", "right_angle"),
+                     path="wrist")  # counted at the top: the lowering comes first
 
 # === Shoulder Press Detection ===
-def detect_shoulder_press_status(landmarks, h, w):
-    required = ["LEFT_SHOULDER", "RIGHT_SHOULDER", "LEFT_WRIST", "RIGHT_WRIST"]
+def detect_shoulder_press_status(f, config=CONFIG):
     # error prevention when calculating angles :3
-    if not all(visible(landmarks[KEYPOINTS[k]]) for k in required):
-        return {"at_shoulder": False, 
-                "pressed": False, 
-                "wrists_aligned": True, 
+    if not all_visible(f):
+        return {"at_shoulder": False,
+                "pressed": False,
+                "wrists_aligned": True,
                 "correct_form": True,
                 "avg_angle": 0
                 }
 
     # Wrist alignment check
-    left_wrist_y = get_y(landmarks[KEYPOINTS["LEFT_WRIST"]], h)
-    right_wrist_y = get_y(landmarks[KEYPOINTS["RIGHT_WRIST"]], h)
-    wrists_aligned = abs(left_wrist_y - right_wrist_y) <= CONFIG["wrist_alignment_tolerance"]
+    scale = f["body_scale"]
+    wrists_aligned = abs(f["LEFT_WRIST_y"] - f["RIGHT_WRIST_y"]) <= config["wrist_alignment_tolerance"] * scale
 
-    # Shoulder and wrist positions
-    left_shoulder = (get_x(landmarks[KEYPOINTS["LEFT_SHOULDER"]], w), get_y(landmarks[KEYPOINTS["LEFT_SHOULDER"]], h))
-    right_shoulder = (get_x(landmarks[KEYPOINTS["RIGHT_SHOULDER"]], w), get_y(landmarks[KEYPOINTS["RIGHT_SHOULDER"]], h))
-    left_wrist = (get_x(landmarks[KEYPOINTS["LEFT_WRIST"]], w), get_y(landmarks[KEYPOINTS["LEFT_WRIST"]], h))
-    right_wrist = (get_x(landmarks[KEYPOINTS["RIGHT_WRIST"]], w), get_y(landmarks[KEYPOINTS["RIGHT_WRIST"]], h))
+    shoulder_y = f["shoulder_y"]
+    wrist_y = f["wrist_y"]
 
-    shoulder_y = average_y(landmarks[KEYPOINTS["LEFT_SHOULDER"]], landmarks[KEYPOINTS["RIGHT_SHOULDER"]], h)
-    wrist_y = average_y(landmarks[KEYPOINTS["LEFT_WRIST"]], landmarks[KEYPOINTS["RIGHT_WRIST"]], h)
-
-    at_shoulder = abs(wrist_y - shoulder_y) < 40
-    pressed = wrist_y < shoulder_y - CONFIG["shoulder_press_margin"]
+    at_shoulder = abs(wrist_y - shoulder_y) < 0.31 * scale
+    pressed = wrist_y < shoulder_y - config["shoulder_press_margin"] * scale
 
     # Compute angles
-    left_angle = calc_angle(right_shoulder, left_shoulder, left_wrist)
-    right_angle = calc_angle(left_shoulder, right_shoulder, right_wrist)
-    avg_angle = (left_angle + right_angle) / 2
+    avg_angle = (f["left_angle"] + f["right_angle"]) / 2
 
-    correct_form = avg_angle <= CONFIG["max_arm_angle"]
+    correct_form = avg_angle <= config["max_arm_angle"]
 
     return {
         "at_shoulder": at_shoulder,
@@ -105,73 +60,64 @@ def detect_shoulder_press_status(landmarks, h, w):
         "avg_angle": avg_angle
     }
 
-# === Webcam Setup ===
-cap = cv2.VideoCapture(0)
-
-while cap.isOpened():
-    ret, frame = cap.read()
-    if not ret:
-        break
-
-    frame = cv2.flip(frame, 1)
-    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    results = pose.process(rgb)
+# === Shoulder Press Rule ===
+class ShoulderPressRule(ExerciseRule):
+    name = "Shoulder Press"
+    window_title = "Shoulder Press Tracker"
+    initial_state = "WAITING_DOWN"
+    CONFIG = CONFIG
+    features = FEATURES
+    metrics = METRICS
 
-    if results.pose_landmarks:
-        h, w, _ = frame.shape
-        landmarks = results.pose_landmarks.landmark
+    def reset(self):
+        super().reset()
+        self.hit_bottom = False
+        self.phase = None
 
-        phase = detect_shoulder_press_status(landmarks, h, w)
+    def step(self, f):
+        phase = self.phase = self.debounce(detect_shoulder_press_status(f, self.config))
 
         # === State Machine ===
-        if rep_state == "WAITING_DOWN":
+        if self.rep_state == "WAITING_DOWN":
             if phase["at_shoulder"]:
-                hit_bottom = True
-                rep_state = "WAITING_UP"
-        elif rep_state == "WAITING_UP":
-            if hit_bottom and phase["pressed"] and phase["wrists_aligned"]:
-                if phase["correct_form"]:
-                    rep_count += 1
-                    rep_state = "WAITING_DOWN"
-                    sound.play()
+                self.hit_bottom = True
+                self.rep_state = "WAITING_UP"
+        elif self.rep_state == "WAITING_UP":
+            if self.hit_bottom and phase["pressed"] and phase["wrists_aligned"]:
+                counted = phase["correct_form"]
+                if counted:
+                    self.rep_count += 1
+                    self.rep_state = "WAITING_DOWN"
                 else:
-                    rep_state = "INCORRECT FORM!"
-                hit_bottom = False
-        elif rep_state == "INCORRECT FORM!":
+                    self.rep_state = "INCORRECT FORM!"
+                self.hit_bottom = False
+                return counted
+        elif self.rep_state == "INCORRECT FORM!":
             if phase["pressed"] and phase["wrists_aligned"] and phase["correct_form"]:
-                    rep_count += 1
-                    rep_state = "WAITING_DOWN"
+                self.rep_count += 1
+                self.rep_state = "WAITING_DOWN"
+                return True
             elif phase["at_shoulder"]:
-                hit_bottom = True
-                rep_state = "WAITING_UP"
-
-        # === Draw Landmarks ===
-        mp_drawing.draw_landmarks(
-            frame,
-            results.pose_landmarks,
-            mp_pose.POSE_CONNECTIONS,
-            mp_drawing.DrawingSpec(color=(0, 0, 255), thickness=2, circle_radius=4),
-            mp_drawing.DrawingSpec(color=(255, 255, 255), thickness=3)
-        )
-
-        # === Display Info ===
-        if CONFIG["show_labels"]:
-            label_color = (0, 0, 255) if rep_state == "INCORRECT FORM!" else (0, 255, 255)
-            label = f"Shoulder Press: {rep_state} | Angle: {int(phase['avg_angle'])}°"
-            correct_label = "Make sure your Arms are DIRECTLY extended up, not outwards!"
-            cv2.putText(frame, label, (30, 40),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, label_color, 2)
-            if not phase["correct_form"] and rep_state == "INCORRECT FORM!":
-                cv2.putText(frame, correct_label, (30, 110), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
-
-        if CONFIG["show_reps"]:
-            cv2.putText(frame, f"Shoulder Press Reps: {rep_count}", (30, 80),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 100), 2)
-
-    cv2.imshow("Shoulder Press Tracker", frame)
-    if cv2.waitKey(5) & 0xFF == ord('q'):
-        break
-
-cap.release()
-cv2.destroyAllWindows()
-pose.close()
+                self.hit_bottom = True
+                self.rep_state = "WAITING_UP"
+        return False
+
+    def state_labels(self):
+        phase = self.phase
+        label_color = WARNING_COLOR if self.rep_state == "INCORRECT FORM!" else LABEL_COLOR
+        label = f"Shoulder Press: {self.rep_state} | Angle: {int(phase['avg_angle'])}°"
+        overlays = [(label, (30, 40), 0.7, label_color)]
+        correct_label = self.form_warning()
+        if correct_label:
+            overlays.append((correct_label, (30, 110), 0.6, WARNING_COLOR))
+        return overlays
+
+    def form_warning(self):
+        if self.phase and not self.phase["correct_form"] and self.rep_state == "INCORRECT FORM!":
+            return "Make sure your Arms are DIRECTLY extended up, not outwards!"
+        return None
+
+
+if __name__ == "__main__":
+    from .tracker import run
+    run(ShoulderPressRule())
@@ -0,0 +1,100 @@
+import math
+
+import numpy as np
+
+from .geometry import LANDMARKS, NUM_LANDMARKS
+
+# === CONFIGURATION ===
+CONFIG = {
+    "min_cutoff": 1.5,    # Hz; lower smooths a still joint harder
+    "beta": 10.0,         # cutoff added per unit/s of joint speed; higher follows fast moves closer
+    "d_cutoff": 1.0,      # Hz; smoothing of the speed estimate itself
+    "max_gap": 0.5,       # seconds without landmarks after which the filter starts over
+    # Per-landmark (min_cutoff, beta). Hands and feet move fastest and
+    # carry the least weight in the rules, so they favour responsiveness;
+    # the face barely matters to any exercise and is smoothed hardest.
+    "overrides": {
+        ("LEFT_WRIST", "RIGHT_WRIST", "LEFT_PINKY", "RIGHT_PINKY", "LEFT_INDEX", "RIGHT_INDEX",
+         "LEFT_THUMB", "RIGHT_THUMB"): (2.0, 20.0),
+        ("LEFT_ANKLE", "RIGHT_ANKLE", "LEFT_HEEL", "RIGHT_HEEL", "LEFT_FOOT_INDEX", "RIGHT_FOOT_INDEX"): (1.5, 15.0),
+        ("NOSE", "LEFT_EYE_INNER", "LEFT_EYE", "LEFT_EYE_OUTER", "RIGHT_EYE_INNER", "RIGHT_EYE",
+         "RIGHT_EYE_OUTER", "LEFT_EAR", "RIGHT_EAR", "MOUTH_LEFT", "MOUTH_RIGHT"): (0.8, 5.0)
+    }
+}
+
+
+class LandmarkSmoother:
+    """
+    One Euro filter (Casiez et al., CHI 2012) on the x, y and z of all 33
+    landmarks at once: a low-pass filter whose cutoff rises with the joint's
+    speed, so a still joint stops jittering while a moving one isn't
+    dragged behind. Cutoffs are in Hz and every step uses the real time
+    since the previous frame, so the smoothing is the same at any frame
+    rate. Visibility passes through untouched.
+
+    Works in place on preallocated buffers; a frame costs a few dozen
+    vectorized operations on (33, 3) arrays.
+    """
+
+    def __init__(self, **config):
+        self.config = {**CONFIG, **config}
+        min_cutoff = np.full(NUM_LANDMARKS, self.config["min_cutoff"], dtype=np.float64)
+        beta = np.full(NUM_LANDMARKS, self.config["beta"], dtype=np.float64)
+        for names, (cutoff, slope) in self.config["overrides"].items():
+            idx = [LANDMARKS[name] for name in names]
+            min_cutoff[idx] = cutoff
+            beta[idx] = slope
+        self.min_cutoff = min_cutoff[:, None]
+        self.beta = beta[:, None]
+        self.value = np.zeros((NUM_LANDMARKS, 3))
+        self.speed = np.zeros((NUM_LANDMARKS, 3))
+        self.scratch = np.zeros((NUM_LANDMARKS, 3))
+        self.cutoff = np.zeros((NUM_LANDMARKS, 3))
+        self.denominator = np.zeros((NUM_LANDMARKS, 3))
+        self.t = None
+
+    def reset(self):
+        self.t = None
+
+    def __call__(self, t, points):
+        """
+        Smooths the (33, 4) landmarks of the frame at time t in place and
+        returns them. None (no pose) passes through and resets the filter.
+        """
+        if points is None:
+            self.reset()
+            return None
+        raw = points[:, :3]
+        dt = None if self.t is None else t - self.t
+        if dt is None or dt <= 0 or dt > self.config["max_gap"]:
+            self.value[:] = raw
+            self.speed[:] = 0.0
+            self.t = t
+            return points
+        self.t = t
+
+        # Speed estimate, itself low-passed at d_cutoff.
+        speed, change, cutoff = self.speed, self.scratch, self.cutoff
+        np.subtract(raw, self.value, out=change)
+        a = smoothing_factor(self.config["d_cutoff"], dt)
+        speed *= 1.0 - a
+        np.multiply(change, a / dt, out=cutoff)
+        speed += cutoff
+
+        # alpha = 1 / (1 + tau / dt) with tau = 1 / (2 pi cutoff)
+        np.abs(speed, out=cutoff)
+        cutoff *= self.beta
+        cutoff += self.min_cutoff
+        cutoff *= 2 * math.pi * dt
+        np.add(cutoff, 1.0, out=self.denominator)
+        np.divide(cutoff, self.denominator, out=cutoff)
+
+        change *= cutoff
+        self.value += change
+        points[:, :3] = self.value
+        return points
+
+
+def smoothing_factor(cutoff, dt):
+    r = 2 * math.pi * cutoff * dt
+    return r / (r + 1.0)
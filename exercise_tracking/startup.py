@@ -0,0 +1,133 @@
+"""
+Startup-time benchmark for the trackers.
+
+    python -m exercise_tracking.startup                    # every exercise, camera 0
+    python -m exercise_tracking.startup squat --source clip.mp4 --runs 3
+
+Each run happens in a fresh interpreter so import costs are real. Reported
+per exercise, in milliseconds since the interpreter was launched:
+  rule_import      exercise module imported (numpy + the rule)
+  tracker_import   tracker imported (cv2)
+  first_frame      camera opened and the first frame shown
+  model_ready      pose model loaded (on the loader thread, overlapping the camera)
+  first_tracked    first frame run through pose inference
+and model_load, the time the loader thread spent building the model.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from . import EXERCISES
+
+STEPS = ["rule_import", "tracker_import", "first_frame", "model_ready", "first_tracked", "model_load"]
+
+
+def measure(exercise, source, launched, **tracker_config):
+    """
+    Runs in the child interpreter. Returns {step: milliseconds}.
+    """
+    since = lambda: round((time.time() - launched) * 1000, 1)
+    timings = {}
+
+    from . import create_rule
+    rule = create_rule(exercise)
+    timings["rule_import"] = since()
+
+    import cv2
+    from .tracker import Tracker
+    timings["tracker_import"] = since()
+
+    tracker = Tracker(rule, source=source, play_sound=False, **tracker_config)
+    tracker.live = True  # treat a video file like a camera: show frames while the model loads
+    tracker.cap = cv2.VideoCapture(tracker.source)
+    frame = None
+    try:
+        while tracker.cap.isOpened():
+            ret, captured = tracker.cap.read()
+            if not ret:
+                if frame is None:
+                    break
+                captured = frame  # short clip: keep feeding the last frame
+            frame = captured
+            tracked = tracker.pose_ready()
+            if tracked and "model_ready" not in timings:
+                timings["model_ready"] = since()
+            tracker.show(tracker.process(frame.copy())[0])
+            if "first_frame" not in timings:
+                timings["first_frame"] = since()
+            if tracked:
+                timings["first_tracked"] = since()
+                break
+    finally:
+        tracker.close()
+    if "model_load" in tracker.timings:
+        timings["model_load"] = round(tracker.timings["model_load"] * 1000, 1)
+    return timings
+
+
+def run_child(exercise, source, window, model_complexity):
+    command = [sys.executable, "-m", "exercise_tracking.startup", exercise, "--child", "--launched", repr(time.time()),
+               "--model-complexity", str(model_complexity)]
+    if source is not None:
+        command += ["--source", str(source)]
+    if window:
+        command.append("--window")
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run(command, cwd=repo_root, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m exercise_tracking.startup",
+                                     description="Measure tracker startup time per exercise.")
+    parser.add_argument("exercises", nargs="*", metavar="exercise",
+                        help="exercises to measure (default: all)")
+    parser.add_argument("--source", default=None, help="camera index or video file (default: camera 0)")
+    parser.add_argument("--runs", type=int, default=1, help="runs per exercise; the median is reported")
+    parser.add_argument("--model-complexity", type=int, default=None, choices=(0, 1, 2))
+    parser.add_argument("--window", action="store_true", help="show frames in a window while measuring")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--launched", type=float, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    unknown = sorted(set(args.exercises) - set(EXERCISES))
+    if unknown:
+        parser.error(f"unknown exercise(s): {', '.join(unknown)}")
+    source = args.source
+    if source is not None and source.isdigit():
+        source = int(source)
+
+    if args.child:
+        config = {"show_window": args.window}
+        if args.model_complexity is not None:
+            config["model_complexity"] = args.model_complexity
+        print(json.dumps(measure(args.exercises[0], source, args.launched, **config)))
+        return 0
+
+    if args.model_complexity is None:
+        from .tracker import CONFIG as TRACKER_CONFIG
+        args.model_complexity = TRACKER_CONFIG["model_complexity"]
+
+    results = {}
+    for exercise in args.exercises or sorted(EXERCISES):
+        runs = [run_child(exercise, source, args.window, args.model_complexity) for _ in range(args.runs)]
+        results[exercise] = {step: statistics.median(run[step] for run in runs)
+                             for step in STEPS if all(step in run for run in runs)}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    print(f"{'exercise':<18}" + "".join(f"{step:>16}" for step in STEPS) + "   (ms)")
+    for exercise, timings in results.items():
+        print(f"{exercise:<18}" + "".join(f"{timings[step]:>16.1f}" if step in timings else f"{'-':>16}"
+                                          for step in STEPS))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+import os
+
+import numpy as np
+
+from .geometry import NUM_LANDMARKS
+
+# === Trace File Layout ===
+# A 64-byte header followed by fixed-size little-endian records, one per
+# captured frame, so a trace can be np.memmap'ed straight into arrays:
+#   t          float64  capture time in seconds (monotonic clock)
+#   present    uint32   1 if a pose was detected in the frame, else 0
+#   landmarks  float32  (33, 4) normalized x, y, z, visibility
+MAGIC = b"WIOTRACE"
+VERSION = 1
+
+HEADER = np.dtype([
+    ("magic", "S8"),
+    ("version", "<u4"),
+    ("height", "<u4"),
+    ("width", "<u4"),
+    ("reserved", "<u4", (11,))
+])
+
+RECORD = np.dtype([
+    ("t", "<f8"),
+    ("present", "<u4"),
+    ("landmarks", "<f4", (NUM_LANDMARKS, 4))
+])
+
+EMPTY_LANDMARKS = np.zeros((NUM_LANDMARKS, 4), dtype=np.float32)
+
+
+class TraceWriter:
+    """
+    Appends per-frame landmarks to a trace file. Frames without a detected
+    pose are still recorded (present=0) so replay timing matches the session.
+    """
+
+    def __init__(self, path, h, w):
+        self.path = path
+        self.file = open(path, "wb")
+        header = np.zeros((), dtype=HEADER)
+        header["magic"] = MAGIC
+        header["version"] = VERSION
+        header["height"] = h
+        header["width"] = w
+        self.file.write(header.tobytes())
+        self.record = np.zeros((), dtype=RECORD)
+        self.frames = 0
+
+    def write(self, t, points):
+        self.record["t"] = t
+        self.record["present"] = points is not None
+        self.record["landmarks"] = EMPTY_LANDMARKS if points is None else points
+        self.file.write(self.record.tobytes())
+        self.frames += 1
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Trace:
+    """
+    A memory-mapped trace. `records` is the structured array; the properties
+    are zero-copy views into it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        header = np.fromfile(path, dtype=HEADER, count=1)
+        if len(header) == 0 or header["magic"][0] != MAGIC:
+            raise ValueError(f"{path} is not a landmark trace")
+        if header["version"][0] != VERSION:
+            raise ValueError(f"{path}: unsupported trace version {header['version'][0]}")
+        self.h = int(header["height"][0])
+        self.w = int(header["width"][0])
+
+        # A session that crashed mid-write may leave a partial last record.
+        count = (os.path.getsize(path) - HEADER.itemsize) // RECORD.itemsize
+        if count > 0:
+            self.records = np.memmap(path, dtype=RECORD, mode="r", offset=HEADER.itemsize, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=RECORD)
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def timestamps(self):
+        return self.records["t"]
+
+    @property
+    def present(self):
+        return self.records["present"].astype(bool)
+
+    @property
+    def landmarks(self):
+        return self.records["landmarks"]
+
+    @property
+    def duration(self):
+        return float(self.timestamps[-1] - self.timestamps[0]) if len(self) > 1 else 0.0
+
+
+def read_trace(path):
+    return Trace(path)
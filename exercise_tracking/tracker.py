@@ -0,0 +1,507 @@
+import math
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'  # Only show errors, no warnings or info
+
+# === CONFIGURATION ===
+CONFIG = {
+    "camera_index": 0,
+    "model_complexity": 2,
+    "mirror": True,        # mirror the landmarks and the window, so the window acts like a mirror
+    "show_window": True,
+    "play_sound": True,    # rep sound (see feedback.py)
+    "speak_corrections": False,  # read form corrections aloud (needs pyttsx3)
+    "quit_key": "q",
+    "pipelined": False,    # run capture / inference / rules / render as separate stages
+    "queue_size": 1,       # frames buffered between pipeline stages (latest frame wins)
+    "processes": 0,        # >0: capture, this many inference processes and the rules in separate processes
+    "target_fps": None,    # set to let the governor trade model complexity for speed
+    "roi": False,          # crop inference to the athlete once they've been found
+    "decimate": 1,         # run pose inference on one frame in N, predicting the rest
+    "smooth": False,       # One Euro filter the landmarks before the rule sees them
+    "record_trace": None,  # path to write a landmark trace for later replay
+    "headless": False,     # no drawing and no window, e.g. on servers
+    "events": None,        # "-" for JSON-line events on stdout, "host:port" / socket path, or a callable
+    "latency": False,      # time every stage of every frame (see latency.py)
+    "latency_overlay": False,  # draw the latency percentiles on the frame (implies latency)
+    "latency_report": None     # path to write the latency report to at exit (implies latency)
+}
+
+from .events import EventEmitter, open_sink
+from .feedback import AudioBackend, Feedback, NullBackend
+from .geometry import VISIBILITY, landmarks_to_array
+from .governor import ComplexityGovernor, start_level
+from .latency import LatencyMonitor
+from .predict import Decimator
+from .roi import RegionOfInterest
+from .smoothing import LandmarkSmoother
+
+FILE_FPS = 30.0  # for video files that don't report a frame rate
+
+# MediaPipe takes longer to import than the camera takes to open, so it is
+# imported on first use (normally on the tracker's loader thread).
+mp_pose = None
+mp_drawing = None
+LANDMARK_SPEC = None
+CONNECTION_SPEC = None
+mediapipe_lock = threading.Lock()
+
+
+def load_mediapipe():
+    global mp_pose, mp_drawing, LANDMARK_SPEC, CONNECTION_SPEC
+    with mediapipe_lock:
+        if mp_pose is None:
+            import mediapipe as mp
+            mp_drawing = mp.solutions.drawing_utils
+            LANDMARK_SPEC = mp_drawing.DrawingSpec(color=(0, 0, 255), thickness=2, circle_radius=4)
+            CONNECTION_SPEC = mp_drawing.DrawingSpec(color=(255, 255, 255), thickness=3)
+            mp_pose = mp.solutions.pose
+
+
+def create_pose(model_complexity, static_image_mode=False):
+    load_mediapipe()
+    return mp_pose.Pose(static_image_mode=static_image_mode, model_complexity=model_complexity)
+
+
+# === Drawing ===
+def draw_skeleton(frame, results, points, rule, h, w):
+    if rule.skeleton_style == "styled":
+        draw_styled_skeleton(frame, points, rule, h, w)
+    elif results is None:
+        draw_point_skeleton(frame, points, rule, h, w)
+    else:
+        mp_drawing.draw_landmarks(frame, results.pose_landmarks, mp_pose.POSE_CONNECTIONS,
+                                  LANDMARK_SPEC, CONNECTION_SPEC)
+
+def draw_point_skeleton(frame, points, rule, h, w):
+    """
+    The MediaPipe-style skeleton drawn straight from a landmark array, for
+    frames that have no pose results (e.g. predicted ones).
+    """
+    visible = points[:, VISIBILITY] >= rule.config["min_visibility"]
+    pixels = [(int(x * w), int(y * h)) for x, y in points[:, :2].tolist()]
+    for start_idx, end_idx in mp_pose.POSE_CONNECTIONS:
+        if visible[start_idx] and visible[end_idx]:
+            cv2.line(frame, pixels[start_idx], pixels[end_idx], CONNECTION_SPEC.color, CONNECTION_SPEC.thickness)
+    for index in range(len(pixels)):
+        if visible[index]:
+            cv2.circle(frame, pixels[index], LANDMARK_SPEC.circle_radius, LANDMARK_SPEC.color, LANDMARK_SPEC.thickness)
+
+def draw_styled_skeleton(frame, points, rule, h, w):
+    visible = points[:, VISIBILITY] >= rule.config["min_visibility"]
+    for start_idx, end_idx in mp_pose.POSE_CONNECTIONS:
+        if visible[start_idx] and visible[end_idx]:
+            start_point = (int(points[start_idx, 0] * w), int(points[start_idx, 1] * h))
+            end_point = (int(points[end_idx, 0] * w), int(points[end_idx, 1] * h))
+
+            distance = math.hypot(end_point[0] - start_point[0], end_point[1] - start_point[1])
+            thickness = int(max(2, 8 - (distance / 50)))  # thinner for longer bones
+            color = (255 - min(int(distance), 255), 50, 200)  # dynamic color
+
+            cv2.line(frame, start_point, end_point, color, thickness)
+
+def draw_labels(frame, labels):
+    for text, origin, scale, color in labels:
+        cv2.putText(frame, text, origin, cv2.FONT_HERSHEY_SIMPLEX, scale, color, 2)
+
+
+class Tracker:
+    """
+    Runs one ExerciseRule against a video source:
+    capture -> RGB -> pose.process -> rule.update -> draw -> imshow.
+    With record_trace set, the landmarks of every frame are also written to a
+    trace file that replay.py can score again without running the model;
+    with latency set, each of those stages is timed (see latency.py).
+
+    The loop lives here once so every exercise shares the same hot path.
+    That path allocates no frame-sized arrays once it is running: the
+    capture, RGB and mirrored display images are each decoded or converted
+    into one buffer reused every frame, and mirroring happens on the 33
+    landmarks (geometry.mirror_landmarks) rather than on the image, which is
+    only flipped for the window.
+    """
+    # read() decodes every frame into the same buffer, which is only safe
+    # while a frame is done with before the next one is read.
+    reuse_frames = True
+
+    def __init__(self, rule, source=None, poses=None, **config):
+        self.rule = rule
+        self.window_title = rule.window_title
+        self.config = {**CONFIG, **config}
+        self.source = self.config["camera_index"] if source is None else source
+        # Camera frames are shown untracked while the model loads; frames of
+        # a video file wait for it instead of going unscored.
+        self.live = isinstance(self.source, int)
+        # A long-lived caller (see service.py) can hand in its own pose cache
+        # so models stay loaded between trackers; it then owns closing them.
+        self.owns_poses = poses is None
+        self.poses = {} if poses is None else poses
+        self.governor = None
+        complexity = self.config["model_complexity"]
+        if self.config["target_fps"]:
+            self.governor = ComplexityGovernor(start_level(complexity), target_fps=self.config["target_fps"])
+            complexity = self.governor.level["model_complexity"]
+        self.roi = RegionOfInterest() if self.config["roi"] else None
+        self.decimator = Decimator(rule, every=self.config["decimate"]) if self.config["decimate"] > 1 else None
+        self.smoother = LandmarkSmoother() if self.config["smooth"] else None
+        self.latency = None
+        if self.config["latency"] or self.config["latency_overlay"] or self.config["latency_report"]:
+            self.latency = LatencyMonitor()
+
+        # The pose model loads on a background thread while the camera
+        # opens; frames are shown (without tracking) until it is ready. The
+        # governor's models load on the same thread (see infer()).
+        self.pose = None
+        self.pending_pose = None
+        self.timings = {}
+        self.loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tracker-loader")
+        self.pose_future = self.loader.submit(self.warm_up, complexity)
+        self.cap = None
+        self.frame_rate = None  # of a video file, whose frames are timed by their position
+        self.frames_read = 0
+        self.t = None           # time of the latest evaluated frame, on the rules' clock
+        self.capture_buffer = None
+        self.rgb_buffer = None
+        self.display_buffer = None
+        self.trace = None
+        self.stop_event = threading.Event()
+
+        if self.config["headless"]:
+            self.config["show_window"] = False
+        # Rep cues and spoken corrections run on the feedback thread (audio
+        # loads there too); headless runs keep the thread but make no sound.
+        self.feedback = None
+        if self.config["play_sound"] or self.config["speak_corrections"]:
+            backend = NullBackend() if self.config["headless"] else \
+                AudioBackend(sound=self.config["play_sound"], speech=self.config["speak_corrections"])
+            self.feedback = Feedback(backend)
+        self.events = None
+        self.event_sink = None
+        if self.config["events"] is not None:
+            sink = self.config["events"]
+            if not callable(sink):
+                sink = self.event_sink = open_sink(sink)
+            self.events = EventEmitter(rule, sink)
+
+    def warm_up(self, model_complexity, timing="model_load"):
+        start = time.perf_counter()
+        pose = self.load_pose(model_complexity)
+        # MediaPipe builds its graph on the first process() call; do that
+        # here too instead of stalling the first tracked frame.
+        pose.process(np.zeros((256, 256, 3), dtype=np.uint8))
+        self.timings[timing] = time.perf_counter() - start
+        return pose
+
+    def pose_ready(self):
+        """
+        True once the pose model has loaded; never blocks.
+        """
+        if self.pose is None and self.pose_future.done():
+            self.pose = self.pose_future.result()
+        return self.pose is not None
+
+    def load_pose(self, model_complexity):
+        # Pose models are kept per complexity so the governor can switch back
+        # and forth without paying the load cost again.
+        if model_complexity not in self.poses:
+            self.poses[model_complexity] = create_pose(model_complexity)
+        return self.poses[model_complexity]
+
+    # === Stages ===
+    # process() runs these back to back; the pipelined tracker runs each on
+    # its own thread.
+    def prepare(self, frame):
+        """
+        The RGB copy of a BGR frame that the model reads. The frame is not
+        flipped for mirroring; landmarks() mirrors the pose instead.
+        """
+        self.rgb_buffer = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self.rgb_buffer)
+        return self.rgb_buffer
+
+    def infer(self, rgb):
+        scale = self.governor.level["scale"] if self.governor is not None else 1.0
+        if self.roi is not None:
+            rgb = self.roi.crop(rgb, scale)
+        elif scale != 1.0:
+            rgb = cv2.resize(rgb, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+        if self.pose is None:
+            self.pose = self.pose_future.result()  # callers driving the stages directly just wait
+        elif self.pending_pose is not None and self.pending_pose.done():
+            pending, self.pending_pose = self.pending_pose, None
+            if pending.exception() is None:
+                self.pose = pending.result()
+            else:
+                print(f"Pose model switch failed, keeping the current model: {pending.exception()!r}",
+                      file=sys.stderr)
+        start = time.perf_counter()
+        results = self.pose.process(rgb)
+        elapsed = time.perf_counter() - start
+
+        if self.roi is not None:
+            self.roi.update(results)
+        # While the next model loads, the frame times are the old model's
+        # and say nothing about the new level.
+        if self.governor is not None and self.pending_pose is None and self.governor.record(elapsed):
+            complexity = self.governor.level["model_complexity"]
+            if complexity in self.poses:
+                self.pose = self.poses[complexity]  # loaded before (or only the scale changed)
+            else:
+                # Building a model takes hundreds of milliseconds, the very
+                # stall the governor is there to avoid, so it happens on the
+                # loader thread while the current model keeps running.
+                self.pending_pose = self.loader.submit(self.warm_up, complexity, "model_switch")
+        return results
+
+    def landmarks(self, results):
+        """
+        Converts the frame's pose landmarks once into a (33, 4) array, or None.
+        With mirror on, these are the landmarks of the flipped frame (left
+        and right swapped), so rules see the athlete as in the window.
+        """
+        if not results.pose_landmarks:
+            return None
+        return landmarks_to_array(results.pose_landmarks.landmark, mirror=self.config["mirror"])
+
+    def smooth(self, t, points):
+        if self.smoother is None:
+            return points
+        return self.smoother(t, points)
+
+    def record(self, t, points, h, w):
+        """
+        Appends the frame's landmarks to the trace file when recording is on.
+        """
+        if not self.config["record_trace"]:
+            return
+        if self.trace is None:
+            from .trace import TraceWriter
+            self.trace = TraceWriter(self.config["record_trace"], h, w)
+        self.trace.write(t, points)
+
+    def evaluate(self, points, h, w, t=None, captured_at=None):
+        """
+        Steps the rule on a frame's landmarks at time `t` (see frame_time());
+        `captured_at` is the frame's perf_counter() capture time when `t` is
+        on another clock, for the capture-to-rep latency.
+        """
+        t = self.t = time.perf_counter() if t is None else t
+        if points is None:
+            return False
+        counted = self.rule.update(points, h, w, t)
+        if counted and self.latency is not None:
+            self.latency.rep(t if captured_at is None else captured_at)
+        if self.feedback is not None:
+            self.feedback.observe(t, counted, self.rule.form_warning() if self.config["speak_corrections"] else None)
+        if self.events is not None:
+            self.events.observe(t, counted)
+        return counted
+
+    def display(self, frame):
+        """
+        The frame as the window shows it: flipped into a reused buffer when
+        mirroring, otherwise the frame itself (drawn on in place).
+        """
+        if not self.config["mirror"]:
+            return frame
+        self.display_buffer = cv2.flip(frame, 1, dst=self.display_buffer)
+        return self.display_buffer
+
+    def render(self, frame, results, points, labels=None):
+        """
+        Draws the frame's overlays. `labels` are the rule's labels() for the
+        frame, taken now if not given (see PipelinedTracker for why not).
+        """
+        if self.config["headless"]:
+            return frame
+        frame = self.display(frame)
+        if self.config["mirror"]:
+            results = None  # pose results are in unflipped coordinates; draw the mirrored points
+        if points is not None:
+            h, w, _ = frame.shape
+            draw_skeleton(frame, results, points, self.rule, h, w)
+            draw_labels(frame, self.rule.labels() if labels is None else labels)
+        status = [part.label() for part in (self.governor, self.roi, self.decimator) if part is not None]
+        if not self.pose_ready():
+            status.insert(0, "Loading pose model...")
+        if status:
+            cv2.putText(frame, " | ".join(status), (30, frame.shape[0] - 20),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (200, 200, 200), 1)
+        if self.latency is not None and self.config["latency_overlay"]:
+            self.latency.draw(frame)
+        return frame
+
+    def lap(self, stage, since):
+        """
+        Records a stage that ran from `since` until now when latency is on;
+        returns the time the next stage starts from.
+        """
+        if self.latency is None:
+            return since
+        return self.latency.lap(stage, since)
+
+    def process(self, frame, t=None, captured_at=None):
+        """
+        Runs one BGR frame through pose detection and the rule and draws the
+        overlays. Returns the annotated frame and whether a rep was counted.
+        `t` is the frame's time on the rules' clock (see frame_time()),
+        now if not given.
+        """
+        start = time.perf_counter()
+        now = start if t is None else t
+        h, w, _ = frame.shape
+        if self.live and not self.pose_ready():
+            return self.render(frame, None, None), False
+        if self.decimator is not None:
+            points = self.decimator.predict(now, h, w)
+            if points is not None:
+                # The decimator already stepped the rule; predicted frames
+                # never decide a rep.
+                self.record(now, points, h, w)
+                if self.events is not None:
+                    self.events.observe(now, False)
+                mark = self.lap("rule", start)
+                frame = self.render(frame, None, points)
+                self.lap("draw", mark)
+                return frame, False
+
+        rgb = self.prepare(frame)
+        mark = self.lap("prepare", start)
+        results = self.infer(rgb)
+        mark = self.lap("infer", mark)
+        points = self.smooth(now, self.landmarks(results))
+        if self.decimator is not None:
+            self.decimator.observe(now, points)
+        self.record(now, points, h, w)
+        counted = self.evaluate(points, h, w, now, captured_at)
+        mark = self.lap("rule", mark)
+        frame = self.render(frame, results, points)
+        self.lap("draw", mark)
+        return frame, counted
+
+    def show(self, frame):
+        """
+        Displays a frame; returns False once the user asked to quit.
+        """
+        if not self.config["show_window"]:
+            return True
+        cv2.imshow(self.window_title, frame)
+        return cv2.waitKey(5) & 0xFF != ord(self.config["quit_key"])
+
+    def open(self):
+        self.cap = cv2.VideoCapture(self.source)
+        self.frames_read = 0
+        if not self.live:
+            self.frame_rate = self.cap.get(cv2.CAP_PROP_FPS) or FILE_FPS
+        if self.latency is not None and self.live:
+            # Video files never skip frames; only a camera can drop them.
+            self.latency.set_frame_rate(self.cap.get(cv2.CAP_PROP_FPS))
+
+    def read(self):
+        """
+        Reads the next frame. Returns (frame, capture time), frame None at
+        the end of the source.
+        """
+        start = time.perf_counter()
+        if self.reuse_frames:
+            ret, frame = self.cap.read(self.capture_buffer)
+            self.capture_buffer = frame
+        else:
+            ret, frame = self.cap.read()
+        captured_at = time.perf_counter()
+        if not ret:
+            return None, captured_at
+        self.frames_read += 1
+        if self.latency is not None:
+            self.latency.captured(start, captured_at)
+        return frame, captured_at
+
+    def frame_time(self, captured_at, index):
+        """
+        The time rules see for frame `index` (from 0) of the source: when it
+        was captured from a camera, its position in a video file, so a file
+        counts the same reps however fast it is processed.
+        """
+        if self.frame_rate is None:
+            return captured_at
+        return index / self.frame_rate
+
+    def present(self, frame, captured_at):
+        """
+        show() plus the display and capture-to-display timings.
+        """
+        if self.latency is None:
+            return self.show(frame)
+        mark = time.perf_counter()
+        shown = self.show(frame)
+        self.latency.lap("display", mark)
+        self.latency.displayed(captured_at)
+        return shown
+
+    def run(self):
+        self.open()
+        try:
+            while not self.stop_event.is_set() and self.cap.isOpened():
+                frame, captured_at = self.read()
+                if frame is None:
+                    break
+
+                frame, _ = self.process(frame, self.frame_time(captured_at, self.frames_read - 1), captured_at)
+
+                if not self.present(frame, captured_at):
+                    break
+        finally:
+            self.close()
+        return self.rule.rep_count
+
+    def stop(self):
+        """
+        Asks run() to return after the current frame; safe from any thread.
+        """
+        self.stop_event.set()
+
+    def close(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+        if self.config["show_window"]:
+            cv2.destroyAllWindows()
+        self.loader.shutdown(wait=self.owns_poses)  # let the loader finish before closing its models
+        if self.owns_poses:
+            for pose in self.poses.values():
+                pose.close()
+        if self.trace is not None:
+            self.trace.close()
+        if self.latency is not None and self.config["latency_report"]:
+            self.latency.dump(self.config["latency_report"])
+        if self.feedback is not None:
+            self.feedback.close()
+            self.feedback = None
+        if self.events is not None:
+            self.events.end(time.perf_counter() if self.t is None else self.t)
+            self.events = None
+        if self.event_sink is not None:
+            self.event_sink.close()
+
+
+def run(rule, **config):
+    """
+    Convenience entry point used by the per-exercise scripts.
+    """
+    settings = {**CONFIG, **config}
+    if settings["pipelined"] and settings["decimate"] > 1:
+        raise ValueError("decimate needs the rule in step with inference; it can't be combined with pipelined")
+    if settings["processes"]:
+        from .multiprocess import MultiProcessTracker
+        return MultiProcessTracker(rule, **config).run()
+    if settings["pipelined"]:
+        from .pipeline import PipelinedTracker
+        return PipelinedTracker(rule, **config).run()
+    return Tracker(rule, **config).run()
@@ -1,13 +1,7 @@
-import cv2
-import mediapipe as mp
-import math
-import os
-import pygame
+from .geometry import Features, all_visible
+from .metrics import RepMetrics
+from .rules import ExerciseRule, LABEL_COLOR
 
-pygame.mixer.init()
-sound = pygame.mixer.Sound("exercise_tracking/sfx_point.mp3")  # Use WAV for better compatibility if possible
-
-os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'  # Only show errors, no warnings or info
 # === CONFIGURATION ===
 CONFIG = {
     "show_labels": True,
@@ -16,44 +10,18 @@ CONFIG = {
     "show_form_warnings": True
 }
 
-# === Setup Pose Detection ===
-mp_pose = mp.solutions.pose
-mp_drawing = mp.solutions.drawing_utils
-pose = mp_pose.Pose(static_image_mode=False, model_complexity=2)
-
-# === Landmark indices ===
-KEYPOINTS = {
-    "RIGHT_SHOULDER": 12,
-    "RIGHT_ELBOW": 14,
-    "RIGHT_WRIST": 16,
-    "RIGHT_HIP": 24
-}
-
-rep_count = 0
-rep_state = "WAITING_DOWN"
-hit_top = False
-bad_form = False
-
-# === Utility Functions ===
-def visible(lm):
-    return lm.visibility >= CONFIG["min_visibility"]
-
-def get_point(lm, h, w):
-    return (int(lm.x * w), int(lm.y * h))
-
-def calc_angle(a, b, c):
-    ba = [a[0] - b[0], a[1] - b[1]]
-    bc = [c[0] - b[0], c[1] - b[1]]
-    dot = ba[0] * bc[0] + ba[1] * bc[1]
-    mag_ba = math.sqrt(ba[0]**2 + ba[1]**2)
-    mag_bc = math.sqrt(bc[0]**2 + bc[1]**2)
-    angle = math.acos(dot / (mag_ba * mag_bc + 1e-6))
-    return math.degrees(angle)
+# === Landmarks and derived features ===
+FEATURES = Features(
+    angles={"angle": ("RIGHT_SHOULDER", "RIGHT_ELBOW", "RIGHT_WRIST")},
+    points=["RIGHT_SHOULDER", "RIGHT_HIP"],
+    visible=["RIGHT_SHOULDER", "RIGHT_ELBOW", "RIGHT_WRIST", "RIGHT_HIP"],
+    scale=True
+)
+METRICS = RepMetrics(signal="angle")  # counted at full extension: the return up comes first
 
 # === Tricep Pulldown Detection ===
-def detect_pulldown(landmarks, h, w):
-    required = ["RIGHT_SHOULDER", "RIGHT_ELBOW", "RIGHT_WRIST", "RIGHT_HIP"]
-    if not all(visible(landmarks[KEYPOINTS[k]]) for k in required):
+def detect_pulldown(f, config=CONFIG):
+    if not all_visible(f):
         return {
             "pull_down": False,
             "arm_reset": False,
@@ -61,17 +29,12 @@ def detect_pulldown(landmarks, h, w):
             "angle": None
         }
 
-    shoulder = get_point(landmarks[KEYPOINTS["RIGHT_SHOULDER"]], h, w)
-    elbow = get_point(landmarks[KEYPOINTS["RIGHT_ELBOW"]], h, w)
-    wrist = get_point(landmarks[KEYPOINTS["RIGHT_WRIST"]], h, w)
-    hip = get_point(landmarks[KEYPOINTS["RIGHT_HIP"]], h, w)
-
     # Elbow angle
-    angle = calc_angle(shoulder, elbow, wrist)
+    angle = f["angle"]
 
     # Posture check (back arch)
-    vertical_line_diff = abs(shoulder[0] - hip[0])
-    form_ok = vertical_line_diff < 40  # if back is aligned well from the side
+    vertical_line_diff = abs(f["RIGHT_SHOULDER_x"] - f["RIGHT_HIP_x"])
+    form_ok = vertical_line_diff < 0.31 * f["body_scale"]  # if back is aligned well from the side (40 px at a 130 px torso)
 
     return {
         "pull_down": angle > 160,
@@ -80,66 +43,56 @@ def detect_pulldown(landmarks, h, w):
         "angle": int(angle)
     }
 
-# === Webcam Setup ===
-
-cap = cv2.VideoCapture(0)
-
-while cap.isOpened():
-    ret, frame = cap.read()
-    if not ret:
-        break
-
-    frame = cv2.flip(frame, 1)
-    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    results = pose.process(rgb)
-
-    if results.pose_landmarks:
-        h, w, _ = frame.shape
-        landmarks = results.pose_landmarks.landmark
-
-        phase = detect_pulldown(landmarks, h, w)
-        bad_form = not phase["form_ok"]
-
-        if rep_state == "WAITING_DOWN":
+# === Tricep Pulldown Rule ===
+class TricepPulldownRule(ExerciseRule):
+    name = "Pulldown"
+    window_title = "Tricep Pulldown Tracker (Form + Reps)"
+    initial_state = "WAITING_DOWN"
+    CONFIG = CONFIG
+    features = FEATURES
+    metrics = METRICS
+
+    def reset(self):
+        super().reset()
+        self.hit_top = False
+        self.bad_form = False
+        self.phase = None
+
+    def step(self, f):
+        phase = self.phase = self.debounce(detect_pulldown(f, self.config))
+        self.bad_form = not phase["form_ok"]
+
+        if self.rep_state == "WAITING_DOWN":
             if phase["arm_reset"]:
-                hit_top = True
-                rep_state = "WAITING_UP"
-
-        elif rep_state == "WAITING_UP":
-            if hit_top and phase["pull_down"]:
-                if not bad_form:
-                    rep_count += 1
-                    sound.play()
-                hit_top = False
-                rep_state = "WAITING_DOWN"
-
-        # === Draw Landmarks ===
-        mp_drawing.draw_landmarks(
-            frame,
-            results.pose_landmarks,
-            mp_pose.POSE_CONNECTIONS,
-            mp_drawing.DrawingSpec(color=(0, 0, 255), thickness=2, circle_radius=4),
-            mp_drawing.DrawingSpec(color=(255, 255, 255), thickness=3)
-        )
-
-        # === Display Info ===
-        if CONFIG["show_labels"]:
-            label = f"Pulldown: {rep_state.replace('_', ' ').title()} | Angle: {phase['angle']}"
-            if hit_top:
-                label += " (Ready ✔)"
-            cv2.putText(frame, label, (30, 40), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2)
-
-        if CONFIG["show_reps"]:
-            cv2.putText(frame, f"Pulldown Reps: {rep_count}", (30, 80), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 100), 2)
-
-        if CONFIG["show_form_warnings"] and bad_form:
-            cv2.putText(frame, "⚠️ Keep Back Upright!", (30, 120), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 100, 255), 2)
-
-    cv2.imshow("Tricep Pulldown Tracker (Form + Reps)", frame)
-
-    if cv2.waitKey(5) & 0xFF == ord('q'):
-        break
-
-cap.release()
-cv2.destroyAllWindows()
-pose.close()
+                self.hit_top = True
+                self.rep_state = "WAITING_UP"
+
+        elif self.rep_state == "WAITING_UP":
+            if self.hit_top and phase["pull_down"]:
+                counted = not self.bad_form
+                if counted:
+                    self.rep_count += 1
+                self.hit_top = False
+                self.rep_state = "WAITING_DOWN"
+                return counted
+        return False
+
+    def labels(self):
+        overlays = super().labels()
+        if self.config["show_form_warnings"] and self.bad_form:
+            overlays.append(("⚠️ " + self.form_warning(), (30, 120), 0.7, (0, 100, 255)))
+        return overlays
+
+    def form_warning(self):
+        return "Keep Back Upright!" if self.bad_form else None
+
+    def state_labels(self):
+        label = f"Pulldown: {self.rep_state.replace('_', ' ').title()} | Angle: {self.phase['angle']}"
+        if self.hit_top:
+            label += " (Ready ✔)"
+        return [(label, (30, 40), 0.8, LABEL_COLOR)]
+
+
+if __name__ == "__main__":
+    from .tracker import run
+    run(TricepPulldownRule())
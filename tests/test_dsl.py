@@ -0,0 +1,56 @@
+"""
+The DSL's generated detect() on single frames (update) and whole batches
+(replay), over the bench's scripted lateral raise.
+"""
+import pytest
+
+from exercise_tracking.bench import synthesize
+from exercise_tracking.dsl import Exercise
+from exercise_tracking.lat import LATERAL_RAISE
+from exercise_tracking.replay import replay
+
+
+def lateral_raise(**phases):
+    return Exercise(
+        name="Lateral Raise",
+        keypoints=LATERAL_RAISE.keypoints,
+        midpoints=LATERAL_RAISE.midpoints,
+        thresholds=LATERAL_RAISE.thresholds,
+        phases={**LATERAL_RAISE.phases, **phases},
+        initial_state="WAITING_UP",
+        transitions=LATERAL_RAISE.transitions)
+
+
+def count_update(rule, sequence):
+    for t, points in zip(sequence.timestamps.tolist(), sequence.landmarks):
+        rule.update(points, sequence.h, sequence.w, t)
+    return rule.rep_count
+
+
+@pytest.mark.parametrize("exercise", [
+    LATERAL_RAISE,
+    lateral_raise(arms_down="all_visible and not (wrist_y < shoulder_y + lower_margin * body_scale)")
+], ids=["lateral_raise", "not"])
+def test_update_and_replay_count_the_same(exercise):
+    rule_class = exercise.compile()
+    sequence = synthesize("lateral_raise")
+    assert count_update(rule_class(), sequence) == sequence.expected
+    assert replay(sequence, rule_class()) == sequence.expected
+
+
+def test_chained_comparison():
+    rule_class = lateral_raise(
+        arms_down="all_visible and shoulder_y + lower_margin * body_scale < wrist_y < shoulder_y + 10 * body_scale"
+    ).compile()
+    sequence = synthesize("lateral_raise")
+    assert count_update(rule_class(), sequence) == replay(sequence, rule_class()) == sequence.expected
+
+
+@pytest.mark.parametrize("phase, message", [
+    ("wrist_y < elbow_y", "unknown name 'elbow_y'"),
+    ("__import__('os')", "__import__"),
+    ("wrist_y <", "arms_down")
+])
+def test_bad_expressions_are_rejected(phase, message):
+    with pytest.raises(ValueError, match=message):
+        lateral_raise(arms_down=phase).compile()
@@ -0,0 +1,50 @@
+"""
+The pipelined tracker on a video file: every frame is scored, so it counts
+what the sequential tracker counts.
+"""
+import os
+
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+pytest.importorskip("mediapipe")
+
+from exercise_tracking import create_rule
+from exercise_tracking.pipeline import PipelinedTracker
+from exercise_tracking.tracker import Tracker
+
+DEMO = os.path.join(os.path.dirname(__file__), os.pardir, "train-buddy", "public", "exercises", "pullups.gif")
+
+
+@pytest.fixture(scope="module")
+def clip(tmp_path_factory):
+    """
+    The pull-up demo looped three times into a video file.
+    """
+    cap = cv2.VideoCapture(DEMO)
+    frames = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    h, w, _ = frames[0].shape
+    path = str(tmp_path_factory.mktemp("clip") / "pull_up.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 4.0, (w, h))
+    for frame in frames * 3:
+        writer.write(frame)
+    writer.release()
+    return path, len(frames) * 3
+
+
+def test_pipelined_counts_a_file_like_the_sequential_tracker(clip):
+    path, frame_count = clip
+    config = {"model_complexity": 1, "headless": True, "play_sound": False}
+    sequential = Tracker(create_rule("pull_up"), path, **config).run()
+    pipelined = PipelinedTracker(create_rule("pull_up"), path, **config)
+    reps = pipelined.run()
+    assert sequential > 0
+    assert reps == sequential
+    assert pipelined.stats == {"captured": frame_count, "inferred": frame_count, "rendered": frame_count}
+    assert pipelined.dropped == 0
@@ -0,0 +1,87 @@
+"""
+Exercise rules on scripted landmark motions (see bench.py's poses): what
+counts as a rep and what doesn't.
+"""
+import numpy as np
+
+from exercise_tracking import create_rule
+from exercise_tracking.Pull_up import FEATURES as PULL_UP_FEATURES, detect_pullup_status
+from exercise_tracking.bench import pose_array
+from exercise_tracking.deadlift_tracker import FEATURES as DEADLIFT_FEATURES, detect_deadlift_status
+
+H, W, FPS = 480, 640, 30
+
+
+def count(exercise, start, turn, reps=3, rep_seconds=2.0):
+    """
+    Reps counted over `reps` cosine cycles start -> turn -> start, with a
+    second at the start pose before and after.
+    """
+    a, b = pose_array(start), pose_array(turn)
+    cycle = (1 - np.cos(np.linspace(0, 2 * np.pi, int(rep_seconds * FPS), endpoint=False))) / 2
+    phase = np.concatenate([np.zeros(FPS), np.tile(cycle, reps), np.zeros(FPS)])
+    rule = create_rule(exercise)
+    for index, p in enumerate(phase.tolist()):
+        rule.update(a + np.float32(p) * (b - a), H, W, index / FPS)
+    return rule.rep_count
+
+
+# === Pull Up ===
+HANG = {"LEFT_WRIST": (0.60, 0.20), "RIGHT_WRIST": (0.40, 0.20),
+        "LEFT_SHOULDER": (0.56, 0.40), "RIGHT_SHOULDER": (0.44, 0.40), "NOSE": (0.50, 0.28)}
+
+
+def pull_up_top(shoulder_y, nose_y, **overrides):
+    return {**HANG, "LEFT_SHOULDER": (0.56, shoulder_y), "RIGHT_SHOULDER": (0.44, shoulder_y),
+            "NOSE": (0.50, nose_y), **overrides}
+
+
+def pull_up_status(pose):
+    return detect_pullup_status(PULL_UP_FEATURES(pose_array(pose), H, W))
+
+
+def test_pull_up_top_with_the_shoulders_below_the_bar():
+    assert pull_up_status(pull_up_top(0.24, 0.12))["pullup"]
+    assert count("pull_up", HANG, pull_up_top(0.24, 0.12)) == 3
+
+
+def test_pull_up_top_with_the_shoulders_just_past_the_bar():
+    # At the top of a full pull-up the shoulders come level with the hands
+    # or pass them a little (14 px here, about 0.08 body scales) while the
+    # chin clears the bar.
+    assert pull_up_status(pull_up_top(0.17, 0.13))["pullup"]
+    assert count("pull_up", HANG, pull_up_top(0.17, 0.13)) == 3
+
+
+def test_pull_up_top_with_the_shoulders_far_past_the_bar():
+    # 58 px (0.26 body scales) past the hands is no longer hanging from them.
+    assert not pull_up_status(pull_up_top(0.08, 0.02))["pullup"]
+
+
+def test_pull_up_does_not_count_a_top_with_uneven_hands():
+    assert count("pull_up", HANG, pull_up_top(0.24, 0.12, LEFT_WRIST=(0.60, 0.14))) == 0
+
+
+# === Deadlift ===
+LIFT = {"LEFT_WRIST": (0.58, 0.80), "RIGHT_WRIST": (0.42, 0.80), "LEFT_HIP": (0.54, 0.66), "RIGHT_HIP": (0.46, 0.66)}
+
+
+def deadlift_status(pose):
+    return detect_deadlift_status(DEADLIFT_FEATURES(pose_array(pose), H, W))
+
+
+def test_deadlift_counts_with_the_feet_planted():
+    assert deadlift_status({})["feet_static"]
+    assert count("deadlift", {}, LIFT) == 3
+
+
+def test_deadlift_feet_level_within_the_tolerance():
+    # Ankles 5 px (0.04 body scales) apart: landmark jitter, not a step.
+    assert deadlift_status({"LEFT_ANKLE": (0.54, 0.90 + 5 / H)})["feet_static"]
+
+
+def test_deadlift_does_not_count_with_a_foot_raised():
+    # 29 px, about 0.22 body scales.
+    foot_up = {"LEFT_ANKLE": (0.54, 0.84)}
+    assert not deadlift_status(foot_up)["feet_static"]
+    assert count("deadlift", foot_up, {**LIFT, **foot_up}) == 0
@@ -1,7 +1,7 @@
 "use client";
 
 import { useParams, useRouter } from "next/navigation";
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import { Card, CardContent } from "@/components/ui/card";
 import { Button } from "@/components/ui/button";
 import { motion, AnimatePresence } from "framer-motion";
@@ -24,6 +24,7 @@ export default function ExercisePage() {
   const [progress, setProgress] = useState(0);
   const [isCompleted, setIsCompleted] = useState(false);
   const [started, setStarted] = useState(false);
+  const streamRef = useRef<EventSource | null>(null);
 
   useEffect(() => {
     const plan = JSON.parse(localStorage.getItem("workoutPlan") || "{}");
@@ -35,6 +36,8 @@ export default function ExercisePage() {
     setIsCompleted(isExerciseCompleted(Number(day), name));
   }, [day, name]);
 
+  useEffect(() => () => streamRef.current?.close(), []);
+
   useEffect(() => {
     if (exercise) {
       const totalReps = exercise.sets * exercise.reps;
@@ -53,6 +56,23 @@ export default function ExercisePage() {
     }
   };
 
+  // Live rep counts from the tracker: each message carries only the fields
+  // that changed since the last one.
+  const followSession = (sessionId: string) => {
+    streamRef.current?.close();
+    const stream = new EventSource(
+      `http://127.0.0.1:5000/exercise-stream/${sessionId}`
+    );
+    stream.onmessage = (message) => {
+      const delta = JSON.parse(message.data);
+      if (typeof delta.rep_count === "number" && exercise) {
+        setCurrentRep(Math.min(delta.rep_count, exercise.reps));
+      }
+    };
+    stream.addEventListener("end", () => stream.close());
+    streamRef.current = stream;
+  };
+
   const startExercise = async () => {
     try {
       const res = await fetch("http://127.0.0.1:5000/start-exercise", {
@@ -60,7 +80,8 @@ export default function ExercisePage() {
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({ exercise: exercise?.name }),
       });
-      await res.json();
+      const data = await res.json();
+      if (data.session_id) followSession(data.session_id);
       setStarted(true);
       setTimeout(() => setStarted(false), 3000);
     } catch (err) {
@@ -1,53 +1,134 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 from workout_engine.generator import generate_workouts
+import atexit
+import json
 import os
-import subprocess
+import sys
+import threading
+
+# The trackers live in the exercise_tracking package at the repository root.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from exercise_tracking import PLAN_NAMES
+from exercise_tracking.service import TrackerPool
 
 app = Flask(__name__)
 CORS(app)  # Allow Vercel frontend to call Flask
 
-# ✅ Lookup table to match exercise names to actual .py files
-exercise_script_map = {
-    "Push-ups": "push_ups.py",
-    "Bench Press": "Bench_press.py",
-    "Shoulder Press": "shoulder_press.py",
-    "Tricep Pulldown": "tricep_pulldown.py",
-    "Lateral Raises": "lat.py",
-    "Squats": "squat_tracker.py",
-    "Lunges": "lunges.py",
-    "Crunches": "crunches_seated.py",
-    "Bicep Curl": "bicep_curl.py",
-    "Hammer Curl": "bicep_curl.py",  # Same script as Bicep Curl
-    "Deadlift": "deadlift_tracker.py",
-    "Leg Raises": "leg_raises.py",
-    "Pullups": "Pull_up.py",
-    "Pull-ups": "Pull_up.py",
-    "Lat Pulldowns": "lat.py",
-    "Incline Bench Press": "Bench_press.py"  # fallback
-}
+# ✅ Lookup table to match exercise names to tracker names (see exercise_tracking.PLAN_NAMES)
+exercise_tracker_map = PLAN_NAMES
+
+# Warm tracker workers: each keeps mediapipe and its pose model loaded
+# between sessions, so a click only has to open the camera.
+tracker_pool = None
+tracker_pool_lock = threading.Lock()
+
+def get_tracker_pool():
+    # Requests are served on threads; two first requests must not both
+    # start a pool of worker processes.
+    global tracker_pool
+    with tracker_pool_lock:
+        if tracker_pool is None:
+            tracker_pool = TrackerPool().start()
+            atexit.register(tracker_pool.shutdown)
+    return tracker_pool
 
 @app.route('/start-exercise', methods=['POST'])
 def start_exercise():
-    data = request.json
+    data = request.json or {}
     exercise_name = data.get("exercise")
 
     if not exercise_name:
         return jsonify({"error": "No exercise name provided"}), 400
 
-    script_name = exercise_script_map.get(exercise_name)
-    if not script_name:
-        return jsonify({"error": f"No script found for '{exercise_name}'"}), 404
+    tracker_name = exercise_tracker_map.get(exercise_name)
+    if not tracker_name:
+        return jsonify({"error": f"No tracker found for '{exercise_name}'"}), 404
+
+    try:
+        session_id = get_tracker_pool().start_session(tracker_name, session_id=data.get("session_id"))
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 503
+
+    return jsonify({"status": f"Started {tracker_name}", "session_id": session_id}), 200
+
+@app.route('/start-workout', methods=['POST'])
+def start_workout():
+    # One session for a whole generated workout: {"exercises": [...]} or
+    # {"workout": {...}} as returned by /generate-plan. Sets follow each
+    # other in one warm tracker, so there's no reload between exercises;
+    # /exercise-status and /exercise-stream also report the current set.
+    data = request.json or {}
+    exercises = data.get("exercises") or (data.get("workout") or {}).get("exercises")
+
+    if not exercises:
+        return jsonify({"error": "No exercises provided"}), 400
+
+    try:
+        session_id = get_tracker_pool().start_workout(exercises, session_id=data.get("session_id"))
+    except KeyError as e:
+        return jsonify({"error": e.args[0]}), 404
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 503
+
+    return jsonify({"status": "Started workout", "session_id": session_id}), 200
+
+@app.route('/stop-exercise', methods=['POST'])
+def stop_exercise():
+    data = request.json or {}
+    session_id = data.get("session_id")
+
+    if not session_id:
+        return jsonify({"error": "No session_id provided"}), 400
+
+    if not get_tracker_pool().stop_session(session_id):
+        return jsonify({"error": f"No running session '{session_id}'"}), 404
+
+    return jsonify({"status": f"Stopping {session_id}"}), 200
+
+@app.route('/exercise-status', methods=['GET'])
+@app.route('/exercise-status/<session_id>', methods=['GET'])
+def exercise_status(session_id=None):
+    status = get_tracker_pool().status(session_id)
+    if status is None:
+        return jsonify({"error": f"No session '{session_id}'"}), 404
+    return jsonify(status), 200
+
+@app.route('/exercise-latency', methods=['GET'])
+@app.route('/exercise-latency/<session_id>', methods=['GET'])
+def exercise_latency(session_id=None):
+    # Per-stage p50/p95/p99 (ms), dropped frames and capture-to-rep latency,
+    # refreshed every couple of seconds while a session runs.
+    report = get_tracker_pool().latency(session_id)
+    if report is None:
+        return jsonify({"error": f"No latency report for session '{session_id}'"}), 404
+    return jsonify(report), 200
 
-    # Absolute path to the exercise_tracking directory
-    script_path = os.path.abspath(
-        os.path.join("..", "exercise_tracking", script_name)
-    )
+@app.route('/exercise-stream/<session_id>', methods=['GET'])
+def exercise_stream(session_id):
+    # Server-Sent Events: the first message is the full session status, then
+    # only the fields that changed (rep_count, rep_state, form_warning,
+    # rep_metrics, state).
+    # Changes that arrive while a client is slow are merged, never queued.
+    pool = get_tracker_pool()
+    stream = pool.subscribe(session_id)
+    if stream is None:
+        return jsonify({"error": f"No session '{session_id}'"}), 404
 
-    # Launch the script in a new terminal window (Windows only)
-    subprocess.Popen(["python", script_path], creationflags=subprocess.CREATE_NEW_CONSOLE)
+    def events():
+        try:
+            while not stream.finished:
+                delta = stream.next(timeout=15)
+                if delta:
+                    yield f"id: {delta['seq']}\ndata: {json.dumps(delta)}\n\n"
+                else:
+                    yield ": keep-alive\n\n"
+            yield "event: end\ndata: {}\n\n"
+        finally:
+            pool.unsubscribe(session_id, stream)
 
-    return jsonify({"status": f"Started {script_name}"}), 200
+    return Response(events(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @app.route('/generate-plan', methods=['POST'])
 def generate_plan():
@@ -63,4 +144,8 @@ def health_check():
     return jsonify({"status": "online"}), 200
 
 if __name__ == '__main__':
+    # With the debug reloader this file runs twice; only the serving child
+    # should warm up tracker workers.
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        get_tracker_pool()
     app.run(debug=True)